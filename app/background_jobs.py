@@ -0,0 +1,105 @@
+"""
+Ownership of resumable background jobs (transaction imports, offer broadcasts).
+
+A job row is claimed by one UPDATE that sets status "running", a new
+claim_token and the updated_at heartbeat. A queued job can be claimed, and so
+can a running one whose heartbeat is older than the stale timeout (its worker
+crashed, or is still busy with a slow step).
+
+Every progress write is an UPDATE guarded by the worker's claim_token and the
+progress it started from, made in the same transaction as the work it records.
+If the job has been claimed again meanwhile, the update matches no row: the
+worker rolls back that step and stops, so each step is committed by exactly one
+worker even when two of them run the same job.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+
+
+class JobReclaimed(Exception):
+    """The job was claimed by another worker; the current step must be rolled back"""
+
+
+def claim_job(db: Session, model, job_id: UUID, stale_seconds: int) -> Optional[UUID]:
+    """
+    Atomically take ownership of a queued job, or of a running job whose worker
+    stopped reporting progress. Commits, and returns the claim token to pass to
+    update_job, or None if another worker owns the job.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=stale_seconds)
+    token = uuid4()
+    result = db.execute(
+        update(model)
+        .where(
+            model.id == job_id,
+            or_(
+                model.status == "queued",
+                (model.status == "running") & (model.updated_at < stale_before),
+            )
+        )
+        .values(status="running", claim_token=token, updated_at=now,
+                started_at=func.coalesce(model.started_at, now))
+    )
+    db.commit()
+    return token if result.rowcount == 1 else None
+
+
+def update_job(
+    db: Session,
+    model,
+    job_id: UUID,
+    claim_token: UUID,
+    values: Dict[str, Any],
+    expected: Optional[Dict[str, Any]] = None,
+):
+    """
+    Record progress (and bump the heartbeat) in the caller's transaction, only
+    while this claim still owns the job and its columns still hold `expected`.
+    Raises JobReclaimed otherwise; the caller rolls back. The caller commits.
+    """
+    conditions = [model.id == job_id, model.claim_token == claim_token, model.status == "running"]
+    for column, value in (expected or {}).items():
+        column = getattr(model, column)
+        conditions.append(column.is_(None) if value is None else column == value)
+    result = db.execute(
+        update(model).where(*conditions).values(**{"updated_at": datetime.utcnow(), **values})
+    )
+    if result.rowcount != 1:
+        raise JobReclaimed(f"{model.__tablename__} {job_id} was claimed by another worker")
+
+
+def resume_jobs(model, stale_seconds: int, submit: Callable[[UUID], None]) -> int:
+    """
+    Resubmit jobs left queued or running by a previous process (called on
+    startup); returns how many. A running job may still belong to another worker
+    process, so it is only submitted once its heartbeat is stale.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(model.id, model.status, model.updated_at).filter(
+            model.status.in_(["queued", "running"])
+        ).all()
+    finally:
+        db.close()
+
+    now = datetime.utcnow()
+    for job_id, status, updated_at in jobs:
+        delay = 0
+        if status == "running" and updated_at:
+            stale_at = updated_at + timedelta(seconds=stale_seconds)
+            delay = max((stale_at - now).total_seconds() + 1, 0)
+        if delay:
+            timer = threading.Timer(delay, submit, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+        else:
+            submit(job_id)
+    return len(jobs)
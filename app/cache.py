@@ -0,0 +1,197 @@
+"""
+Small in-process caches with TTL and LRU eviction.
+
+Each cache registers itself by name so hit/miss counters can be reported from
+one place (GET /admin/metrics). Cached values are shared between requests and
+threads, so they must be treated as read-only.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_registry: Dict[str, "TTLCache"] = {}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after `ttl` seconds; least recently used entries are evicted first"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class LocalVersionStore:
+    """Per-key version counters held in this process"""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def bump(self, key: str) -> int:
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+
+class RedisVersionStore:
+    """Version counters shared between worker processes through Redis"""
+
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed when CACHE_REDIS_URL is set
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> int:
+        value = self._client.get(f"cache-version:{key}")
+        return int(value) if value else 0
+
+    def bump(self, key: str) -> int:
+        return int(self._client.incr(f"cache-version:{key}"))
+
+
+_version_store = None
+
+
+def get_version_store():
+    """
+    Version counters used to invalidate cached values. Local to the process unless
+    CACHE_REDIS_URL is set; without it, other processes catch up when their TTL expires.
+    """
+    global _version_store
+    if _version_store is None:
+        if settings.CACHE_REDIS_URL:
+            _version_store = RedisVersionStore(settings.CACHE_REDIS_URL)
+        else:
+            _version_store = LocalVersionStore()
+    return _version_store
+
+
+_PENDING_BUMPS = "cache_versions_to_bump"
+
+
+def bump_after_commit(db: Session, keys: Iterable[str]):
+    """
+    Bump these version keys once db's transaction commits, so no reader can cache
+    data from before the commit under the new version. Keys added inside a
+    savepoint are dropped if it rolls back; nothing is bumped before the
+    outermost transaction commits.
+    """
+    if not db.in_transaction():
+        # Tie the keys to a transaction, so its rollback/close drops them
+        db.begin()
+    transaction = db.get_nested_transaction() or db.get_transaction()
+    db.info.setdefault(_PENDING_BUMPS, {}).setdefault(transaction, set()).update(keys)
+
+
+def _within(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_pending_versions(session):
+    pending = session.info.get(_PENDING_BUMPS)
+    if not pending:
+        return
+    if session.in_nested_transaction():
+        # A savepoint was released: its keys now belong to the enclosing transaction
+        savepoint = session.get_nested_transaction()
+        keys = pending.pop(savepoint, None)
+        if keys:
+            pending.setdefault(savepoint.parent, set()).update(keys)
+        return
+    session.info.pop(_PENDING_BUMPS)
+    try:
+        store = get_version_store()
+        for key in set().union(*pending.values()):
+            store.bump(key)
+    except Exception as e:
+        # Entries expire on their TTL if the shared store is unavailable
+        logger.warning(f"Cache version bump failed: {str(e)}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_versions(session, previous_transaction):
+    # Keys added in the rolled-back transaction or savepoint, or in savepoints inside it
+    pending = session.info.get(_PENDING_BUMPS)
+    if pending:
+        for transaction in [t for t in pending if _within(t, previous_transaction)]:
+            del pending[transaction]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_versions(session, transaction):
+    # Still pending when the outermost transaction ends: it was rolled back or closed
+    if transaction.parent is None:
+        session.info.pop(_PENDING_BUMPS, None)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,178 @@
+"""
+Maintenance commands.
+
+    python -m app.cli rebuild-visit-stats [--business-id ID]
+    python -m app.cli rebuild-daily-stats [--business-id ID]
+    python -m app.cli send-notifications [--channel CHANNEL]
+    python -m app.cli snapshot-points [--business-id ID] [--rebuild]
+    python -m app.cli replay-points [--business-id ID] [--full]
+    python -m app.cli verify-points [--business-id ID] [--samples N]
+    python -m app.cli run-campaigns [--business-id ID] [--date YYYY-MM-DD]
+    python -m app.cli check-indexes [--verbose]
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime, time
+from uuid import UUID
+
+from app.database import SessionLocal
+
+
+def rebuild_visit_stats_command(args):
+    from app.routers.customers.visit_stats_service import rebuild_visit_stats
+    db = SessionLocal()
+    try:
+        rows = rebuild_visit_stats(db, args.business_id)
+        db.commit()
+        print(f"Rebuilt visit stats for {rows} phone number(s)")
+    finally:
+        db.close()
+
+
+def rebuild_daily_stats_command(args):
+    from app.routers.businesses.daily_stats_service import rebuild_daily_stats
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_stats(db, args.business_id)
+        db.commit()
+        print(f"Rebuilt daily stats: {rows} business-day row(s)")
+    finally:
+        db.close()
+
+
+def send_notifications_command(args):
+    from app.routers.notifications.delivery_service import NotificationDispatcher, configured_senders
+    senders = [sender for sender in configured_senders() if args.channel in (None, sender.channel)]
+    if not senders:
+        print("No sender configured (EMAIL_SENDER / SMS_SENDER); nothing sent")
+        return 1
+    dispatcher = NotificationDispatcher(senders)
+    try:
+        processed = dispatcher.drain()
+    finally:
+        dispatcher.stop()
+    for channel, stats in dispatcher.stats().items():
+        print(f"Processed {processed[channel]} {channel} notification(s): {stats['sent']} sent, "
+              f"{stats['retried']} to retry, {stats['failed']} failed, {stats['lost']} lost "
+              f"({stats['sent_per_second']}/s)")
+
+
+def snapshot_points_command(args):
+    from app.routers.rewards.points_replay_service import take_snapshots
+    db = SessionLocal()
+    try:
+        rows = take_snapshots(db, args.business_id, rebuild=args.rebuild)
+        db.commit()
+        print(f"Snapshotted points for {rows} customer(s) with new ledger entries")
+    finally:
+        db.close()
+
+
+def replay_points_command(args):
+    from app.routers.rewards.points_replay_service import replay_balances
+    db = SessionLocal()
+    try:
+        rows = replay_balances(db, args.business_id, full=args.full)
+        db.commit()
+        print(f"Replayed the points ledger: corrected {rows} customer balance(s)")
+    finally:
+        db.close()
+
+
+def verify_points_command(args):
+    from app.routers.rewards.points_replay_service import verify_balances
+    db = SessionLocal()
+    try:
+        report = verify_balances(db, args.business_id, sample_size=args.samples)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    # Non-zero exit when balances drift, for cron/monitoring
+    return 1 if report["drifted"] else 0
+
+
+def run_campaigns_command(args):
+    from app.routers.campaigns.campaign_service import run_campaigns
+    # A past --date is evaluated as of the end of that day
+    as_of = datetime.combine(args.date, time.max) if args.date else None
+    db = SessionLocal()
+    try:
+        report = run_campaigns(db, as_of, args.business_id)
+    finally:
+        db.close()
+    print(f"Evaluated {report['campaigns']} campaign(s): {report['awards']} new award(s), "
+          f"credited {report['credited']} award(s) for {report['points']} point(s)")
+    for campaign_id, reason in report["skipped"].items():
+        print(f"Skipped campaign {campaign_id}: {reason}")
+
+
+def check_indexes_command(args):
+    from app.query_plans import check_query_plans
+    db = SessionLocal()
+    try:
+        results = check_query_plans(db)
+    finally:
+        db.rollback()
+        db.close()
+    for result in results:
+        if result.full_scans:
+            print(f"FULL SCAN  {result.name}: {', '.join(result.full_scans)} (expected {result.index})")
+        else:
+            print(f"ok         {result.name}")
+        if args.verbose or result.full_scans:
+            for line in result.plan:
+                print(f"             {line}")
+    # Non-zero exit when a hot query lost its index, for CI/monitoring
+    return 1 if any(result.full_scans for result in results) else 0
+
+
+def main(argv=None):
+    # Importing the app registers every model with SQLAlchemy and creates missing tables
+    import app.main  # noqa: F401
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Zeno Rewards maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-visit-stats", help="Recompute customer_visit_stats from transactions")
+    rebuild.add_argument("--business-id", type=UUID, default=None, help="Only rebuild this business")
+    rebuild.set_defaults(func=rebuild_visit_stats_command)
+
+    daily = commands.add_parser("rebuild-daily-stats", help="Recompute business_daily_stats from the raw tables")
+    daily.add_argument("--business-id", type=UUID, default=None, help="Only rebuild this business")
+    daily.set_defaults(func=rebuild_daily_stats_command)
+
+    send = commands.add_parser("send-notifications", help="Send all due notifications once and exit")
+    send.add_argument("--channel", default=None, help="Only send this channel (email, sms)")
+    send.set_defaults(func=send_notifications_command)
+
+    snapshot = commands.add_parser("snapshot-points", help="Advance per-customer points ledger snapshots")
+    snapshot.add_argument("--business-id", type=UUID, default=None, help="Only snapshot this business")
+    snapshot.add_argument("--rebuild", action="store_true", help="Recompute snapshots from the whole ledger")
+    snapshot.set_defaults(func=snapshot_points_command)
+
+    replay = commands.add_parser("replay-points", help="Correct point balances from the points ledger")
+    replay.add_argument("--business-id", type=UUID, default=None, help="Only replay this business")
+    replay.add_argument("--full", action="store_true", help="Replay the whole ledger instead of from snapshots")
+    replay.set_defaults(func=replay_points_command)
+
+    verify = commands.add_parser("verify-points", help="Report point balances that drift from the ledger")
+    verify.add_argument("--business-id", type=UUID, default=None, help="Only verify this business")
+    verify.add_argument("--samples", type=int, default=20, help="Drifted customers to list")
+    verify.set_defaults(func=verify_points_command)
+
+    campaigns = commands.add_parser("run-campaigns", help="Evaluate active campaigns and credit their bonus points")
+    campaigns.add_argument("--business-id", type=UUID, default=None, help="Only evaluate this business")
+    campaigns.add_argument("--date", type=date.fromisoformat, default=None, help="Evaluate as of the end of this day")
+    campaigns.set_defaults(func=run_campaigns_command)
+
+    indexes = commands.add_parser("check-indexes", help="EXPLAIN the hot lookups and fail on a full table scan")
+    indexes.add_argument("--verbose", action="store_true", help="Print every plan, not just failing ones")
+    indexes.set_defaults(func=check_indexes_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,19 @@ load_dotenv()
 
 class Settings:
     DB_URL = os.getenv("DATABASE_URL", "sqlite:///./rewards.db")
+    # Connection pool, per worker process (see README "Database connections")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Optional asyncio engine for read-heavy endpoints, e.g. postgresql+asyncpg://...
+    # (needs the async driver and greenlet installed); empty runs them on the threadpool
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+    # Postgres only; 0 disables
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    # Log statements slower than this at WARNING; 0 disables
+    DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "0"))
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkeyhere")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
@@ -21,6 +34,69 @@ class Settings:
     FROM_NAME = os.getenv("FROM_NAME", "Zeno Rewards")
     SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
     
+    # Notification delivery workers (drain the notifications outbox per channel).
+    # Senders: EMAIL_SENDER smtp | local, SMS_SENDER local; empty leaves the
+    # channel's notifications pending. "local" records messages without sending.
+    NOTIFICATION_WORKER_ENABLED = os.getenv("NOTIFICATION_WORKER_ENABLED", "true").lower() == "true"
+    EMAIL_SENDER = os.getenv("EMAIL_SENDER", "smtp").lower()
+    SMS_SENDER = os.getenv("SMS_SENDER", "").lower()
+    SMS_CONCURRENCY = int(os.getenv("SMS_CONCURRENCY", "4"))
+    # Email concurrency is the SMTP pool size
+    SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    # Reused connections idle longer than this are checked with NOOP first
+    SMTP_IDLE_CHECK_SECONDS = int(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+    EMAIL_RATE_PER_SECOND = float(os.getenv("EMAIL_RATE_PER_SECOND", "10"))
+    NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+    NOTIFICATION_POLL_SECONDS = int(os.getenv("NOTIFICATION_POLL_SECONDS", "5"))
+    NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+    NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "30"))
+    NOTIFICATION_STALE_SECONDS = int(os.getenv("NOTIFICATION_STALE_SECONDS", "300"))
+    
+    # Legacy points_history rows: "inline" writes them in the transaction;
+    # "buffered" inserts them in batches after the transaction commits (a crash
+    # can lose the last flush interval of them)
+    WRITE_BEHIND_MODE = os.getenv("WRITE_BEHIND_MODE", "inline").lower()
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+    WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))
+    # Committers flush themselves once this many rows are waiting
+    WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "50000"))
+    
+    # Offer broadcasts (recipients are enqueued in batches of this size)
+    BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "1"))
+    BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "1000"))
+    
+    # Background transaction imports
+    IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", "./uploads/imports")
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+    # A running job with no progress for this long is treated as crashed and resumed
+    IMPORT_STALE_SECONDS = int(os.getenv("IMPORT_STALE_SECONDS", "300"))
+    
+    # Password hashing (bcrypt runs on its own bounded thread pool during logins);
+    # defaults to half the CPU cores so request handling keeps the rest
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    # Logins waiting beyond this are refused with 503 instead of queueing
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+    
+    # Nightly campaign evaluation (python -m app.cli run-campaigns): days before
+    # the run that are evaluated again, and awards credited per ledger batch
+    CAMPAIGN_LOOKBACK_DAYS = int(os.getenv("CAMPAIGN_LOOKBACK_DAYS", "1"))
+    CAMPAIGN_BATCH_SIZE = int(os.getenv("CAMPAIGN_BATCH_SIZE", "5000"))
+    
+    # Points ledger snapshots only cover entries older than this, so a slow
+    # transaction can't commit an entry behind a snapshot
+    POINTS_SNAPSHOT_LAG_SECONDS = int(os.getenv("POINTS_SNAPSHOT_LAG_SECONDS", "300"))
+    
+    # Caching
+    # Optional Redis URL for sharing cache invalidation between worker processes
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+    RULE_CACHE_TTL_SECONDS = int(os.getenv("RULE_CACHE_TTL_SECONDS", "300"))
+    RULE_CACHE_MAX_BUSINESSES = int(os.getenv("RULE_CACHE_MAX_BUSINESSES", "1000"))
+    CUSTOMER_DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("CUSTOMER_DASHBOARD_CACHE_TTL_SECONDS", "300"))
+    CUSTOMER_DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("CUSTOMER_DASHBOARD_CACHE_MAX_ENTRIES", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    
     # Frontend/Backend URLs
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
     BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
@@ -1,15 +1,223 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from fastapi.concurrency import run_in_threadpool
 from app.config import settings
 
-db_url = settings.DB_URL
+logger = logging.getLogger(__name__)
+
+
+def normalize_db_url(url: str) -> str:
+    """
+    postgres:// and postgresql:// URLs use psycopg2 (the driver in requirements.txt);
+    SQLAlchemy 2.1 would otherwise pick psycopg 3.
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg2://" + url[len("postgresql://"):]
+    return url
+
+
+class _PoolStats:
+    """Checkout counts and time spent waiting for a pooled connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, waited: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including opening a new connection)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = _PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+def _log_slow_queries(engine, threshold_ms: int):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+        if elapsed_ms >= threshold_ms:
+            logger.warning(f"Slow query ({elapsed_ms:.0f} ms): {' '.join(statement.split())[:1000]}")
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
 
-if db_url.startswith("sqlite"):
-    engine = create_engine(db_url, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(db_url)
+def create_db_engine(url: Optional[str] = None):
+    """
+    Engine for `url` (default DATABASE_URL) configured from the DB_* settings:
+    pool size/overflow/timeout/recycle/pre-ping for server databases, a
+    per-statement timeout on Postgres and an optional slow-query log.
+    """
+    url = normalize_db_url(url or settings.DB_URL)
+    backend = make_url(url).get_backend_name()
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+
+    if backend == "sqlite":
+        connect_args["check_same_thread"] = False
+    if backend != "sqlite" or make_url(url).database not in (None, "", ":memory:"):
+        # In-memory SQLite keeps its single-connection pool
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    new_engine = create_engine(url, connect_args=connect_args, **kwargs)
+    if settings.DB_SLOW_QUERY_MS > 0:
+        _log_slow_queries(new_engine, settings.DB_SLOW_QUERY_MS)
+    return new_engine
+
+
+def pool_stats(bind=None) -> Dict[str, Any]:
+    """Connections in use/idle/overflow and checkout wait times for this process's pool"""
+    pool = (bind or engine).pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(
+            checkouts=wait_stats.checkouts,
+            timeouts=wait_stats.timeouts,
+            avg_wait_ms=round(1000 * wait_stats.wait_seconds / wait_stats.checkouts, 2) if wait_stats.checkouts else None,
+            max_wait_ms=round(1000 * wait_stats.max_wait_seconds, 2),
+        )
+    return stats
+
+
+def _create_async_sessionmaker():
+    """
+    AsyncSession factory for ASYNC_DATABASE_URL (e.g. postgresql+asyncpg://...),
+    or None when it is unset or its driver/greenlet isn't installed.
+    """
+    if not settings.ASYNC_DATABASE_URL:
+        return None
+    url = make_url(settings.ASYNC_DATABASE_URL)
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "asyncpg" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    try:
+        import greenlet  # noqa: F401 - required by the asyncio extension
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        async_engine = create_async_engine(url, **kwargs)
+    except ImportError as e:
+        logger.warning(f"ASYNC_DATABASE_URL is set but the async driver is unavailable ({e}); using the threadpool")
+        return None
+    if settings.DB_SLOW_QUERY_MS > 0:
+        _log_slow_queries(async_engine.sync_engine, settings.DB_SLOW_QUERY_MS)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+db_url = normalize_db_url(settings.DB_URL)
+
+engine = create_db_engine(db_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = _create_async_sessionmaker()
+
+# Coroutines queue here rather than in the pool, where they'd time out after
+# DB_POOL_TIMEOUT_SECONDS under a burst (the threadpool bounds the sync path)
+_async_slots = asyncio.Semaphore(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+
+def _with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Call fn(db, *args, **kwargs) from an async endpoint and return its result.
+    With the async engine configured, fn runs through AsyncSession.run_sync and
+    no thread is held while queries wait on the database; otherwise it runs on
+    the request threadpool with a SessionLocal session. fn must commit any
+    writes itself.
+    """
+    if AsyncSessionLocal is None:
+        return await run_in_threadpool(_with_session, fn, *args, **kwargs)
+    async with _async_slots:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(fn, *args, **kwargs)
+
 Base = declarative_base()
+
+
+def dialect_insert(db, model):
+    """
+    INSERT construct for the session's database that supports
+    on_conflict_do_update / on_conflict_do_nothing (Postgres and SQLite).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(model)
@@ -9,6 +9,7 @@ from app.routers.organizations.org_models import Organization
 from app.routers.businesses.biz_models import Business
 from app.routers.businesses.staff_models import Staff
 from app.routers.customers.cust_models import Customer
+from app.principal_cache import load_principal
 
 security = HTTPBearer()
 
@@ -19,7 +20,7 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -53,65 +54,95 @@ def get_current_org(current_user: dict = Depends(get_current_user)):
         )
     return current_user
 
-def get_current_business(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user["role"] not in ("business", "staff"):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Business access required"
-        )
+def resolve_principal(db: Session, current_user: dict) -> dict:
+    """The token's Business/Staff/Customer rows, loaded through the principal cache"""
     from uuid import UUID
 
-    business_id = None
-    if current_user["role"] == "business":
-        business_id = UUID(current_user["business_id"])
-    else:
-        # staff – resolve business via staff record
-        staff_id = UUID(current_user["user_id"])
-        staff = db.query(Staff).filter(Staff.id == staff_id, Staff.active == True).first()
-        if not staff:
+    principal = {"user": current_user}
+    role = current_user["role"]
+    if role == "staff":
+        staff = load_principal(db, Staff, UUID(current_user["user_id"]))
+        if not staff or not staff.active:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Staff not found or inactive"
             )
-        business_id = staff.business_id
+        principal["staff"] = staff
+        principal["business"] = load_principal(db, Business, staff.business_id)
+    elif role == "business":
+        principal["business"] = load_principal(db, Business, UUID(current_user["business_id"]))
+    elif role == "customer":
+        principal["customer"] = load_principal(db, Customer, UUID(current_user["user_id"]))
+    return principal
 
-    business = db.query(Business).filter(Business.id == business_id).first()
-    if not business:
+def get_principal(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+    """resolve_principal as a dependency; FastAPI runs it once per request however many dependencies use it"""
+    return resolve_principal(db, current_user)
+
+# Role checks without a database session, for async endpoints that resolve the
+# principal inside run_db with current_business/current_customer
+
+async def get_business_user(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ("business", "staff"):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Business not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Business access required"
         )
-    return {"user": current_user, "business": business}
-
+    return current_user
 
-def get_current_customer(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_customer_user(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "customer":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Customer access required"
         )
-    from uuid import UUID
-    customer_id = UUID(current_user["user_id"])
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if not customer:
+    return current_user
+
+def _business_of(principal: dict) -> dict:
+    if not principal["business"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Business not found"
+        )
+    return {"user": principal["user"], "business": principal["business"]}
+
+def _customer_of(principal: dict) -> dict:
+    if not principal["customer"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
-    return {"user": current_user, "customer": customer}
+    return {"user": principal["user"], "customer": principal["customer"]}
+
+def current_business(db: Session, business_user: dict) -> dict:
+    """get_current_business's result for a get_business_user token, loaded with db"""
+    return _business_of(resolve_principal(db, business_user))
+
+def current_customer(db: Session, customer_user: dict) -> dict:
+    """get_current_customer's result for a get_customer_user token, loaded with db"""
+    return _customer_of(resolve_principal(db, customer_user))
 
-def get_current_staff(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user["role"] != "staff":
+def get_current_business(principal: dict = Depends(get_principal)):
+    if principal["user"]["role"] not in ("business", "staff"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Staff access required"
+            detail="Business access required"
         )
-    from uuid import UUID
-    staff_id = UUID(current_user["user_id"])
-    staff = db.query(Staff).filter(Staff.id == staff_id, Staff.active == True).first()
-    if not staff:
+    return _business_of(principal)
+
+
+def get_current_customer(principal: dict = Depends(get_principal)):
+    if principal["user"]["role"] != "customer":
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Staff not found or inactive"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Customer access required"
+        )
+    return _customer_of(principal)
+
+def get_current_staff(principal: dict = Depends(get_principal)):
+    if principal["user"]["role"] != "staff":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Staff access required"
         )
-    return {"user": current_user, "staff": staff}
\ No newline at end of file
+    return {"user": principal["user"], "staff": principal["staff"]}
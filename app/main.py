@@ -9,17 +9,22 @@ from app.config import settings
 # Import all models so SQLAlchemy creates tables
 from app.routers.organizations.org_models import Organization
 from app.routers.businesses.biz_models import Business
+from app.routers.businesses.daily_stats_models import BusinessDailyStats
 from app.routers.customers.cust_models import Customer
+from app.routers.customers.visit_stats_models import CustomerVisitStats
 from app.routers.rewards.offers_models import Offer
 from app.routers.rewards.points_models import PointsHistory, EarningRule
-from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance
+from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance, PointBalanceSnapshot
 from app.routers.admin.admin_models import Admin
 from app.routers.transactions.transaction_models import Transaction
+from app.routers.transactions.import_job_models import ImportJob
 from app.routers.businesses.staff_models import Staff
 from app.routers.rewards.redemption_models import Redemption
 from app.routers.rewards.redeemable_offer_models import RedeemableOffer
-from app.routers.campaigns.campaign_models import Campaign
+from app.routers.campaigns.campaign_models import Campaign, CampaignAward
 from app.routers.notifications.notification_models import Notification
+from app.routers.notifications.broadcast_models import OfferBroadcast
+from app.routers.notifications.email_template_models import EmailTemplateOverride
 
 from app.routers.auth.auth_routes import router as auth_router
 from app.routers.organizations.org_routes import router as org_router
@@ -37,6 +42,7 @@ from app.routers.rewards.redeemable_offer_routes import router as redeemable_off
 from app.routers.chat.chat_routes import router as chat_router
 from app.routers.businesses.staff_routes import router as staff_router
 from app.routers.businesses.staff_customer_routes import router as staff_customer_router
+from app.routers.notifications.email_template_routes import router as email_template_router
 
 app = FastAPI()
 
@@ -84,6 +90,40 @@ async def global_exception_handler(request: Request, exc: Exception):
 # CREATE TABLES
 Base.metadata.create_all(bind=engine)
 
+@app.on_event("startup")
+def resume_transaction_imports():
+    """Pick up import jobs interrupted by a restart"""
+    from app.routers.transactions.import_job_service import resume_import_jobs
+    resume_import_jobs()
+
+
+@app.on_event("startup")
+def resume_broadcasts():
+    """Finish offer broadcasts interrupted by a restart"""
+    from app.routers.notifications.broadcast_service import resume_offer_broadcasts
+    resume_offer_broadcasts()
+
+
+@app.on_event("startup")
+def start_notification_delivery():
+    """Send queued notifications (one worker per channel) in the background"""
+    if settings.NOTIFICATION_WORKER_ENABLED:
+        from app.routers.notifications.delivery_service import start_delivery_worker
+        start_delivery_worker()
+
+
+@app.on_event("shutdown")
+def stop_notification_delivery():
+    from app.routers.notifications.delivery_service import stop_delivery_worker
+    stop_delivery_worker()
+
+
+@app.on_event("shutdown")
+def flush_buffered_rows():
+    """Write the points history and notification rows still in the write-behind buffer"""
+    from app.write_behind import stop_write_behind
+    stop_write_behind()
+
 # API ROUTES
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
@@ -101,6 +141,7 @@ app.include_router(points_ledger_router, prefix="/rewards", tags=["Points Ledger
 app.include_router(rule_management_router, prefix="/rewards", tags=["Rule Management"])
 app.include_router(redeemable_offer_router, prefix="/rewards", tags=["Redeemable Offers"])
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+app.include_router(email_template_router, prefix="/business/email-templates", tags=["Email Templates"])
 
 # Serve static files from frontend build in production
 if settings.is_production:
@@ -0,0 +1,84 @@
+"""
+Short-TTL cache of the Business, Staff and Customer rows behind access tokens.
+
+The auth dependencies resolve a token subject to its row on every request.
+Rows are cached here as detached snapshots keyed by table and primary key, and
+each request gets its own copy through Session.merge(load=False): no query, and
+the copy behaves like a loaded row (changes to it are flushed as usual).
+
+Any ORM change to one of these rows (e.g. delete_staff/activate_staff setting
+Staff.active, or editing a business) bumps the row's version once the change
+commits, so the next request reloads it. Without CACHE_REDIS_URL, other
+processes see the change when their entry's TTL expires.
+"""
+import logging
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.cache import TTLCache, bump_after_commit, get_version_store
+from app.config import settings
+from app.routers.businesses.biz_models import Business
+from app.routers.businesses.staff_models import Staff
+from app.routers.customers.cust_models import Customer
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_MODELS = (Business, Staff, Customer)
+
+# Columns also changed by SQL UPDATEs that bypass the ORM; reloaded on access
+_UNCACHED_COLUMNS = {Customer: ["points"]}
+
+_principal_cache = TTLCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def _version_key(model, pk) -> str:
+    return f"principal:{model.__tablename__}:{pk}"
+
+
+def _snapshot(obj):
+    """A detached, unattached copy of a loaded row's column values"""
+    model = type(obj)
+    copy = model(**{attr.key: getattr(obj, attr.key) for attr in inspect(model).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def load_principal(db: Session, model, pk):
+    """The row with this primary key attached to db, from the cache when possible; None if missing"""
+    key = (model.__tablename__, str(pk))
+    try:
+        version = get_version_store().get(_version_key(model, pk))
+    except Exception as e:
+        # A shared store that is down only costs a query
+        logger.warning(f"Principal cache version lookup failed: {str(e)}")
+        version = None
+
+    entry = _principal_cache.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        obj = db.merge(entry[1], load=False)
+        uncached = _UNCACHED_COLUMNS.get(model)
+        if uncached:
+            db.expire(obj, uncached)
+        return obj
+
+    obj = db.get(model, pk)
+    if obj is not None and version is not None:
+        _principal_cache.set(key, (version, _snapshot(obj)))
+    return obj
+
+
+def invalidate_principal(db: Session, model, pk):
+    """Drop the cached row once db commits (ORM changes do this automatically)"""
+    bump_after_commit(db, [_version_key(model, pk)])
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_principals(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, PRINCIPAL_MODELS):
+            invalidate_principal(session, type(obj), inspect(obj).identity[0])
@@ -0,0 +1,140 @@
+"""
+EXPLAIN checks for the hot lookups the indexes in migrations 0002 and 0007
+exist for (python -m app.cli check-indexes).
+
+Each query is compiled for the connected database and EXPLAINed. Any full
+table scan in its plan ("Seq Scan on t" on Postgres, "SCAN t" on SQLite) is
+reported: it means the index the query relies on is missing or no longer
+matches the query. On Postgres, sequential scans are disabled for the check's
+transaction, so small or unanalyzed tables still show whether an index is
+usable rather than which plan happens to be cheapest today.
+"""
+import re
+import uuid
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.routers.businesses.staff_models import Staff
+from app.routers.customers.cust_models import Customer
+from app.routers.rewards.offers_models import Offer
+from app.routers.rewards.points_ledger_models import PointsLedger
+from app.routers.rewards.points_models import PointsHistory
+from app.routers.rewards.redeemable_offer_models import RedeemableOffer
+from app.routers.transactions.transaction_models import Transaction
+
+# "Seq Scan on transactions" (Postgres) / "SCAN transactions" (SQLite, with or without an index)
+FULL_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"^SCAN (\w+)"),
+}
+
+
+class HotQuery(NamedTuple):
+    name: str
+    index: str
+    build: Callable[[uuid.UUID, uuid.UUID], object]
+
+
+class QueryPlan(NamedTuple):
+    name: str
+    index: str
+    plan: List[str]
+    full_scans: List[str]
+
+
+HOT_QUERIES = [
+    HotQuery(
+        "approved visits by phone", "ix_transactions_business_phone_approved",
+        lambda business_id, customer_id: select(func.count(Transaction.id)).where(
+            Transaction.business_id == business_id,
+            Transaction.phone_number == "5550000000",
+            Transaction.is_approved == True,
+        ),
+    ),
+    HotQuery(
+        "transaction history page", "ix_transactions_business_approved_date_id",
+        lambda business_id, customer_id: select(Transaction.id, Transaction.date).where(
+            Transaction.business_id == business_id,
+            Transaction.is_approved == True,
+            or_(
+                Transaction.date < datetime(2024, 1, 1),
+                (Transaction.date == datetime(2024, 1, 1)) & (Transaction.id < customer_id),
+            ),
+        ).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(50),
+    ),
+    HotQuery(
+        "customer by phone", "ix_customers_business_phone",
+        lambda business_id, customer_id: select(Customer.id).where(
+            Customer.business_id == business_id, Customer.phone == "5550000000"
+        ),
+    ),
+    HotQuery(
+        "customer login", "ix_customers_email",
+        lambda business_id, customer_id: select(Customer.id).where(Customer.email == "customer@example.com"),
+    ),
+    HotQuery(
+        "points ledger history", "ix_points_ledger_customer_created, ix_points_ledger_member_created",
+        lambda business_id, customer_id: select(PointsLedger.points_id).where(
+            or_(PointsLedger.customer_id == customer_id, PointsLedger.member_id == customer_id)
+        ).order_by(PointsLedger.created_at.desc()).limit(50),
+    ),
+    HotQuery(
+        "unredeemed offers", "ix_redeemable_offers_customer_business",
+        lambda business_id, customer_id: select(RedeemableOffer.id).where(
+            RedeemableOffer.customer_id == customer_id,
+            RedeemableOffer.business_id == business_id,
+            RedeemableOffer.is_redeemed == False,
+        ).order_by(RedeemableOffer.created_at.desc()),
+    ),
+    HotQuery(
+        "active offers", "ix_offers_business_active",
+        lambda business_id, customer_id: select(Offer.id).where(
+            Offer.business_id == business_id, Offer.is_active == True
+        ),
+    ),
+    HotQuery(
+        "points issued", "ix_points_history_business_points",
+        lambda business_id, customer_id: select(func.sum(PointsHistory.points)).where(
+            PointsHistory.business_id == business_id, PointsHistory.points > 0
+        ),
+    ),
+    HotQuery(
+        "customer points history", "ix_points_history_customer",
+        lambda business_id, customer_id: select(PointsHistory.id).where(PointsHistory.customer_id == customer_id),
+    ),
+    HotQuery(
+        "business staff", "ix_staff_business_id",
+        lambda business_id, customer_id: select(Staff.id).where(Staff.business_id == business_id),
+    ),
+]
+
+
+def explain(db: Session, statement) -> List[str]:
+    """The database's plan for a statement, one line per plan node"""
+    dialect = db.get_bind().dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    connection = db.connection()
+    if dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    return [row[0] for row in connection.exec_driver_sql("EXPLAIN " + sql)]
+
+
+def check_query_plans(db: Session) -> List[QueryPlan]:
+    """EXPLAIN every hot query; the caller rolls back"""
+    dialect = db.get_bind().dialect.name
+    pattern = FULL_SCAN_PATTERNS.get(dialect)
+    if pattern is None:
+        raise ValueError(f"Query plan checks aren't supported on {dialect}")
+    if dialect == "postgresql":
+        db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    business_id, customer_id = uuid.uuid4(), uuid.uuid4()
+    results = []
+    for query in HOT_QUERIES:
+        plan = explain(db, query.build(business_id, customer_id))
+        full_scans = [match.group(1) for line in plan for match in [pattern.search(line.strip())] if match]
+        results.append(QueryPlan(query.name, query.index, plan, full_scans))
+    return results
@@ -122,3 +122,20 @@ def list_all_businesses(
         for biz in businesses
     ]
 
+
+@router.get("/metrics")
+def get_metrics(current_admin: dict = Depends(get_current_admin)):
+    """Connection pool, in-process cache, password hashing, write-behind and background worker counters for this worker process"""
+    from app.cache import cache_stats
+    from app.database import AsyncSessionLocal, pool_stats
+    from app.routers.notifications.delivery_service import delivery_stats
+    from app.security import password_hasher_stats
+    from app.write_behind import write_behind_stats
+    return {
+        "db_pool": pool_stats(),
+        "db_async_pool": pool_stats(AsyncSessionLocal.kw["bind"].sync_engine) if AsyncSessionLocal else None,
+        "caches": cache_stats(),
+        "password_hashing": password_hasher_stats(),
+        "notification_delivery": delivery_stats(),
+        "write_behind": write_behind_stats(),
+    }
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.security import verify_password, create_access_token, create_refresh_token
+from app.dependencies import get_db
+from app.security import PasswordHasherBusy, verify_password_async, create_access_token, create_refresh_token
 from app.routers.organizations.org_models import Organization
 from app.routers.businesses.biz_models import Business
 from app.routers.businesses.staff_models import Staff
@@ -11,23 +12,39 @@ from app.routers.customers.cust_models import Customer
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+
+# Login handlers are async: the account lookup runs on the request threadpool and
+# the bcrypt check on the password hashing pool, so a burst of logins can't tie
+# up the threads (or pooled connections) every other endpoint runs on.
+
+def _find_account(db: Session, model, *criteria):
+    """First matching row, detached: the session is closed so its connection goes back to the pool before bcrypt runs"""
     try:
-        yield db
+        return db.query(model).filter(*criteria).first()
     finally:
         db.close()
 
 
-class LoginRequest(BaseModel):
-    email: str
-    password: str
+async def _password_matches(password: str, password_hash: str) -> bool:
+    try:
+        return await verify_password_async(password, password_hash)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ins in progress, please try again",
+            headers={"Retry-After": "1"},
+        )
 
 
 @router.post("/login-admin")
-def login_admin(login_data: LoginRequest, db: Session = Depends(get_db)):
-    admin = db.query(Admin).filter(Admin.email == login_data.email).first()
-    if not admin or not verify_password(login_data.password, admin.password_hash):
+async def login_admin(login_data: LoginRequest, db: Session = Depends(get_db)):
+    admin = await run_in_threadpool(_find_account, db, Admin, Admin.email == login_data.email)
+    if not admin or not await _password_matches(login_data.password, admin.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     data = {
@@ -44,9 +61,9 @@ def login_admin(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login-org")
-def login_org(login_data: LoginRequest, db: Session = Depends(get_db)):
-    org = db.query(Organization).filter(Organization.email == login_data.email).first()
-    if not org or not verify_password(login_data.password, org.password_hash):
+async def login_org(login_data: LoginRequest, db: Session = Depends(get_db)):
+    org = await run_in_threadpool(_find_account, db, Organization, Organization.email == login_data.email)
+    if not org or not await _password_matches(login_data.password, org.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     data = {
@@ -64,9 +81,9 @@ def login_org(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login-business")
-def login_business(login_data: LoginRequest, db: Session = Depends(get_db)):
-    business = db.query(Business).filter(Business.email == login_data.email).first()
-    if not business or not verify_password(login_data.password, business.password_hash):
+async def login_business(login_data: LoginRequest, db: Session = Depends(get_db)):
+    business = await run_in_threadpool(_find_account, db, Business, Business.email == login_data.email)
+    if not business or not await _password_matches(login_data.password, business.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     data = {
@@ -86,9 +103,9 @@ def login_business(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login-staff")
-def login_staff(login_data: LoginRequest, db: Session = Depends(get_db)):
-    staff = db.query(Staff).filter(Staff.email == login_data.email, Staff.active == True).first()
-    if not staff or not verify_password(login_data.password, staff.password_hash):
+async def login_staff(login_data: LoginRequest, db: Session = Depends(get_db)):
+    staff = await run_in_threadpool(_find_account, db, Staff, Staff.email == login_data.email, Staff.active == True)
+    if not staff or not await _password_matches(login_data.password, staff.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     data = {
@@ -108,8 +125,8 @@ def login_staff(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/login-customer")
-def login_customer(login_data: LoginRequest, db: Session = Depends(get_db)):
-    customer = db.query(Customer).filter(Customer.email == login_data.email).first()
+async def login_customer(login_data: LoginRequest, db: Session = Depends(get_db)):
+    customer = await run_in_threadpool(_find_account, db, Customer, Customer.email == login_data.email)
     if not customer:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -117,7 +134,7 @@ def login_customer(login_data: LoginRequest, db: Session = Depends(get_db)):
     if not customer.password_hash:
         raise HTTPException(status_code=401, detail="Password not set. Please contact support.")
     
-    if not verify_password(login_data.password, customer.password_hash):
+    if not await _password_matches(login_data.password, customer.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     data = {
@@ -0,0 +1,152 @@
+"""
+Business analytics computed with database aggregates.
+
+Additive daily facts (visits, revenue, points, redemptions, new customers) are
+summed from the business_daily_stats rollup, one row per day, so a two-year
+dashboard reads a few hundred rows. Distinct active customers and top offers
+can't be summed across days and are aggregated from the raw tables; no
+PointsHistory or Redemption rows are loaded into Python either way.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.routers.businesses.daily_stats_models import BusinessDailyStats
+from app.routers.businesses.daily_stats_service import METRICS
+from app.routers.customers.cust_models import Customer
+from app.routers.rewards.offers_models import Offer
+from app.routers.rewards.redemption_models import Redemption
+from app.routers.transactions.transaction_models import Transaction
+
+TOP_OFFERS_LIMIT = 5
+
+BUCKETS = ("day",)
+
+
+def parse_date_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+    """YYYY-MM-DD bounds, both inclusive; either may be omitted"""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+    if start and end and start > end:
+        raise ValueError("start_date must not be after end_date")
+    return start, end
+
+
+def _window(query, column, start: Optional[date], end: Optional[date]):
+    if start:
+        query = query.where(column >= datetime.combine(start, datetime.min.time()))
+    if end:
+        query = query.where(column < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def _day(value) -> date:
+    # func.date() returns a date on Postgres and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _rollup(db: Session, business_id: UUID, start, end, by_day: bool):
+    """Summed rollup metrics for the window, or one row per day"""
+    if by_day:
+        query = select(BusinessDailyStats.day, *[BusinessDailyStats.__table__.c[metric] for metric in METRICS])
+    else:
+        query = select(*[func.coalesce(func.sum(BusinessDailyStats.__table__.c[metric]), 0) for metric in METRICS])
+    query = query.where(BusinessDailyStats.business_id == business_id)
+    if start:
+        query = query.where(BusinessDailyStats.day >= start)
+    if end:
+        query = query.where(BusinessDailyStats.day <= end)
+    if not by_day:
+        return dict(zip(METRICS, db.execute(query).one()))
+    return {day: dict(zip(METRICS, values)) for day, *values in db.execute(query.order_by(BusinessDailyStats.day))}
+
+
+def _metrics(totals: dict) -> dict:
+    return {
+        "visits": int(totals["visits"]),
+        "revenue": float(totals["revenue"]),
+        "discounts": float(totals["discounts"]),
+        "points_issued": int(totals["points_issued"]),
+        "points_redeemed": int(totals["points_redeemed"]),
+        "redemptions_count": int(totals["offers_redeemed"]),
+        "new_customers": int(totals["new_customers"]),
+    }
+
+
+def _active_customers(db: Session, business_id: UUID, start, end, by_day: bool):
+    """Distinct phones with an approved visit (customers are keyed by phone per business)"""
+    query = select(func.count(func.distinct(Transaction.phone_number))).where(
+        Transaction.business_id == business_id,
+        Transaction.is_approved == True,
+    )
+    query = _window(query, Transaction.date, start, end)
+    if not by_day:
+        return db.execute(query).scalar()
+    day = func.date(Transaction.date)
+    return db.execute(query.add_columns(day).group_by(day)).all()
+
+
+def _top_offers(db: Session, business_id: UUID, start, end, limit: int) -> List[dict]:
+    redemptions = func.count(Redemption.id)
+    query = (
+        select(Redemption.offer_id, Offer.name, redemptions)
+        .join(Offer, Offer.id == Redemption.offer_id)
+        .where(Redemption.business_id == business_id)
+        .group_by(Redemption.offer_id, Offer.name)
+        .order_by(redemptions.desc(), Offer.name)
+        .limit(limit)
+    )
+    query = _window(query, Redemption.created_at, start, end)
+    return [
+        {"offer_id": str(offer_id), "name": name, "redemptions": count}
+        for offer_id, name, count in db.execute(query)
+    ]
+
+
+def _daily_series(db: Session, business_id: UUID, start, end) -> List[dict]:
+    days: Dict[date, dict] = {}
+    for day, totals in _rollup(db, business_id, start, end, by_day=True).items():
+        days[_day(day)] = dict(_metrics(totals), active_customers=0)
+    for count, day in _active_customers(db, business_id, start, end, by_day=True):
+        day = _day(day)
+        if day not in days:
+            days[day] = dict(_metrics(dict.fromkeys(METRICS, 0)), active_customers=0)
+        days[day]["active_customers"] = count
+    return [dict(date=day.isoformat(), **days[day]) for day in sorted(days)]
+
+
+def business_analytics(
+    db: Session,
+    business_id: UUID,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: Optional[str] = None,
+    top_offers: int = TOP_OFFERS_LIMIT,
+) -> dict:
+    """
+    Visits, revenue, points issued/redeemed, redemptions, top offers and
+    active/new customers for the window [start, end] (all time if omitted).
+    With bucket="day" a per-day series is included; days without activity are left out.
+    """
+    if bucket is not None and bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+
+    result = {
+        "start_date": start.isoformat() if start else None,
+        "end_date": end.isoformat() if end else None,
+        "total_customers": db.execute(
+            select(func.count(Customer.id)).where(Customer.business_id == business_id)
+        ).scalar(),
+        "active_customers": _active_customers(db, business_id, start, end, by_day=False),
+        **_metrics(_rollup(db, business_id, start, end, by_day=False)),
+        "top_offers": _top_offers(db, business_id, start, end, top_offers),
+    }
+    if bucket == "day":
+        result["daily"] = _daily_series(db, business_id, start, end)
+    return result
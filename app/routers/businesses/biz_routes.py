@@ -1,11 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.dependencies import get_current_business, get_db
-from app.routers.customers.cust_models import Customer
-from app.routers.rewards.points_models import PointsHistory
-from app.routers.rewards.redemption_models import Redemption
+from app.routers.businesses import analytics_service
+from app.routers.businesses.analytics_service import parse_date_window
 
 router = APIRouter()
 
@@ -25,34 +24,17 @@ def business_dashboard(current: dict = Depends(get_current_business)):
 def business_analytics(
     current: dict = Depends(get_current_business),
     db: Session = Depends(get_db),
+    start_date: str = None,
+    end_date: str = None,
+    bucket: str = None,
 ):
-    """Basic analytics for a business dashboard."""
+    """
+    Analytics for a business dashboard, computed with database aggregates.
+    start_date/end_date (YYYY-MM-DD, inclusive) limit the window; bucket=day adds a per-day series.
+    """
     business_id = current["business"].id
-
-    total_customers = db.query(Customer).filter(Customer.business_id == business_id).count()
-    total_points_issued = (
-        db.query(PointsHistory)
-        .filter(PointsHistory.business_id == business_id, PointsHistory.points > 0)
-        .all()
-    )
-    total_points_redeemed = (
-        db.query(PointsHistory)
-        .filter(PointsHistory.business_id == business_id, PointsHistory.points < 0)
-        .all()
-    )
-
-    issued_sum = sum(p.points for p in total_points_issued)
-    redeemed_sum = -sum(p.points for p in total_points_redeemed)
-
-    top_offers = (
-        db.query(Redemption.offer_id)
-        .filter(Redemption.business_id == business_id)
-        .all()
-    )
-
-    return {
-        "total_customers": total_customers,
-        "points_issued": issued_sum,
-        "points_redeemed": redeemed_sum,
-        "redemptions_count": len(top_offers),
-    }
+    try:
+        start, end = parse_date_window(start_date, end_date)
+        return analytics_service.business_analytics(db, business_id, start, end, bucket=bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class BusinessDailyStats(Base):
+    """Per-business per-day KPI totals, maintained as events commit (the raw tables stay the source of truth)"""
+    __tablename__ = "business_daily_stats"
+
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC calendar day; visits use the transaction date
+    visits = Column(Integer, nullable=False, default=0)  # Approved transactions
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    discounts = Column(Numeric(14, 2), nullable=False, default=0)
+    points_issued = Column(Integer, nullable=False, default=0)
+    points_redeemed = Column(Integer, nullable=False, default=0)
+    new_customers = Column(Integer, nullable=False, default=0)
+    offers_redeemed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,143 @@
+"""
+Per-business per-day KPI rollups kept in business_daily_stats.
+
+Approving transactions, redeeming an offer and creating a customer add their
+facts to the day's row with one upsert in the same database transaction, so
+the rollup commits (or rolls back) with the rows it summarises. Dashboards then
+read one row per day instead of scanning transactions, points history and
+redemptions. rebuild_daily_stats recomputes the table from those raw tables.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.routers.businesses.daily_stats_models import BusinessDailyStats
+from app.routers.customers.cust_models import Customer
+from app.routers.rewards.points_models import PointsHistory
+from app.routers.rewards.redemption_models import Redemption
+from app.routers.transactions.transaction_models import Transaction
+
+METRICS = (
+    "visits",
+    "revenue",
+    "discounts",
+    "points_issued",
+    "points_redeemed",
+    "new_customers",
+    "offers_redeemed",
+)
+
+
+def _empty() -> dict:
+    return {metric: 0 for metric in METRICS}
+
+
+def record_daily_stats(db: Session, business_id: UUID, days: Dict[date, dict]):
+    """Add per-day metric deltas ({day: {metric: delta}}) to the rollup. The caller commits."""
+    if not days:
+        return
+    stmt = dialect_insert(db, BusinessDailyStats)
+    table = BusinessDailyStats.__table__.c
+    set_ = {metric: table[metric] + stmt.excluded[metric] for metric in METRICS}
+    set_["updated_at"] = stmt.excluded.updated_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BusinessDailyStats.business_id, BusinessDailyStats.day],
+        set_=set_,
+    )
+    now = datetime.utcnow()
+    rows = []
+    for day, deltas in days.items():
+        row = _empty()
+        row.update(deltas)
+        row.update(business_id=business_id, day=day, updated_at=now)
+        rows.append(row)
+    db.execute(stmt, rows)
+
+
+def record_event(db: Session, business_id: UUID, **deltas):
+    """Add one event's metrics (e.g. offers_redeemed=1) to today's row. The caller commits."""
+    record_daily_stats(db, business_id, {datetime.utcnow().date(): deltas})
+
+
+def record_approved_transactions(
+    db: Session,
+    business_id: UUID,
+    transaction_rows: Iterable[dict],
+    new_customers: int = 0,
+    points_issued: int = 0,
+):
+    """
+    Add an approved batch: visits, revenue and discounts on each transaction's day,
+    plus the customers it created and the points it issued today. The caller commits.
+    """
+    days = defaultdict(_empty)
+    for row in transaction_rows:
+        totals = days[row["date"].date()]
+        totals["visits"] += 1
+        totals["revenue"] += Decimal(str(row["amount"] or 0))
+        totals["discounts"] += Decimal(str(row["discount_amount"] or 0))
+    if new_customers or points_issued:
+        today = days[datetime.utcnow().date()]
+        today["new_customers"] += new_customers
+        today["points_issued"] += points_issued
+    record_daily_stats(db, business_id, days)
+
+
+def rebuild_daily_stats(db: Session, business_id: Optional[UUID] = None) -> int:
+    """
+    Recompute the rollup from transactions, points history, customers and
+    redemptions, for one business or all. Returns the number of rows written.
+    The caller commits.
+    """
+    zero = literal(0)
+
+    def facts(model, day_column, *columns, where=()):
+        day = func.date(day_column)
+        query = select(model.business_id.label("business_id"), day.label("day"), *columns).where(
+            model.business_id.isnot(None), day_column.isnot(None), *where
+        )
+        if business_id is not None:
+            query = query.where(model.business_id == business_id)
+        return query.group_by(model.business_id, day)
+
+    def metrics(**values):
+        return [values.get(metric, zero).label(metric) for metric in METRICS]
+
+    sources = union_all(
+        facts(Transaction, Transaction.date, *metrics(
+            visits=func.count(Transaction.id),
+            revenue=func.coalesce(func.sum(Transaction.amount), 0),
+            discounts=func.coalesce(func.sum(Transaction.discount_amount), 0),
+        ), where=[Transaction.is_approved == True]),
+        facts(PointsHistory, PointsHistory.created_at, *metrics(
+            points_issued=func.coalesce(func.sum(case((PointsHistory.points > 0, PointsHistory.points), else_=0)), 0),
+            points_redeemed=func.coalesce(func.sum(case((PointsHistory.points < 0, -PointsHistory.points), else_=0)), 0),
+        )),
+        facts(Customer, Customer.created_at, *metrics(new_customers=func.count(Customer.id))),
+        facts(Redemption, Redemption.created_at, *metrics(offers_redeemed=func.count(Redemption.id))),
+    ).subquery()
+
+    totals = select(
+        sources.c.business_id,
+        sources.c.day,
+        *[func.sum(sources.c[metric]) for metric in METRICS],
+        literal(datetime.utcnow()),
+    ).group_by(sources.c.business_id, sources.c.day)
+
+    clear = delete(BusinessDailyStats)
+    if business_id is not None:
+        clear = clear.where(BusinessDailyStats.business_id == business_id)
+    db.execute(clear)
+    result = db.execute(
+        BusinessDailyStats.__table__.insert().from_select(
+            ["business_id", "day", *METRICS, "updated_at"],
+            totals,
+        )
+    )
+    return result.rowcount
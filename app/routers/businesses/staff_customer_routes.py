@@ -4,25 +4,16 @@ from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.database import run_db
+from app.dependencies import current_business, get_business_user
 from app.routers.customers.cust_models import Customer
 from app.routers.rewards.redeemable_offer_service import get_customer_redeemable_offers
 from app.routers.rewards.points_ledger_service import get_customer_balance
-from app.routers.transactions.transaction_models import Transaction
-from sqlalchemy import func
+from app.routers.customers.visit_stats_service import get_visit_count
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class CustomerRewardsInfo(BaseModel):
     customer: dict
     points_balance: int
@@ -32,12 +23,16 @@ class CustomerRewardsInfo(BaseModel):
 
 
 @router.get("/lookup/{phone}", response_model=CustomerRewardsInfo)
-def lookup_customer_rewards(
+async def lookup_customer_rewards(
     phone: str,
-    current: dict = Depends(get_current_business),
-    db: Session = Depends(get_db)
+    user: dict = Depends(get_business_user),
 ):
     """Lookup customer by phone and get their rewards information (for staff)"""
+    return await run_db(_lookup_customer_rewards, user, phone)
+
+
+def _lookup_customer_rewards(db: Session, user: dict, phone: str):
+    current = current_business(db, user)
     try:
         business_id = current["business"].id
     except (KeyError, AttributeError) as e:
@@ -64,11 +59,7 @@ def lookup_customer_rewards(
         
         # Get transaction count
         try:
-            transaction_count = db.query(func.count(Transaction.id)).filter(
-                Transaction.business_id == business_id,
-                Transaction.phone_number == customer.phone,
-                Transaction.is_approved == True
-            ).scalar() or 0
+            transaction_count = get_visit_count(db, business_id, customer.phone)
         except Exception as e:
             print(f"Error getting transaction count: {e}")
             transaction_count = 0
@@ -3,8 +3,8 @@ from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import List
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.principal_cache import invalidate_principal
+from app.dependencies import get_current_business, get_db
 from app.routers.businesses.staff_models import Staff
 from app.routers.businesses.staff_schemas import StaffCreate, StaffUpdate, StaffResponse
 from app.security import hash_password
@@ -12,14 +12,6 @@ from app.security import hash_password
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/", response_model=StaffResponse)
 def create_staff(
     staff_data: StaffCreate,
@@ -156,6 +148,7 @@ def delete_staff(
     
     # Soft delete - set active to False
     staff.active = False
+    invalidate_principal(db, Staff, staff.id)
     db.commit()
     
     return {"message": "Staff member deactivated successfully"}
@@ -179,6 +172,7 @@ def activate_staff(
         raise HTTPException(status_code=404, detail="Staff not found")
     
     staff.active = True
+    invalidate_principal(db, Staff, staff.id)
     db.commit()
     
     return {"message": "Staff member activated successfully"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -21,3 +21,21 @@ class Campaign(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+
+
+class CampaignAward(Base):
+    """A campaign's bonus for one customer and period; the key makes evaluation runs idempotent"""
+    __tablename__ = "campaign_awards"
+
+    campaign_id = Column(UUID(as_uuid=True), ForeignKey("campaigns.id"), primary_key=True)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), primary_key=True)
+    period = Column(String, primary_key=True)  # e.g. "2026" (birthday year), "2026-10" (frequency month), "season"
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False)
+    points = Column(Integer, nullable=False)
+    awarded_at = Column(DateTime, nullable=False)
+    credited_at = Column(DateTime, nullable=True)  # When the points reached the ledger; NULL = still to credit
+
+    __table_args__ = (
+        # Awards waiting to be credited
+        Index("ix_campaign_awards_credited_at", "credited_at"),
+    )
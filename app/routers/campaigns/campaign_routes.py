@@ -2,22 +2,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.dependencies import get_current_business, get_db
 from app.routers.campaigns.campaign_models import Campaign
 
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/", response_model=list[dict])
 def list_campaigns(
     db: Session = Depends(get_db),
@@ -0,0 +1,317 @@
+"""
+Scheduled evaluation of bonus campaigns.
+
+run_campaigns evaluates every active campaign of every business (or of one) as
+of a point in time, normally from the nightly `python -m app.cli run-campaigns`.
+Each campaign and period is one INSERT ... SELECT of the eligible customers
+into campaign_awards, keyed by (campaign, customer, period), so a customer gets
+a campaign's bonus once per period however often the run is repeated. The
+awards are then credited in batches: each batch claims uncredited awards, adds
+their ledger entries with one bulk insert and commits, so an interrupted run
+resumes where it stopped.
+
+Campaign types and their JSON conditions:
+  birthday   {"days_before": 0}: customers whose date_of_birth falls on the
+             run date (plus days_before), once per year. 29 February birthdays
+             are awarded on 28 February in other years.
+  frequency  {"visits": 5, "period": "month"}: at least `visits` approved
+             transactions in a calendar day/week/month/year, once per period;
+             {"visits": 5, "window_days": 30} counts consecutive 30-day windows
+             from the campaign's start_date instead.
+  seasonal   {"visits": 1}: at least `visits` approved transactions between the
+             campaign's start_date and end_date, once per campaign.
+  referral   not evaluated: referrals aren't recorded anywhere yet.
+
+Days up to CAMPAIGN_LOOKBACK_DAYS before the run are evaluated as well, so a
+missed night or transactions approved a day late still earn their bonus.
+"""
+import calendar
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, extract, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import dialect_insert
+from app.routers.businesses.daily_stats_service import record_daily_stats
+from app.routers.campaigns.campaign_models import Campaign, CampaignAward
+from app.routers.customers.cust_models import Customer
+from app.routers.rewards.points_ledger_service import add_points_to_ledger_bulk
+from app.routers.rewards.points_models import PointsHistory
+from app.routers.transactions.transaction_models import Transaction
+
+logger = logging.getLogger(__name__)
+
+Award = CampaignAward
+
+# Windows of frequency campaigns without a start_date are counted from here
+WINDOW_ORIGIN = date(1970, 1, 1)
+
+
+def _conditions(campaign: Campaign) -> dict:
+    try:
+        conditions = json.loads(campaign.conditions or "{}")
+    except ValueError:
+        raise ValueError("conditions are not valid JSON")
+    if not isinstance(conditions, dict):
+        raise ValueError("conditions must be a JSON object")
+    return conditions
+
+
+def _positive_int(conditions: dict, name: str, default: int) -> int:
+    try:
+        value = int(conditions.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number")
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return value
+
+
+def _days(campaign: Campaign, as_of: datetime) -> List[date]:
+    """The run date and the lookback days before it, within the campaign's dates"""
+    days = []
+    for offset in range(settings.CAMPAIGN_LOOKBACK_DAYS, -1, -1):
+        day = as_of.date() - timedelta(days=offset)
+        if campaign.start_date is not None and day < campaign.start_date.date():
+            continue
+        if campaign.end_date is not None and day > campaign.end_date.date():
+            continue
+        days.append(day)
+    return days
+
+
+def _visitors(campaign: Campaign, visits: int, *conditions):
+    """Customers of the campaign's business with at least `visits` approved transactions matching conditions"""
+    counts = (
+        select(Transaction.phone_number)
+        .where(Transaction.business_id == campaign.business_id, Transaction.is_approved.is_(True), *conditions)
+        .group_by(Transaction.phone_number)
+        .having(func.count() >= visits)
+        .subquery()
+    )
+    return select(Customer.id).join(counts, counts.c.phone_number == Customer.phone).where(
+        Customer.business_id == campaign.business_id
+    )
+
+
+def _birthday(campaign: Campaign, conditions: dict, as_of: datetime) -> Iterator[Tuple[str, Any]]:
+    days_before = conditions.get("days_before", 0)
+    if not isinstance(days_before, int) or days_before < 0:
+        raise ValueError("days_before must be a whole number of days")
+    # One scan of the business's customers per birthday year (normally one)
+    targets: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for day in _days(campaign, as_of):
+        birthday = day + timedelta(days=days_before)
+        targets[str(birthday.year)].append((birthday.month, birthday.day))
+        if (birthday.month, birthday.day) == (2, 28) and not calendar.isleap(birthday.year):
+            targets[str(birthday.year)].append((2, 29))
+    for period, days in targets.items():
+        yield period, select(Customer.id).where(
+            Customer.business_id == campaign.business_id,
+            or_(*(
+                and_(extract("month", Customer.date_of_birth) == month, extract("day", Customer.date_of_birth) == dom)
+                for month, dom in days
+            )),
+        )
+
+
+def _frequency_window(campaign: Campaign, conditions: dict, day: date) -> Tuple[date, date, str]:
+    """[start, end) of the window containing day, and its period key"""
+    if conditions.get("window_days") is not None:
+        length = _positive_int(conditions, "window_days", 30)
+        origin = campaign.start_date.date() if campaign.start_date is not None else WINDOW_ORIGIN
+        start = origin + timedelta(days=(day - origin).days // length * length)
+        return start, start + timedelta(days=length), start.isoformat()
+    period = conditions.get("period", "month")
+    if period == "day":
+        return day, day + timedelta(days=1), day.isoformat()
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7), start.isoformat()
+    if period == "month":
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1), start.strftime("%Y-%m")
+    if period == "year":
+        start = day.replace(month=1, day=1)
+        return start, start.replace(year=start.year + 1), str(start.year)
+    raise ValueError(f"unknown period {period!r} (day, week, month or year)")
+
+
+def _frequency(campaign: Campaign, conditions: dict, as_of: datetime) -> Iterator[Tuple[str, Any]]:
+    visits = _positive_int(conditions, "visits", 1)
+    windows = {_frequency_window(campaign, conditions, day) for day in _days(campaign, as_of)}
+    for start, end, period in sorted(windows):
+        counted = [
+            Transaction.date >= datetime.combine(start, time.min),
+            Transaction.date < datetime.combine(end, time.min),
+            Transaction.date <= as_of,
+        ]
+        if campaign.start_date is not None:
+            counted.append(Transaction.date >= campaign.start_date)
+        if campaign.end_date is not None:
+            counted.append(Transaction.date <= campaign.end_date)
+        yield period, _visitors(campaign, visits, *counted)
+
+
+def _seasonal(campaign: Campaign, conditions: dict, as_of: datetime) -> Iterator[Tuple[str, Any]]:
+    if campaign.start_date is None or campaign.end_date is None:
+        raise ValueError("seasonal campaigns need a start_date and an end_date")
+    visits = _positive_int(conditions, "visits", 1)
+    yield "season", _visitors(
+        campaign, visits,
+        Transaction.date >= campaign.start_date,
+        Transaction.date <= campaign.end_date,
+        Transaction.date <= as_of,
+    )
+
+
+EVALUATORS = {
+    "birthday": _birthday,
+    "frequency": _frequency,
+    "seasonal": _seasonal,
+}
+
+
+def _award(db: Session, campaign: Campaign, period: str, eligible, now: datetime) -> int:
+    """
+    Record the campaign's award for every eligible customer (a select of
+    Customer.id) without one for this period
+    """
+    table = Award.__table__
+    stmt = dialect_insert(db, Award).from_select(
+        ["customer_id", "campaign_id", "period", "business_id", "points", "awarded_at"],
+        eligible.add_columns(
+            literal(campaign.id, table.c.campaign_id.type),
+            literal(period),
+            literal(campaign.business_id, table.c.business_id.type),
+            literal(campaign.bonus_points),
+            literal(now),
+        ),
+    ).on_conflict_do_nothing(index_elements=[Award.campaign_id, Award.customer_id, Award.period])
+    return db.execute(stmt).rowcount
+
+
+def evaluate_campaigns(
+    db: Session,
+    as_of: Optional[datetime] = None,
+    business_id: Optional[UUID] = None,
+) -> Dict[str, Any]:
+    """
+    Record new awards for every active campaign (committing campaign by
+    campaign). Returns the number of campaigns evaluated, awards recorded and
+    the campaigns skipped with the reason.
+    """
+    as_of = as_of or datetime.utcnow()
+    earliest = as_of - timedelta(days=settings.CAMPAIGN_LOOKBACK_DAYS)
+    query = select(Campaign).where(
+        Campaign.active.is_(True),
+        or_(Campaign.start_date.is_(None), Campaign.start_date <= as_of),
+        or_(Campaign.end_date.is_(None), Campaign.end_date >= datetime.combine(earliest.date(), time.min)),
+    )
+    if business_id is not None:
+        query = query.where(Campaign.business_id == business_id)
+    campaigns = db.execute(query.order_by(Campaign.created_at)).scalars().all()
+
+    report = {"campaigns": 0, "awards": 0, "skipped": {}}
+    for campaign in campaigns:
+        evaluate = EVALUATORS.get(campaign.type)
+        if evaluate is None:
+            report["skipped"][str(campaign.id)] = f"{campaign.type} campaigns aren't evaluated"
+            continue
+        if not campaign.bonus_points or campaign.bonus_points < 0:
+            report["skipped"][str(campaign.id)] = "bonus_points must be positive"
+            continue
+        try:
+            awarded = sum(
+                _award(db, campaign, period, eligible, datetime.utcnow())
+                for period, eligible in evaluate(campaign, _conditions(campaign), as_of)
+            )
+            db.commit()
+        except ValueError as e:
+            db.rollback()
+            report["skipped"][str(campaign.id)] = str(e)
+            logger.warning(f"Campaign {campaign.id} ({campaign.name}) skipped: {str(e)}")
+            continue
+        report["campaigns"] += 1
+        report["awards"] += awarded
+        if awarded:
+            logger.info(f"Campaign {campaign.id} ({campaign.name}) awarded {awarded} customer(s)")
+    return report
+
+
+def credit_awards(
+    db: Session,
+    business_id: Optional[UUID] = None,
+    batch_size: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Add the points of uncredited awards to the ledger, one committed batch at
+    a time. Returns the number of awards and points credited.
+    """
+    batch_size = batch_size or settings.CAMPAIGN_BATCH_SIZE
+    table = Award.__table__
+    campaign_types = dict(db.execute(select(Campaign.id, Campaign.type)).all())
+    credited = points = 0
+    while True:
+        # Rows another run has claimed are skipped on Postgres; SQLite serializes the UPDATE
+        pending = select(table.c.campaign_id, table.c.customer_id, table.c.period).where(table.c.credited_at.is_(None))
+        if business_id is not None:
+            pending = pending.where(table.c.business_id == business_id)
+        pending = pending.limit(batch_size).with_for_update(skip_locked=True)
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(table)
+            .where(tuple_(table.c.campaign_id, table.c.customer_id, table.c.period).in_(pending))
+            .values(credited_at=now)
+            .returning(table.c.campaign_id, table.c.customer_id, table.c.business_id, table.c.points)
+        ).all()
+        if not claimed:
+            db.commit()
+            return credited, points
+
+        add_points_to_ledger_bulk(db, [
+            {
+                "customer_id": customer_id,
+                "business_id": award_business_id,
+                "points_earned": award_points,
+                "reward_type_applied": f"CAMPAIGN_{campaign_types.get(campaign_id, 'bonus').upper()}"[:30],
+            }
+            for campaign_id, customer_id, award_business_id, award_points in claimed
+        ])
+        # Written with the ledger entries: a batch job has no request latency to save
+        db.execute(insert(PointsHistory), [
+            {
+                "id": uuid4(),
+                "customer_id": customer_id,
+                "business_id": award_business_id,
+                "points": award_points,
+                "reason": "campaign",
+                "created_at": now,
+            }
+            for _, customer_id, award_business_id, award_points in claimed
+        ])
+        issued = defaultdict(int)
+        for _, _, award_business_id, award_points in claimed:
+            issued[award_business_id] += award_points
+        for award_business_id, total in issued.items():
+            record_daily_stats(db, award_business_id, {now.date(): {"points_issued": total}})
+        db.commit()
+        credited += len(claimed)
+        points += sum(issued.values())
+
+
+def run_campaigns(
+    db: Session,
+    as_of: Optional[datetime] = None,
+    business_id: Optional[UUID] = None,
+) -> Dict[str, Any]:
+    """Evaluate every active campaign, then credit the awards (including any left by an earlier run)"""
+    report = evaluate_campaigns(db, as_of, business_id)
+    report["credited"], report["points"] = credit_awards(db, business_id)
+    return report
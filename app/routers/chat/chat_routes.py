@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.database import SessionLocal
-from app.dependencies import get_current_customer
+from app.dependencies import get_current_customer, get_db
 from app.routers.customers.cust_models import Customer
 from app.routers.rewards.offers_models import Offer
 from app.routers.rewards.redeemable_offer_models import RedeemableOffer
@@ -14,14 +13,6 @@ from uuid import UUID
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class ChatMessage(BaseModel):
     message: str
 
@@ -1,26 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from uuid import UUID
+from uuid import UUID, uuid4
+from datetime import datetime
 
-from app.database import SessionLocal
+from app.routers.businesses.daily_stats_service import record_event
 from app.routers.customers.cust_models import Customer
 from app.routers.customers.cust_schemas import CustomerCreate, CustomerResponse
 from app.routers.rewards.points_models import PointsHistory
 from app.routers.notifications.notification_service import queue_notification
-from app.dependencies import get_current_business
+from app.dependencies import get_current_business, get_db
+from app.write_behind import write_behind
 
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 SIGNUP_BONUS_DEFAULT = 5
 
 
@@ -119,45 +113,41 @@ def create_customer(
             db=db,
             customer_id=customer.id,
             points_earned=signup_bonus,
-            reward_type_applied="POINTS"
+            reward_type_applied="POINTS",
+            business_id=business_id
         )
         
-        # Also keep old PointsHistory for backward compatibility
-        history = PointsHistory(
-            customer_id=customer.id,
-            business_id=business_id,
-            points=signup_bonus,
-            reason="signup_bonus",
-        )
-        db.add(history)
-
-    # Send welcome email if email provided
+        # Also keep old PointsHistory for backward compatibility (written after commit)
+        write_behind(db, PointsHistory, [{
+            "id": uuid4(),
+            "customer_id": customer.id,
+            "business_id": business_id,
+            "points": signup_bonus,
+            "reason": "signup_bonus",
+            "created_at": datetime.utcnow(),
+        }])
+
+    record_event(db, business_id, new_customers=1, points_issued=max(signup_bonus, 0))
+
+    # Welcome email, sent by the delivery worker after commit
     if customer.email:
-        try:
-            from app.routers.notifications.email_service import email_service
-            import uuid
-            # Generate a secure token for password setup
-            password_setup_token = str(uuid.uuid4())
-            # Store token temporarily (in production, use Redis or database with expiration)
-            # For now, we'll include it in the email
-            email_service.send_welcome_email(
-                customer_name=customer.name or "Customer",
-                customer_email=customer.email,
-                signup_bonus=signup_bonus,
-                password_setup_token=password_setup_token
-            )
-        except Exception as e:
-            # Log error but don't fail customer creation
-            import logging
-            logging.error(f"Error sending welcome email: {str(e)}")
-        
-        # Also queue notification for tracking
+        import uuid
+        # Generate a secure token for password setup
+        password_setup_token = str(uuid.uuid4())
+        # Store token temporarily (in production, use Redis or database with expiration)
+        # For now, we'll include it in the email
         queue_notification(
             db,
             customer_id=customer.id,
             channel="email",
             type="welcome",
-            payload={"email": customer.email, "name": customer.name, "signup_bonus": signup_bonus},
+            payload={
+                "email": customer.email,
+                "name": customer.name or "Customer",
+                "signup_bonus": signup_bonus,
+                "password_setup_token": password_setup_token,
+                "business_id": str(business_id),
+            },
         )
 
     # Queue SMS notification
@@ -171,6 +161,8 @@ def create_customer(
 
     db.commit()
     db.refresh(customer)
+    from app.routers.notifications.delivery_service import wake_delivery_worker
+    wake_delivery_worker()
     return customer
 
 
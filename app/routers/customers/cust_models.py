@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -18,3 +18,9 @@ class Customer(Base):
     date_of_birth = Column(DateTime, nullable=True)  # Date of birth
     points = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_customers_business_phone", "business_id", "phone"),
+        Index("ix_customers_email", "email"),  # Customer login
+        Index("ix_customers_business_id_id", "business_id", "id"),  # Keyset paging over a business's customers
+    )
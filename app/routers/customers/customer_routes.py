@@ -1,114 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, String, and_, or_
 from uuid import UUID
 from typing import List
 
-from app.database import SessionLocal
-from app.dependencies import get_current_customer
+from app.database import run_db
+from app.dependencies import current_customer, get_customer_user
 from app.routers.customers.cust_models import Customer
 from app.routers.transactions.transaction_models import Transaction
 from app.routers.rewards.offers_models import Offer
 from app.routers.rewards.points_ledger_models import PointBalance
 from app.routers.rewards.points_ledger_service import get_customer_balance
+from app.routers.rewards.rule_cache import get_active_rules
+from app.routers.customers.dashboard_service import get_customer_dashboard_data
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _current_offers(db: Session, business_id, customer_type_filter: str) -> List[Offer]:
+    """Active offers valid today for ANY or the given customer type, from the business rule cache"""
+    from datetime import date
+    today = date.today()
+    return [
+        offer for offer in get_active_rules(db, business_id)
+        if offer.start_date <= today
+        and (offer.end_date is None or offer.end_date >= today)
+        and offer.customer_type in ('ANY', customer_type_filter)
+    ]
+
 
+def _by_priority(offers: List[Offer]) -> List[Offer]:
+    """Highest priority first, newest first within a priority"""
+    newest_first = sorted(offers, key=lambda o: o.created_at, reverse=True)
+    return sorted(newest_first, key=lambda o: o.priority or 0, reverse=True)
+
+
+# The customer portal is read-heavy: its endpoints are async and run their
+# queries through run_db (the async engine when configured)
 
 @router.get("/dashboard")
-def get_customer_dashboard(
-    current: dict = Depends(get_current_customer),
-    db: Session = Depends(get_db),
+async def get_customer_dashboard(
+    user: dict = Depends(get_customer_user),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
 ):
-    """Get customer dashboard data with transactions and redeemable offers"""
-    customer = current["customer"]
+    """
+    Get customer dashboard data with transactions and redeemable offers.
+    Transactions are paged newest first; pass next_cursor back as `cursor` for older ones.
+    """
+    return await run_db(_customer_dashboard, user, limit, cursor)
+
+
+def _customer_dashboard(db: Session, user: dict, limit: int, cursor: str):
+    customer = current_customer(db, user)["customer"]
     business_id = customer.business_id
-    
-    # Get point balance
-    points = get_customer_balance(db, customer.id)
-    
-    # Count transactions
-    transaction_count = db.query(func.count(Transaction.id)).filter(
-        Transaction.business_id == business_id,
-        Transaction.phone_number == customer.phone,
-        Transaction.is_approved == True
-    ).scalar() or 0
-    
+
+    try:
+        data = get_customer_dashboard_data(db, customer, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Count offers (filtered by customer type)
     is_member = customer.membership_id is not None and customer.membership_id != ''
     customer_type_filter = 'MEMBER' if is_member else 'NON_MEMBER'
-    
-    offers_query = db.query(Offer).filter(
-        Offer.business_id == business_id,
-        Offer.is_active == True
-    )
-    
-    # Filter by customer type (MEMBER, NON_MEMBER, or ANY)
-    from sqlalchemy import or_
-    offers_query = offers_query.filter(
-        or_(
-            Offer.customer_type == 'ANY',
-            Offer.customer_type == customer_type_filter
-        )
-    )
-    
-    # Check date validity
-    from datetime import date
-    today = date.today()
-    offers_query = offers_query.filter(
-        Offer.start_date <= today,
-        or_(
-            Offer.end_date.is_(None),
-            Offer.end_date >= today
-        )
-    )
-    
-    offers_count = offers_query.count()
-    
-    # Get all transactions (not just recent)
-    all_transactions = db.query(Transaction).filter(
-        Transaction.business_id == business_id,
-        Transaction.phone_number == customer.phone,
-        Transaction.is_approved == True
-    ).order_by(Transaction.date.desc()).all()
-    
-    transactions_data = []
-    for trans in all_transactions:
-        transactions_data.append({
-            "id": str(trans.id),
-            "date": trans.date.isoformat(),
-            "description": trans.description,
-            "quantity": trans.quantity,
-            "amount": float(trans.amount) if trans.amount else 0,
-            "discount_amount": float(trans.discount_amount) if trans.discount_amount else 0,
-            "license_plate": trans.license_plate,
-            "transaction_sequence": trans.transaction_sequence
-        })
-    
-    # Get redeemable offers
-    from app.routers.rewards.redeemable_offer_service import get_customer_redeemable_offers
-    from app.routers.rewards.redeemable_offer_schemas import RedeemableOfferResponse
-    
-    redeemable_offers = get_customer_redeemable_offers(db, customer.id, business_id, include_redeemed=False)
-    redeemable_offers_data = []
-    for offer in redeemable_offers:
-        redeemable_offers_data.append({
-            "id": str(offer.id),
-            "customer_type": offer.customer_type,
-            "reward_type": offer.reward_type,
-            "reward_value": offer.reward_value,
-            "created_at": offer.created_at.isoformat(),
-            "rule_id": str(offer.rule_id) if offer.rule_id else None
-        })
-    
+
+    # Active offers for this customer type that are valid today
+    offers_count = len(_current_offers(db, business_id, customer_type_filter))
+
     return {
         "customer": {
             "id": str(customer.id),
@@ -118,21 +76,23 @@ def get_customer_dashboard(
             "membership_id": customer.membership_id,
             "is_member": is_member
         },
-        "points": points,
-        "transaction_count": transaction_count,
+        "points": data["points"],
+        "transaction_count": data["transaction_count"],
         "offers_count": offers_count,
-        "transactions": transactions_data,
-        "redeemable_offers": redeemable_offers_data
+        "transactions": data["transactions"],
+        "next_cursor": data["next_cursor"],
+        "redeemable_offers": data["redeemable_offers"]
     }
 
 
 @router.get("/points")
-def get_customer_points(
-    current: dict = Depends(get_current_customer),
-    db: Session = Depends(get_db),
-):
+async def get_customer_points(user: dict = Depends(get_customer_user)):
     """Get customer points information with next reward unlock details"""
-    customer = current["customer"]
+    return await run_db(_customer_points, user)
+
+
+def _customer_points(db: Session, user: dict):
+    customer = current_customer(db, user)["customer"]
     business_id = customer.business_id
     
     # Get current point balance
@@ -142,26 +102,10 @@ def get_customer_points(
     is_member = customer.membership_id is not None and customer.membership_id != ''
     customer_type_filter = 'MEMBER' if is_member else 'NON_MEMBER'
     
-    from sqlalchemy import or_
-    from datetime import date
-    today = date.today()
-    
-    offers_query = db.query(Offer).filter(
-        Offer.business_id == business_id,
-        Offer.is_active == True,
-        Offer.reward_type == 'POINTS',  # Only point-based rewards for now
-        Offer.start_date <= today,
-        or_(
-            Offer.end_date.is_(None),
-            Offer.end_date >= today
-        ),
-        or_(
-            Offer.customer_type == 'ANY',
-            Offer.customer_type == customer_type_filter
-        )
-    ).order_by(Offer.priority.desc())
-    
-    all_offers = offers_query.all()
+    all_offers = _by_priority([
+        offer for offer in _current_offers(db, business_id, customer_type_filter)
+        if offer.reward_type == 'POINTS'  # Only point-based rewards for now
+    ])
     
     # Find next unlockable offer
     next_offer = None
@@ -208,71 +152,36 @@ def get_customer_points(
 
 
 @router.get("/offers")
-def get_customer_offers(
-    current: dict = Depends(get_current_customer),
-    db: Session = Depends(get_db),
-):
+async def get_customer_offers(user: dict = Depends(get_customer_user)):
     """Get offers available to the customer"""
-    customer = current["customer"]
+    return await run_db(_customer_offers, user)
+
+
+def _customer_offers(db: Session, user: dict):
+    customer = current_customer(db, user)["customer"]
     business_id = customer.business_id
     
     # Determine customer type
     is_member = customer.membership_id is not None and customer.membership_id != ''
     customer_type_filter = 'MEMBER' if is_member else 'NON_MEMBER'
     
-    from sqlalchemy import or_
-    from datetime import date
-    today = date.today()
-    
     # Get offers that match customer type
     # EXCLUDE 5th wash offers - they should only appear as redeemable offers after 4 washes
-    from sqlalchemy import func
-    
-    # Build base query
-    base_query = db.query(Offer).filter(
-        Offer.business_id == business_id,
-        Offer.is_active == True,
-        Offer.start_date <= today,
-        or_(
-            Offer.end_date.is_(None),
-            Offer.end_date >= today
-        ),
-        or_(
-            Offer.customer_type == 'ANY',
-            Offer.customer_type == customer_type_filter
-        )
-    )
-    
-    # Exclude 5th wash offers at the SQL level
-    if customer_type_filter == 'MEMBER':
-        # Exclude Member 5th wash: DISCOUNT_PERCENT with 20% value
-        base_query = base_query.filter(
-            ~or_(
-                and_(
-                    Offer.reward_type == 'DISCOUNT_PERCENT',
-                    or_(
-                        Offer.reward_value == '20',
-                        Offer.reward_value == '20.0',
-                        func.cast(Offer.reward_value, String).like('%20%')
-                    )
-                ),
-                func.lower(Offer.name).like('%5th%'),
-                func.lower(Offer.name).like('%fifth%')
-            )
-        )
-    else:
-        # Exclude Non-member 5th wash: FREE_WASH or name contains "5th"
-        base_query = base_query.filter(
-            ~or_(
-                Offer.reward_type == 'FREE_WASH',
-                func.lower(Offer.name).like('%5th%'),
-                func.lower(Offer.name).like('%fifth%')
-            )
-        )
-    
-    offers = base_query.order_by(Offer.priority.desc(), Offer.created_at.desc()).all()
+    def is_fifth_wash_offer(offer: Offer) -> bool:
+        name = offer.name.lower()
+        if '5th' in name or 'fifth' in name:
+            return True
+        if customer_type_filter == 'MEMBER':
+            # Member 5th wash: DISCOUNT_PERCENT with 20% value
+            return offer.reward_type == 'DISCOUNT_PERCENT' and '20' in str(offer.reward_value)
+        # Non-member 5th wash: FREE_WASH
+        return offer.reward_type == 'FREE_WASH'
+    
+    offers = _by_priority([
+        offer for offer in _current_offers(db, business_id, customer_type_filter)
+        if not is_fifth_wash_offer(offer)
+    ])
     
-    # Offers are already filtered at SQL level - no need for Python-level filtering
     offers_data = []
     for offer in offers:
         offers_data.append({
@@ -0,0 +1,169 @@
+"""
+Customer dashboard data in two queries, cached per customer.
+
+The first query returns the point balance and visit count (scalar subqueries)
+outer-joined to the customer's unredeemed offers; the second returns one
+keyset page of transaction history. Results are cached per customer and page,
+stamped with the customer's dashboard version. Ledger writes, approvals and
+redeemable-offer changes call invalidate_customer_dashboards, which bumps the
+version once their transaction commits.
+"""
+import logging
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache, bump_after_commit, get_version_store
+from app.config import settings
+from app.routers.customers.cust_models import Customer
+from app.routers.customers.visit_stats_models import CustomerVisitStats
+from app.routers.rewards.points_ledger_models import PointBalance
+from app.routers.rewards.redeemable_offer_models import RedeemableOffer
+from app.routers.transactions.transaction_list_service import decode_cursor, encode_cursor
+from app.routers.transactions.transaction_models import Transaction
+
+logger = logging.getLogger(__name__)
+
+_dashboard_cache = TTLCache(
+    "customer_dashboards",
+    maxsize=settings.CUSTOMER_DASHBOARD_CACHE_MAX_ENTRIES,
+    ttl=settings.CUSTOMER_DASHBOARD_CACHE_TTL_SECONDS,
+)
+
+
+def _version_key(customer_id) -> str:
+    return f"customer-dashboard:{customer_id}"
+
+
+def invalidate_customer_dashboards(db: Session, customer_ids: Iterable[UUID]):
+    """Drop cached dashboards of these customers once db commits"""
+    bump_after_commit(db, {_version_key(customer_id) for customer_id in customer_ids})
+
+
+def _summary(db: Session, customer: Customer) -> dict:
+    """Balance, visit count and unredeemed offers (newest first) in one round trip"""
+    # points_ledger_service imports this module to invalidate dashboards
+    from app.routers.rewards.points_ledger_service import ledger_balance
+
+    # Customers without a balance row yet get their balance replayed from the ledger
+    points = func.coalesce(
+        select(PointBalance.total_points).where(PointBalance.customer_id == customer.id).scalar_subquery(),
+        ledger_balance(customer.id),
+    )
+    visits = func.coalesce(
+        select(CustomerVisitStats.visit_count).where(
+            CustomerVisitStats.business_id == customer.business_id,
+            CustomerVisitStats.phone_number == customer.phone,
+        ).scalar_subquery(),
+        0,
+    )
+    totals = select(points.label("points"), visits.label("transaction_count")).subquery()
+    rows = db.execute(
+        select(
+            totals.c.points,
+            totals.c.transaction_count,
+            RedeemableOffer.id,
+            RedeemableOffer.customer_type,
+            RedeemableOffer.reward_type,
+            RedeemableOffer.reward_value,
+            RedeemableOffer.created_at,
+            RedeemableOffer.rule_id,
+        )
+        .select_from(totals)
+        .outerjoin(RedeemableOffer, and_(
+            RedeemableOffer.customer_id == customer.id,
+            RedeemableOffer.business_id == customer.business_id,
+            RedeemableOffer.is_redeemed == False,
+        ))
+        .order_by(RedeemableOffer.created_at.desc())
+    ).all()
+
+    return {
+        "points": rows[0].points,
+        "transaction_count": rows[0].transaction_count,
+        "redeemable_offers": [
+            {
+                "id": str(offer_id),
+                "customer_type": customer_type,
+                "reward_type": reward_type,
+                "reward_value": reward_value,
+                "created_at": created_at.isoformat(),
+                "rule_id": str(rule_id) if rule_id else None,
+            }
+            for _, _, offer_id, customer_type, reward_type, reward_value, created_at, rule_id in rows
+            if offer_id is not None
+        ],
+    }
+
+
+def _history(db: Session, customer: Customer, limit: int, cursor: Optional[str]) -> dict:
+    """One page of approved transactions, newest first, and the cursor for the next page"""
+    query = select(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.quantity,
+        Transaction.amount,
+        Transaction.discount_amount,
+        Transaction.license_plate,
+        Transaction.transaction_sequence,
+    ).where(
+        Transaction.business_id == customer.business_id,
+        Transaction.phone_number == customer.phone,
+        Transaction.is_approved == True,
+    )
+    if cursor:
+        date, transaction_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Transaction.date < date,
+            and_(Transaction.date == date, Transaction.id < transaction_id),
+        ))
+    rows = db.execute(
+        query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "transactions": [
+            {
+                "id": str(row.id),
+                "date": row.date.isoformat(),
+                "description": row.description,
+                "quantity": row.quantity,
+                "amount": float(row.amount) if row.amount else 0,
+                "discount_amount": float(row.discount_amount) if row.discount_amount else 0,
+                "license_plate": row.license_plate,
+                "transaction_sequence": row.transaction_sequence,
+            }
+            for row in rows
+        ],
+        "next_cursor": encode_cursor(rows[-1].date, rows[-1].id) if has_more else None,
+    }
+
+
+def get_customer_dashboard_data(db: Session, customer: Customer, limit: int = 50, cursor: Optional[str] = None) -> dict:
+    """
+    Points, visit count, unredeemed offers and one page of history for the customer.
+    Raises ValueError for an invalid cursor. The returned dict is shared: don't modify it.
+    """
+    if cursor:
+        decode_cursor(cursor)
+    key = (str(customer.id), limit, cursor)
+    try:
+        version = get_version_store().get(_version_key(customer.id))
+    except Exception as e:
+        # A shared store that is down only costs a reload
+        logger.warning(f"Customer dashboard version lookup failed: {str(e)}")
+        version = None
+    entry = _dashboard_cache.get(key)
+    if entry is not None and version is not None and entry[0] == version:
+        return entry[1]
+
+    data = _summary(db, customer)
+    data.update(_history(db, customer, limit, cursor))
+    if version is not None:
+        _dashboard_cache.set(key, (version, data))
+    return data
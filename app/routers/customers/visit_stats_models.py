@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class CustomerVisitStats(Base):
+    """Approved-visit totals per phone, maintained on approval (transactions stay the source of truth)"""
+    __tablename__ = "customer_visit_stats"
+
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True)
+    phone_number = Column(String, primary_key=True)
+    visit_count = Column(Integer, nullable=False, default=0)
+    last_visit_at = Column(DateTime, nullable=True)  # Latest transaction date
+    lifetime_spend = Column(Numeric(12, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,103 @@
+"""
+Per-phone visit counters kept in customer_visit_stats.
+
+Approval adds each batch's visits with one upsert in the same database
+transaction as the inserted transactions, so readers get a visit count with a
+primary-key lookup instead of COUNT(*) over transactions. rebuild_visit_stats
+recomputes the table from transactions if it ever drifts.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.routers.customers.visit_stats_models import CustomerVisitStats
+from app.routers.transactions.transaction_models import Transaction
+
+
+def record_visits(db: Session, business_id: UUID, transaction_rows: Iterable[dict]):
+    """Add newly approved transactions to the stats. The caller commits."""
+    totals = defaultdict(lambda: [0, None, Decimal("0")])
+    for row in transaction_rows:
+        total = totals[row["phone_number"]]
+        total[0] += 1
+        if row["date"] is not None and (total[1] is None or row["date"] > total[1]):
+            total[1] = row["date"]
+        total[2] += Decimal(str(row["amount"] or 0))
+    if not totals:
+        return
+
+    stmt = dialect_insert(db, CustomerVisitStats)
+    table = CustomerVisitStats.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CustomerVisitStats.business_id, CustomerVisitStats.phone_number],
+        set_={
+            "visit_count": table.visit_count + stmt.excluded.visit_count,
+            "last_visit_at": case(
+                (table.last_visit_at.is_(None), stmt.excluded.last_visit_at),
+                (stmt.excluded.last_visit_at > table.last_visit_at, stmt.excluded.last_visit_at),
+                else_=table.last_visit_at,
+            ),
+            "lifetime_spend": table.lifetime_spend + stmt.excluded.lifetime_spend,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    now = datetime.utcnow()
+    db.execute(stmt, [
+        {
+            "business_id": business_id,
+            "phone_number": phone,
+            "visit_count": count,
+            "last_visit_at": last_visit,
+            "lifetime_spend": spend,
+            "updated_at": now,
+        }
+        for phone, (count, last_visit, spend) in totals.items()
+    ])
+
+
+def get_visit_stats(db: Session, business_id: UUID, phone_number: str) -> Optional[CustomerVisitStats]:
+    return db.get(CustomerVisitStats, (business_id, phone_number))
+
+
+def get_visit_count(db: Session, business_id: UUID, phone_number: str) -> int:
+    """Approved transactions for this phone at the business"""
+    count = db.query(CustomerVisitStats.visit_count).filter(
+        CustomerVisitStats.business_id == business_id,
+        CustomerVisitStats.phone_number == phone_number
+    ).scalar()
+    return count or 0
+
+
+def rebuild_visit_stats(db: Session, business_id: Optional[UUID] = None) -> int:
+    """
+    Recompute the stats from approved transactions, for one business or all.
+    Returns the number of rows written. The caller commits.
+    """
+    clear = delete(CustomerVisitStats)
+    totals = select(
+        Transaction.business_id,
+        Transaction.phone_number,
+        func.count(Transaction.id),
+        func.max(Transaction.date),
+        func.coalesce(func.sum(Transaction.amount), 0),
+        literal(datetime.utcnow()),
+    ).where(Transaction.is_approved == True)
+    if business_id is not None:
+        clear = clear.where(CustomerVisitStats.business_id == business_id)
+        totals = totals.where(Transaction.business_id == business_id)
+    totals = totals.group_by(Transaction.business_id, Transaction.phone_number)
+
+    db.execute(clear)
+    result = db.execute(
+        CustomerVisitStats.__table__.insert().from_select(
+            ["business_id", "phone_number", "visit_count", "last_visit_at", "lifetime_spend", "updated_at"],
+            totals,
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database import Base
+
+
+class OfferBroadcast(Base):
+    """Email announcement of an offer to every eligible customer, queued in the background"""
+    __tablename__ = "offer_broadcasts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False)
+    offer_id = Column(UUID(as_uuid=True), ForeignKey("offers.id"), nullable=False)
+    status = Column(String, default="queued")  # queued | running | completed | failed
+    claim_token = Column(UUID(as_uuid=True), nullable=True)  # Set by each claim; progress writes must match it
+    # Rendered once for all recipients; per-recipient fields are substituted at send time
+    subject = Column(String, nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text, nullable=True)
+    recipients_queued = Column(Integer, default=0)
+    last_customer_id = Column(UUID(as_uuid=True), nullable=True)  # Keyset cursor of the last committed batch
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Heartbeat, bumped on every claim and batch commit
+    finished_at = Column(DateTime, nullable=True)
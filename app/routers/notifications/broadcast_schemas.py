@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class OfferBroadcastResponse(BaseModel):
+    id: UUID
+    offer_id: UUID
+    status: str  # queued | running | completed | failed
+    recipients_queued: int
+    delivery: Dict[str, int]  # Notification counts by status: pending, sending, sent, failed
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
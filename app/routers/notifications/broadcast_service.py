@@ -0,0 +1,228 @@
+"""
+Background fan-out of new-offer emails.
+
+create_offer only records an OfferBroadcast with the business's offer email
+rendered once (all but the recipient fields), then returns. A worker thread streams the eligible customers in keyset-ordered
+batches (id, email and name only) and enqueues one notification per recipient
+with a bulk insert per batch; the email delivery worker then sends them. Each
+batch commits together with the broadcast's cursor, so a broadcast interrupted
+by a restart resumes after the last committed batch. The cursor write is fenced
+by the worker's claim (app.background_jobs), so a broadcast taken over after a
+slow batch never enqueues the same recipients twice.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.background_jobs import JobReclaimed, claim_job, resume_jobs, update_job
+from app.cache import TTLCache
+from app.config import settings
+from app.database import SessionLocal
+from app.routers.customers.cust_models import Customer
+from app.routers.notifications.broadcast_models import OfferBroadcast
+from app.routers.notifications.email_templates import (
+    RECIPIENT_FIELDS,
+    EmailTemplate,
+    build_context,
+    get_email_template,
+)
+from app.routers.notifications.notification_models import Notification
+from app.routers.notifications.notification_service import notification_priority
+from app.routers.rewards.offers_models import Offer
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=settings.BROADCAST_WORKERS, thread_name_prefix="offer-broadcast")
+
+_template_cache = TTLCache("broadcast_templates", maxsize=64, ttl=3600)
+
+
+def offer_broadcast_due(offer: Offer, today: Optional[date] = None) -> bool:
+    """Active offers are announced when they are created inside their validity window"""
+    today = today or date.today()
+    return bool(
+        offer.is_active
+        and offer.start_date <= today
+        and (offer.end_date is None or offer.end_date >= today)
+    )
+
+
+def create_offer_broadcast(db: Session, offer: Offer) -> OfferBroadcast:
+    """
+    Fill the offer's fields into the business's offer email once and create a
+    queued broadcast for it; only recipient fields are left to fill. The caller commits.
+    """
+    context = build_context("offer", {
+        "offer_name": offer.name,
+        "offer_description": offer.description,
+        "reward_type": offer.reward_type,
+        "reward_value": str(offer.reward_value),
+    })
+    for field in RECIPIENT_FIELDS:
+        context.pop(field, None)
+    subject, html_body, text_body = get_email_template("offer", offer.business_id).partial(context).sources()
+    broadcast = OfferBroadcast(
+        id=uuid4(),
+        business_id=offer.business_id,
+        offer_id=offer.id,
+        status="queued",
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body,
+        recipients_queued=0,
+    )
+    db.add(broadcast)
+    return broadcast
+
+
+def _eligible_customers(offer: Offer):
+    """Customers with an email address that the offer's customer_type targets"""
+    query = select(Customer.id, Customer.email, Customer.name).where(
+        Customer.business_id == offer.business_id,
+        Customer.email.isnot(None),
+        Customer.email != '',
+    )
+    if offer.customer_type == 'MEMBER':
+        query = query.where(Customer.membership_id.isnot(None), Customer.membership_id != '')
+    elif offer.customer_type == 'NON_MEMBER':
+        query = query.where(or_(Customer.membership_id.is_(None), Customer.membership_id == ''))
+    # If 'ANY', no additional filter needed
+    return query
+
+
+def claim_offer_broadcast(db: Session, broadcast_id: UUID) -> Optional[UUID]:
+    """
+    Atomically take a queued broadcast, or a running one whose worker went
+    quiet. Returns the claim token, or None if another worker owns it.
+    """
+    return claim_job(db, OfferBroadcast, broadcast_id, settings.NOTIFICATION_STALE_SECONDS)
+
+
+def run_offer_broadcast(broadcast_id: UUID):
+    """Worker entry point: enqueue the remaining recipients of a broadcast"""
+    from app.routers.notifications.delivery_service import wake_delivery_worker
+
+    db = SessionLocal()
+    try:
+        claim = claim_offer_broadcast(db, broadcast_id)
+        if claim is None:
+            return
+        broadcast = db.query(OfferBroadcast).filter(OfferBroadcast.id == broadcast_id).first()
+        offer_id, queued, cursor = broadcast.offer_id, broadcast.recipients_queued or 0, broadcast.last_customer_id
+
+        try:
+            offer = db.query(Offer).filter(Offer.id == offer_id).first()
+            recipients = _eligible_customers(offer).order_by(Customer.id).limit(settings.BROADCAST_BATCH_SIZE)
+            while True:
+                query = recipients
+                if cursor is not None:
+                    query = query.where(Customer.id > cursor)
+                batch = db.execute(query).all()
+                if not batch:
+                    break
+
+                now = datetime.utcnow()
+                db.execute(insert(Notification), [
+                    {
+                        "id": uuid4(),
+                        "customer_id": customer_id,
+                        "channel": "email",
+                        "type": "offer",
+                        "payload": json.dumps({
+                            "email": email,
+                            "name": name or "Valued Customer",
+                            "broadcast_id": str(broadcast_id),
+                        }),
+                        "status": "pending",
+                        "priority": notification_priority("offer"),
+                        "attempts": 0,
+                        "created_at": now,
+                        "broadcast_id": broadcast_id,
+                    }
+                    for customer_id, email, name in batch
+                ])
+                progress = {"recipients_queued": queued + len(batch), "last_customer_id": batch[-1][0]}
+                # Notifications and the cursor land in the same commit, and only if
+                # this worker still owns the broadcast at the cursor it started from
+                update_job(db, OfferBroadcast, broadcast_id, claim, progress, expected={"last_customer_id": cursor})
+                db.commit()
+                queued, cursor = progress["recipients_queued"], progress["last_customer_id"]
+                wake_delivery_worker(["email"])
+
+            update_job(db, OfferBroadcast, broadcast_id, claim, {"status": "completed", "finished_at": datetime.utcnow()},
+                       expected={"last_customer_id": cursor})
+            db.commit()
+        except JobReclaimed:
+            db.rollback()
+            logger.warning(f"Offer broadcast {broadcast_id} was taken over by another worker; stopping without committing")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Offer broadcast {broadcast_id} failed: {str(e)}")
+            try:
+                update_job(db, OfferBroadcast, broadcast_id, claim,
+                           {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()})
+                db.commit()
+            except JobReclaimed:
+                db.rollback()
+    except Exception as e:
+        logger.error(f"Error running offer broadcast {broadcast_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def submit_offer_broadcast(broadcast_id: UUID):
+    _executor.submit(run_offer_broadcast, broadcast_id)
+
+
+def resume_offer_broadcasts():
+    """Requeue broadcasts left queued or running by a previous process (called on startup)"""
+    resumed = resume_jobs(OfferBroadcast, settings.NOTIFICATION_STALE_SECONDS, submit_offer_broadcast)
+    if resumed:
+        logger.info(f"Resuming {resumed} offer broadcast(s)")
+
+
+def get_broadcast_template(broadcast_id: UUID, session_factory=SessionLocal) -> Optional[EmailTemplate]:
+    """A broadcast's compiled email, cached for the delivery worker"""
+    key = str(broadcast_id)
+    template = _template_cache.get(key)
+    if template is None:
+        db = session_factory()
+        try:
+            row = db.query(OfferBroadcast.subject, OfferBroadcast.html_body, OfferBroadcast.text_body).filter(
+                OfferBroadcast.id == broadcast_id
+            ).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        template = EmailTemplate(*row)
+        _template_cache.set(key, template)
+    return template
+
+
+def broadcast_status(db: Session, broadcast: OfferBroadcast) -> dict:
+    """Broadcast progress and delivery counts as returned by GET /rewards/offers/broadcasts/{id}"""
+    delivery: Dict[str, int] = {"pending": 0, "sending": 0, "sent": 0, "failed": 0}
+    rows = db.query(Notification.status, func.count(Notification.id)).filter(
+        Notification.broadcast_id == broadcast.id
+    ).group_by(Notification.status).all()
+    for status, count in rows:
+        delivery[status] = count
+
+    return {
+        "id": broadcast.id,
+        "offer_id": broadcast.offer_id,
+        "status": broadcast.status,
+        "recipients_queued": broadcast.recipients_queued or 0,
+        "delivery": delivery,
+        "error": broadcast.error,
+        "created_at": broadcast.created_at,
+        "started_at": broadcast.started_at,
+        "finished_at": broadcast.finished_at,
+    }
@@ -0,0 +1,730 @@
+"""
+Background delivery of queued notifications (the `notifications` outbox).
+
+Routes only insert rows into `notifications` (queue_notification); a dispatcher
+runs one worker per channel, each routing its rows to a pluggable sender
+(SMTP for email, or the LocalSender stand-in) with its own concurrency limit.
+A worker claims due rows in batches, highest priority first (redemptions ahead
+of welcome/earn mail, offers and campaigns last), sends them in parallel and
+records the outcome on each row. Failed sends are retried with exponential
+backoff until NOTIFICATION_MAX_ATTEMPTS, then marked failed. Each worker keeps
+its queue-to-delivery latency per notification type and its recent send rate.
+
+Claims are one UPDATE (pending -> sending) of ids selected FOR UPDATE SKIP
+LOCKED, so several app processes can run workers against the same table
+without waiting on each other or sending a row twice. A row left "sending" by
+a crashed worker is released again after NOTIFICATION_STALE_SECONDS. Outcomes
+are only recorded on rows still held by the same claim (status "sending" and
+its claimed_at); a row released and reclaimed in the meantime is counted as
+lost instead of overwriting the newer claim.
+"""
+import json
+import logging
+import random
+import smtplib
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, or_, select, update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.routers.notifications.notification_models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two attempts at the same notification
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class PermanentDeliveryError(Exception):
+    """The notification can never be delivered as queued; it is not retried"""
+
+
+class SMTPConnectionPool:
+    """
+    Up to `size` open SMTP connections shared by the sending threads.
+    A connection is returned to the pool after a send and reused; one that
+    raised a connection-level error is closed and replaced on next use.
+    """
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP], size: int = 4, idle_check_seconds: float = 30):
+        self._connect = connect
+        self._idle_check_seconds = idle_check_seconds
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _take_idle(self) -> Optional[smtplib.SMTP]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+            # Servers drop idle sessions; check before reusing a quiet one
+            if time.monotonic() - last_used < self._idle_check_seconds:
+                return conn
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(conn)
+
+    def _discard(self, conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self.opened += 1
+            yield conn
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered, so the session itself is still usable
+            if conn is not None:
+                self._release(conn)
+            raise
+        except BaseException:
+            if conn is not None:
+                self._discard(conn)
+            raise
+        else:
+            self._release(conn)
+        finally:
+            self._slots.release()
+
+    def _release(self, conn: smtplib.SMTP):
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+class RateLimiter:
+    """Token bucket shared by all sending threads; rate <= 0 disables it"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = burst if burst is not None else max(rate_per_second, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after `attempts` failures"""
+    delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(delay, MAX_RETRY_DELAY_SECONDS)
+    # Spread retries of a failed burst so they don't all hit the server together
+    return delay * random.uniform(1.0, 1.1)
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, (PermanentDeliveryError, smtplib.SMTPRecipientsRefused)):
+        return True
+    # 5xx replies (bad mailbox, message rejected) won't succeed on retry
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class NotificationSender:
+    """
+    Delivers the notifications of one channel. Its worker calls prepare() once
+    per claimed batch, then send() for each prepared message on up to
+    `concurrency` threads. An exception from either fails that notification;
+    it is retried unless is_permanent() says it never will succeed.
+    """
+
+    channel: str = ""
+    concurrency: int = 1
+
+    def prepare(self, batch: List[Notification]) -> List[Any]:
+        """A message for each notification, or the exception that prevented building it"""
+        messages: List[Any] = []
+        for notification in batch:
+            try:
+                messages.append((notification.type, json.loads(notification.payload or "{}")))
+            except ValueError as e:
+                messages.append(PermanentDeliveryError(f"Invalid payload: {str(e)}"))
+        return messages
+
+    def send(self, message: Any) -> None:
+        """Deliver one prepared message; raises on failure"""
+        raise NotImplementedError
+
+    def is_permanent(self, error: Exception) -> bool:
+        return isinstance(error, PermanentDeliveryError)
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sender": type(self).__name__}
+
+
+class SmtpEmailSender(NotificationSender):
+    """
+    Sends email over a pool of reused SMTP connections under a global rate
+    limit. `connect` opens an SMTP connection and defaults to the EmailService
+    settings; pass another factory to send through a different server.
+    """
+
+    channel = "email"
+
+    def __init__(
+        self,
+        connect: Optional[Callable[[], smtplib.SMTP]] = None,
+        session_factory=SessionLocal,
+        pool_size: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+    ):
+        from app.routers.notifications.email_service import email_service
+        self.email = email_service
+        self.session_factory = session_factory
+        self.concurrency = pool_size or settings.SMTP_POOL_SIZE
+        self.pool = SMTPConnectionPool(
+            connect or email_service._get_smtp_connection,
+            size=self.concurrency,
+            idle_check_seconds=settings.SMTP_IDLE_CHECK_SECONDS,
+        )
+        self.rate_limiter = RateLimiter(
+            settings.EMAIL_RATE_PER_SECOND if rate_per_second is None else rate_per_second
+        )
+
+    def prepare(self, batch: List[Notification]) -> List[Any]:
+        """
+        (payload, RenderedEmail) for each notification, or the exception that
+        prevented rendering it. Broadcast recipients share one compiled template
+        with the broadcast's fields already filled in.
+        """
+        from app.routers.notifications.broadcast_service import get_broadcast_template
+
+        results: List[Any] = [None] * len(batch)
+        payloads: List[dict] = []
+        broadcasts: Dict[str, List[int]] = {}
+        for index, notification in enumerate(batch):
+            try:
+                payload = json.loads(notification.payload or "{}")
+            except ValueError as e:
+                results[index] = PermanentDeliveryError(f"Invalid payload: {str(e)}")
+                payload = {}
+            payloads.append(payload)
+            if results[index] is not None:
+                continue
+            if payload.get("broadcast_id"):
+                broadcasts.setdefault(payload["broadcast_id"], []).append(index)
+                continue
+            try:
+                results[index] = (payload, self.email.render_notification(
+                    notification.type, payload, payload.get("business_id")
+                ))
+            except ValueError as e:
+                results[index] = PermanentDeliveryError(str(e))
+            except Exception as e:
+                results[index] = e
+
+        for broadcast_id, indexes in broadcasts.items():
+            try:
+                template = get_broadcast_template(UUID(broadcast_id), self.session_factory)
+            except Exception as e:
+                for index in indexes:
+                    results[index] = e
+                continue
+            if template is None:
+                for index in indexes:
+                    results[index] = PermanentDeliveryError(f"Broadcast {broadcast_id} not found")
+                continue
+            rendered = template.render_many(
+                {"name": payloads[index].get("name") or "Valued Customer"} for index in indexes
+            )
+            for index, email in zip(indexes, rendered):
+                results[index] = (payloads[index], email)
+        return results
+
+    def send(self, message) -> None:
+        payload, rendered = message
+        to_email = payload.get("email")
+        if not to_email:
+            raise PermanentDeliveryError("No recipient email provided")
+
+        subject, html_body, text_body = rendered
+        msg = self.email.build_message(to_email, subject, html_body, text_body)
+        self.rate_limiter.acquire()
+        try:
+            with self.pool.connection() as conn:
+                conn.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # A pooled session closed by the server; retry once on a fresh one
+            with self.pool.connection() as conn:
+                conn.send_message(msg)
+
+    def is_permanent(self, error: Exception) -> bool:
+        return _is_permanent(error)
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sender": "smtp", "smtp_connections_opened": self.pool.opened}
+
+
+class LocalSender(NotificationSender):
+    """
+    Stand-in that records messages instead of sending them, for development,
+    tests and load runs (EMAIL_SENDER=local, SMS_SENDER=local). The last
+    `keep` messages are in `outbox`; `delay_seconds` simulates the provider's
+    response time.
+    """
+
+    RECIPIENT_FIELDS = {"email": "email", "sms": "phone"}
+
+    def __init__(self, channel: str, concurrency: int = 4, delay_seconds: float = 0.0, keep: int = 1000):
+        self.channel = channel
+        self.concurrency = concurrency
+        self.delay_seconds = delay_seconds
+        self.outbox: Deque[dict] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.delivered = 0
+
+    def send(self, message) -> None:
+        type, payload = message
+        field = self.RECIPIENT_FIELDS.get(self.channel)
+        if field and not payload.get(field):
+            raise PermanentDeliveryError(f"No recipient {field} provided")
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        with self._lock:
+            self.outbox.append({"type": type, "payload": payload, "sent_at": datetime.utcnow()})
+            self.delivered += 1
+        logger.debug(f"Local {self.channel} sender recorded a {type} notification for {payload.get(field)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sender": "local", "recorded": self.delivered}
+
+
+def _percentiles(values) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "p50": round(values[(len(values) - 1) // 2], 3),
+        "p95": round(values[int((len(values) - 1) * 0.95)], 3),
+        "max": round(values[-1], 3),
+        "samples": len(values),
+    }
+
+
+class DeliveryMetrics:
+    """
+    Outcome counts for one channel, queue-to-delivery latency per notification
+    type over its last `window` sends, and the send rate over the last
+    `throughput_seconds` (or since the worker started, if that's more recent).
+    """
+
+    def __init__(self, window: int = 1000, throughput_seconds: float = 60):
+        self.throughput_seconds = throughput_seconds
+        self.started = time.monotonic()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.lost = 0
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._sends: Deque[Tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def record(self, sent: int, retried: int, failed: int, latencies: List[Tuple[str, float]], lost: int = 0):
+        now = time.monotonic()
+        with self._lock:
+            self.sent += sent
+            self.retried += retried
+            self.failed += failed
+            self.lost += lost
+            for type, seconds in latencies:
+                self._latencies[type].append(seconds)
+            if sent:
+                self._sends.append((now, sent))
+            self._trim(now)
+
+    def _trim(self, now: float):
+        while self._sends and self._sends[0][0] < now - self.throughput_seconds:
+            self._sends.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            recent = sum(count for _, count in self._sends)
+            span = max(min(self.throughput_seconds, now - self.started), 0.001)
+            return {
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "lost": self.lost,
+                "sent_per_second": round(recent / span, 2),
+                "latency_seconds": {type: _percentiles(values) for type, values in self._latencies.items() if values},
+            }
+
+
+class NotificationWorker:
+    """
+    Drains due notifications of one channel through its sender: claims a batch,
+    highest priority first, sends it on the sender's thread pool and records
+    each outcome on its row.
+    """
+
+    def __init__(self, sender: NotificationSender, session_factory=SessionLocal, batch_size: Optional[int] = None):
+        self.sender = sender
+        self.channel = sender.channel
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.metrics = DeliveryMetrics()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(sender.concurrency, 1), thread_name_prefix=f"{self.channel}-delivery"
+        )
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stale_checked_at = 0.0
+
+    def _release_stale(self, db, now: datetime):
+        """Rows left "sending" by a crashed worker go back to pending (checked once per poll interval)"""
+        if time.monotonic() - self._stale_checked_at < settings.NOTIFICATION_POLL_SECONDS:
+            return
+        self._stale_checked_at = time.monotonic()
+        stale_before = now - timedelta(seconds=settings.NOTIFICATION_STALE_SECONDS)
+        table = Notification.__table__
+        db.execute(
+            update(table)
+            .where(table.c.channel == self.channel, table.c.status == "sending", table.c.claimed_at < stale_before)
+            .values(status="pending", claimed_at=None)
+        )
+
+    def claim_batch(self, db) -> List[Notification]:
+        """Mark up to batch_size due notifications as sending and return them, highest priority first"""
+        now = datetime.utcnow()
+        self._release_stale(db, now)
+        table = Notification.__table__
+        # On Postgres, rows locked by another worker's claim are skipped instead of
+        # waited on; SQLite ignores FOR UPDATE and runs the UPDATE under its write lock
+        due = (
+            select(table.c.id)
+            .where(
+                table.c.channel == self.channel,
+                table.c.status == "pending",
+                or_(table.c.next_attempt_at.is_(None), table.c.next_attempt_at <= now),
+            )
+            .order_by(table.c.priority.desc(), table.c.created_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = db.execute(
+            update(table)
+            .where(table.c.id.in_(due), table.c.status == "pending")
+            .values(status="sending", claimed_at=now)
+            .returning(table.c.id)
+        ).scalars().all()
+        db.commit()
+        if not claimed:
+            return []
+        # Every returned row carries this claim's claimed_at, which run_once matches on
+        return db.query(Notification).filter(
+            Notification.id.in_(claimed), Notification.status == "sending", Notification.claimed_at == now
+        ).order_by(Notification.priority.desc(), Notification.created_at).all()
+
+    @staticmethod
+    def _still_claimed(table, claimed_at: datetime):
+        """Row is still held by the claim made at claimed_at (not released and reclaimed since)"""
+        return table.c.status == "sending", table.c.claimed_at == claimed_at
+
+    def _attempt(self, message) -> Optional[Exception]:
+        if isinstance(message, Exception):
+            return message
+        try:
+            self.sender.send(message)
+            return None
+        except Exception as e:
+            return e
+
+    def run_once(self) -> int:
+        """Claim and send one batch; returns the number of notifications processed"""
+        db = self.session_factory()
+        try:
+            batch = self.claim_batch(db)
+            if not batch:
+                return 0
+            try:
+                messages = self.sender.prepare(batch)
+            except Exception as e:
+                messages = [e] * len(batch)
+            errors = list(self._executor.map(self._attempt, messages))
+
+            now = datetime.utcnow()
+            table = Notification.__table__
+            delivered = []
+            retried = failed = lost = 0
+            for notification, error in zip(batch, errors):
+                if error is None:
+                    delivered.append(notification)
+                    continue
+                attempts = (notification.attempts or 0) + 1
+                values = {"attempts": attempts, "last_error": str(error)[:500], "claimed_at": None}
+                if self.sender.is_permanent(error) or attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                    values.update(status="failed", next_attempt_at=None)
+                else:
+                    values.update(status="pending", next_attempt_at=now + timedelta(seconds=retry_delay(attempts)))
+                result = db.execute(
+                    update(table)
+                    .where(table.c.id == notification.id, *self._still_claimed(table, notification.claimed_at))
+                    .values(**values)
+                )
+                if result.rowcount != 1:
+                    lost += 1
+                    logger.warning(f"Notification {notification.id} was reclaimed before its outcome was recorded")
+                elif values["status"] == "failed":
+                    failed += 1
+                    logger.error(f"Notification {notification.id} failed after {attempts} attempt(s): {str(error)}")
+                else:
+                    retried += 1
+                    logger.warning(f"Notification {notification.id} will be retried: {str(error)}")
+
+            # Successful sends share their values, so they are recorded in one statement
+            recorded = set()
+            if delivered:
+                recorded = set(db.execute(
+                    update(table)
+                    .where(
+                        table.c.id.in_([notification.id for notification in delivered]),
+                        *self._still_claimed(table, delivered[0].claimed_at)
+                    )
+                    .values(
+                        status="sent",
+                        attempts=func.coalesce(table.c.attempts, 0) + 1,
+                        sent_at=now,
+                        next_attempt_at=None,
+                        last_error=None,
+                        claimed_at=None,
+                    )
+                    .returning(table.c.id)
+                ).scalars().all())
+            latencies = []
+            for notification in delivered:
+                if notification.id not in recorded:
+                    lost += 1
+                    logger.warning(f"Notification {notification.id} was sent after its claim was released")
+                elif notification.created_at is not None:
+                    latencies.append((notification.type, (now - notification.created_at).total_seconds()))
+            db.commit()
+            self.metrics.record(len(recorded), retried, failed, latencies, lost)
+            return len(batch)
+        finally:
+            db.close()
+
+    def drain(self) -> int:
+        """Send batches until nothing is due; returns the number processed"""
+        self.metrics.started = time.monotonic()
+        total = 0
+        while True:
+            processed = self.run_once()
+            total += processed
+            if processed == 0:
+                return total
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"{self.channel} delivery worker error: {str(e)}")
+                processed = 0
+            # A full batch means more are probably waiting
+            if processed < self.batch_size:
+                self._wake.wait(settings.NOTIFICATION_POLL_SECONDS)
+                self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self.metrics.started = time.monotonic()
+            self._thread = threading.Thread(target=self._loop, name=f"{self.channel}-delivery-worker", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Skip the rest of the poll interval, e.g. right after queueing notifications"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+        self.sender.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"running": bool(self._thread and self._thread.is_alive()), "concurrency": self.sender.concurrency}
+        stats.update(self.metrics.stats())
+        stats.update(self.sender.stats())
+        return stats
+
+
+class EmailDeliveryWorker(NotificationWorker):
+    """The email worker over SMTP; see SmtpEmailSender for `connect`"""
+
+    def __init__(
+        self,
+        connect: Optional[Callable[[], smtplib.SMTP]] = None,
+        session_factory=SessionLocal,
+        pool_size: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        batch_size: Optional[int] = None,
+    ):
+        sender = SmtpEmailSender(connect, session_factory, pool_size, rate_per_second)
+        super().__init__(sender, session_factory, batch_size)
+
+
+class NotificationDispatcher:
+    """
+    One worker per channel, each with its own sender, thread pool and claim
+    loop, so a slow SMS provider never holds up email (or the other way round).
+    """
+
+    def __init__(self, senders: Iterable[NotificationSender] = (), session_factory=SessionLocal, batch_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.workers: Dict[str, NotificationWorker] = {}
+        self._running = False
+        self._lock = threading.Lock()
+        for sender in senders:
+            self.add_sender(sender)
+
+    def add_sender(self, sender: NotificationSender) -> NotificationWorker:
+        """Route the sender's channel to it, replacing the channel's previous sender"""
+        worker = NotificationWorker(sender, self.session_factory, self.batch_size)
+        with self._lock:
+            previous = self.workers.get(sender.channel)
+            self.workers[sender.channel] = worker
+            running = self._running
+        if previous is not None:
+            previous.stop()
+        if running:
+            worker.start()
+        return worker
+
+    def start(self):
+        with self._lock:
+            self._running = True
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.stop()
+
+    def wake(self, channels: Optional[Iterable[str]] = None):
+        """Wake the workers of these channels (all of them by default)"""
+        channels = None if channels is None else set(channels)
+        for channel, worker in list(self.workers.items()):
+            if channels is None or channel in channels:
+                worker.wake()
+
+    def drain(self) -> Dict[str, int]:
+        """Send everything due, channel by channel; returns the number processed per channel"""
+        return {channel: worker.drain() for channel, worker in list(self.workers.items())}
+
+    def stats(self) -> Dict[str, Any]:
+        return {channel: worker.stats() for channel, worker in list(self.workers.items())}
+
+
+def configured_senders() -> List[NotificationSender]:
+    """
+    Senders picked by EMAIL_SENDER and SMS_SENDER. A channel without one isn't
+    dispatched by this process; its notifications stay pending.
+    """
+    senders: List[NotificationSender] = []
+    if settings.EMAIL_SENDER == "smtp":
+        senders.append(SmtpEmailSender())
+    elif settings.EMAIL_SENDER == "local":
+        senders.append(LocalSender("email", settings.SMTP_POOL_SIZE))
+    elif settings.EMAIL_SENDER:
+        logger.warning(f"Unknown EMAIL_SENDER {settings.EMAIL_SENDER!r}; email notifications won't be sent")
+    if settings.SMS_SENDER == "local":
+        senders.append(LocalSender("sms", settings.SMS_CONCURRENCY))
+    elif settings.SMS_SENDER:
+        logger.warning(f"Unknown SMS_SENDER {settings.SMS_SENDER!r}; SMS notifications won't be sent")
+    return senders
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher(configured_senders())
+    return _dispatcher
+
+
+def register_sender(sender: NotificationSender) -> NotificationWorker:
+    """Deliver sender.channel through this sender in this process (e.g. an SMS provider)"""
+    return get_dispatcher().add_sender(sender)
+
+
+def start_delivery_worker():
+    """Start this process's background senders (called on startup)"""
+    get_dispatcher().start()
+
+
+def stop_delivery_worker():
+    if _dispatcher is not None:
+        _dispatcher.stop()
+
+
+def wake_delivery_worker(channels: Optional[Iterable[str]] = None):
+    """Nudge the running workers after committing new notifications"""
+    if _dispatcher is not None:
+        _dispatcher.wake(channels)
+
+
+def delivery_stats() -> Optional[Dict[str, Any]]:
+    return _dispatcher.stats() if _dispatcher is not None else None
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+
+from app.database import Base
+
+
+class EmailTemplateOverride(Base):
+    """A business's replacement for parts of a default email template; empty parts fall back to the default"""
+    __tablename__ = "email_templates"
+
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), primary_key=True)
+    type = Column(String, primary_key=True)  # welcome | offer | redeem
+    subject = Column(String, nullable=True)
+    html_body = Column(Text, nullable=True)
+    text_body = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
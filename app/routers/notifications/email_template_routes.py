@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.dependencies import get_current_business, get_db
+from app.routers.notifications.email_template_models import EmailTemplateOverride
+from app.routers.notifications.email_template_schemas import EmailTemplateUpdate, EmailTemplateResponse
+from app.routers.notifications.email_templates import (
+    DEFAULT_TEMPLATES,
+    CompiledTemplate,
+    get_email_template,
+    invalidate_email_templates,
+    template_fields,
+)
+
+router = APIRouter()
+
+
+def _template_response(db: Session, business_id, type: str) -> dict:
+    override = db.query(EmailTemplateOverride).filter(
+        EmailTemplateOverride.business_id == business_id,
+        EmailTemplateOverride.type == type
+    ).first()
+    subject, html_body, text_body = get_email_template(type, business_id).sources()
+    return {
+        "type": type,
+        "fields": template_fields(type),
+        "subject": subject,
+        "html_body": html_body,
+        "text_body": text_body,
+        "is_override": override is not None,
+        "updated_at": override.updated_at if override else None,
+    }
+
+
+def _check_type(type: str):
+    if type not in DEFAULT_TEMPLATES:
+        raise HTTPException(status_code=404, detail=f"Unknown email template '{type}'")
+
+
+@router.get("/", response_model=List[EmailTemplateResponse])
+def list_email_templates(
+    current: dict = Depends(get_current_business),
+    db: Session = Depends(get_db)
+):
+    """Email templates used for this business (its overrides, else the defaults)"""
+    business_id = current["business"].id
+    return [_template_response(db, business_id, type) for type in DEFAULT_TEMPLATES]
+
+
+@router.put("/{type}", response_model=EmailTemplateResponse)
+def update_email_template(
+    type: str,
+    payload: EmailTemplateUpdate,
+    current: dict = Depends(get_current_business),
+    db: Session = Depends(get_db)
+):
+    """Override the subject, HTML and/or text of an email template for this business"""
+    _check_type(type)
+    business_id = current["business"].id
+
+    allowed = set(template_fields(type))
+    for part in (payload.subject, payload.html_body, payload.text_body):
+        if part:
+            unknown = CompiledTemplate(part).fields - allowed
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown template field(s): {', '.join(sorted(unknown))}"
+                )
+
+    override = db.query(EmailTemplateOverride).filter(
+        EmailTemplateOverride.business_id == business_id,
+        EmailTemplateOverride.type == type
+    ).first()
+    if not override:
+        override = EmailTemplateOverride(business_id=business_id, type=type)
+        db.add(override)
+    override.subject = payload.subject or None
+    override.html_body = payload.html_body or None
+    override.text_body = payload.text_body or None
+    db.commit()
+    invalidate_email_templates(business_id)
+
+    return _template_response(db, business_id, type)
+
+
+@router.delete("/{type}")
+def reset_email_template(
+    type: str,
+    current: dict = Depends(get_current_business),
+    db: Session = Depends(get_db)
+):
+    """Remove this business's override so the default template is used again"""
+    _check_type(type)
+    business_id = current["business"].id
+    deleted = db.query(EmailTemplateOverride).filter(
+        EmailTemplateOverride.business_id == business_id,
+        EmailTemplateOverride.type == type
+    ).delete()
+    db.commit()
+    invalidate_email_templates(business_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="No override for this template")
+    return {"message": f"Email template '{type}' reset to default"}
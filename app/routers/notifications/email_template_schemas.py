@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class EmailTemplateUpdate(BaseModel):
+    # Omitted parts keep the default template; use {{ field }} placeholders
+    subject: Optional[str] = None
+    html_body: Optional[str] = None
+    text_body: Optional[str] = None
+
+
+class EmailTemplateResponse(BaseModel):
+    type: str
+    fields: List[str]  # Placeholders this template type can use
+    subject: str
+    html_body: str
+    text_body: Optional[str]
+    is_override: bool
+    updated_at: Optional[datetime] = None
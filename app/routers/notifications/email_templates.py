@@ -0,0 +1,535 @@
+"""
+Email templates compiled once and rendered by substitution.
+
+Templates use `{{ field }}` placeholders (`{{ '{{' }}` for literal braces). Each
+one is parsed a single time into literal chunks and field slots, so rendering
+fills the slots and joins instead of rebuilding the whole document. The HTML and text variants of an email share one context,
+built by the type's context builder from the notification payload.
+
+Businesses can override any part of a template (email_templates table). The
+compiled set per business is cached and invalidated like the reward-rule cache.
+Broadcasts use EmailTemplate.partial to fill in the shared fields once and then
+render_many for the per-recipient ones. Filled-in values stay literal: a value
+that looks like a placeholder is escaped in the partial's source, so storing
+and re-parsing it gives the same template.
+"""
+import logging
+import re
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from app.cache import TTLCache, get_version_store
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# A field placeholder, or the escape for literal braces (group 2)
+FIELD_PATTERN = re.compile(r"\{\{\s*(?:([A-Za-z_][A-Za-z0-9_]*)|'(\{\{)')\s*\}\}")
+LITERAL_BRACES = "{{ '{{' }}"
+
+RenderedEmail = namedtuple("RenderedEmail", ["subject", "html", "text"])
+
+
+class CompiledTemplate:
+    """One template string, parsed into literal chunks and field slots"""
+
+    __slots__ = ("source", "fields", "_parts", "_slots")
+
+    def __init__(self, source: str):
+        self.source = source
+        # Literal chunks with a None slot for each field; rendering copies the list,
+        # fills the slots and joins, so the literals are never rescanned
+        parts: List[Optional[str]] = []
+        literal = []
+        position = 0
+        for match in FIELD_PATTERN.finditer(source):
+            literal.append(source[position:match.start()])
+            position = match.end()
+            if match.group(1) is None:
+                literal.append(match.group(2))
+                continue
+            parts.append("".join(literal))
+            parts.append(match.group(1))
+            literal = []
+        literal.append(source[position:])
+        parts.append("".join(literal))
+        self._set_parts(parts[::2], parts[1::2])
+
+    def _set_parts(self, literals: List[str], fields: List[str]):
+        """Interleave literals with one slot per field (len(literals) == len(fields) + 1)"""
+        self._parts = [None] * (2 * len(fields) + 1)
+        self._parts[::2] = literals
+        self._slots = [(2 * i + 1, field) for i, field in enumerate(fields)]
+        self.fields = frozenset(fields)
+
+    def render(self, context: Dict[str, Any]) -> str:
+        if not self._slots:
+            return self._parts[0]
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            value = context.get(field)
+            # Fields the context lacks render as empty
+            parts[index] = "" if value is None else value if type(value) is str else str(value)
+        return "".join(parts)
+
+    def partial(self, context: Dict[str, Any]) -> "CompiledTemplate":
+        """A template with the given fields filled in and the others left as placeholders"""
+        literals = [self._parts[0]]
+        fields = []
+        for index, field in self._slots:
+            if field in context:
+                # Filled values join the surrounding literal; they are never parsed
+                literals[-1] += _text(context[field]) + self._parts[index + 1]
+            else:
+                fields.append(field)
+                literals.append(self._parts[index + 1])
+        template = CompiledTemplate.__new__(CompiledTemplate)
+        template._set_parts(literals, fields)
+        template.source = "".join(
+            literal.replace("{{", LITERAL_BRACES) + ("{{ %s }}" % fields[i] if i < len(fields) else "")
+            for i, literal in enumerate(literals)
+        )
+        return template
+
+
+def _text(value) -> str:
+    # Same conversion as render: None fills in as empty
+    return "" if value is None else value if type(value) is str else str(value)
+
+
+class EmailTemplate:
+    """Subject, HTML and text variants of one email, rendered together"""
+
+    __slots__ = ("subject", "html", "text")
+
+    def __init__(self, subject: str, html: str, text: Optional[str]):
+        self.subject = CompiledTemplate(subject)
+        self.html = CompiledTemplate(html)
+        self.text = CompiledTemplate(text) if text else None
+
+    @property
+    def fields(self) -> frozenset:
+        fields = self.subject.fields | self.html.fields
+        return fields | self.text.fields if self.text else fields
+
+    def render(self, context: Dict[str, Any]) -> RenderedEmail:
+        return RenderedEmail(
+            self.subject.render(context),
+            self.html.render(context),
+            self.text.render(context) if self.text else None,
+        )
+
+    def partial(self, context: Dict[str, Any]) -> "EmailTemplate":
+        template = EmailTemplate.__new__(EmailTemplate)
+        template.subject = self.subject.partial(context)
+        template.html = self.html.partial(context)
+        template.text = self.text.partial(context) if self.text else None
+        return template
+
+    def render_many(self, contexts: Iterable[Dict[str, Any]]) -> Iterator[RenderedEmail]:
+        """Render one email per context; fill shared fields with partial() first"""
+        subject, html, text = self.subject.render, self.html.render, self.text.render if self.text else None
+        for context in contexts:
+            yield RenderedEmail(subject(context), html(context), text(context) if text else None)
+
+    def sources(self) -> Tuple[str, str, Optional[str]]:
+        return self.subject.source, self.html.source, self.text.source if self.text else None
+
+
+# Default templates
+WELCOME_HTML = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background-color: #4CAF50; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+                .content { background-color: #f9f9f9; padding: 30px; border-radius: 0 0 5px 5px; }
+                .button { display: inline-block; padding: 12px 30px; background-color: #4CAF50; color: white; text-decoration: none; border-radius: 5px; margin-top: 20px; }
+                .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>Welcome to Our Rewards Program!</h1>
+                </div>
+                <div class="content">
+                    <h2>Hello {{ name }}!</h2>
+                    <p>Thank you for joining our car wash rewards program! We're excited to have you as part of our community.</p>
+                    {{ bonus_html }}
+                    <p>Start earning points with every wash and unlock amazing rewards:</p>
+                    <ul>
+                        <li>🎁 Exclusive discounts on services</li>
+                        <li>⭐ Free washes after multiple visits</li>
+                        <li>💎 Special member-only offers</li>
+                        <li>🏆 Points that never expire</li>
+                    </ul>
+                    {{ password_html }}
+                    <p>Visit us soon to start earning rewards!</p>
+                    <p>Best regards,<br>The Car Wash Team</p>
+                </div>
+                <div class="footer">
+                    <p>This is an automated email. Please do not reply to this message.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+WELCOME_TEXT = """
+Hello {{ name }}!
+
+Thank you for joining our car wash rewards program! We're excited to have you as part of our community.
+{{ bonus_text }}
+Start earning points with every wash and unlock amazing rewards:
+- Exclusive discounts on services
+- Free washes after multiple visits
+- Special member-only offers
+- Points that never expire
+{{ password_text }}
+Visit us soon to start earning rewards!
+
+Best regards,
+The Car Wash Team
+
+---
+This is an automated email. Please do not reply to this message.
+        """
+OFFER_HTML = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background-color: #2196F3; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+                .content { background-color: #f9f9f9; padding: 30px; border-radius: 0 0 5px 5px; }
+                .offer-box { background-color: white; border: 2px solid #2196F3; padding: 20px; margin: 20px 0; border-radius: 5px; }
+                .button { display: inline-block; padding: 12px 30px; background-color: #2196F3; color: white; text-decoration: none; border-radius: 5px; margin-top: 20px; }
+                .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>🎁 New Offer Available!</h1>
+                </div>
+                <div class="content">
+                    <h2>Hello {{ name }}!</h2>
+                    <p>We have an exciting new offer just for you!</p>
+                    <div class="offer-box">
+                        <h3>{{ offer_name }}</h3>
+                        <p>{{ offer_description }}</p>
+                        <p><strong>Reward: {{ reward_desc }}</strong></p>
+                    </div>
+                    <p>Don't miss out on this amazing opportunity. Visit us soon to take advantage of this offer!</p>
+                    <p>Best regards,<br>The Car Wash Team</p>
+                </div>
+                <div class="footer">
+                    <p>This is an automated email. Please do not reply to this message.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+OFFER_TEXT = """
+Hello {{ name }}!
+
+We have an exciting new offer just for you!
+
+OFFER: {{ offer_name }}
+{{ offer_description }}
+
+Reward: {{ reward_desc }}
+
+Don't miss out on this amazing opportunity. Visit us soon to take advantage of this offer!
+
+Best regards,
+The Car Wash Team
+
+---
+This is an automated email. Please do not reply to this message.
+        """
+REDEEM_HTML = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .header { background-color: #28a745; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }
+                .content { background-color: #f9f9f9; padding: 30px; border-radius: 0 0 5px 5px; }
+                .button { display: inline-block; padding: 12px 30px; background-color: #28a745; color: white; text-decoration: none; border-radius: 5px; margin-top: 20px; }
+                .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>✅ Redemption Confirmed!</h1>
+                </div>
+                <div class="content">
+                    <h2>Hello {{ name }}!</h2>
+                    <p>Your redemption has been successfully processed!</p>
+                    <div style="background-color: white; border: 2px solid #28a745; padding: 20px; margin: 20px 0; border-radius: 5px;">
+                        <h3>{{ offer_name }}</h3>
+                        <p><strong>{{ reward_desc }}</strong></p>
+                    </div>
+                    {{ code_html }}
+                    <p>Thank you for being a valued customer. We look forward to serving you!</p>
+                    <p>Best regards,<br>The Car Wash Team</p>
+                </div>
+                <div class="footer">
+                    <p>This is an automated email. Please do not reply to this message.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+REDEEM_TEXT = """
+Hello {{ name }}!
+
+Your redemption has been successfully processed!
+
+OFFER: {{ offer_name }}
+{{ reward_desc }}
+{{ code_text }}
+Thank you for being a valued customer. We look forward to serving you!
+
+Best regards,
+The Car Wash Team
+
+---
+This is an automated email. Please do not reply to this message.
+        """
+
+
+WELCOME_SUBJECT = "Welcome to Our Car Wash Rewards Program!"
+OFFER_SUBJECT = "New Offer Available: {{ offer_name }}"
+REDEEM_SUBJECT = "Redemption Confirmed - Thank You!"
+
+
+# Context builders: notification payload -> template fields
+
+def _welcome_context(payload: Dict[str, Any]) -> Dict[str, Any]:
+    name = payload.get("name") or "Valued Customer"
+    signup_bonus = payload.get("signup_bonus") or 0
+    password_setup_token = payload.get("password_setup_token")
+    bonus_html = f"<p><strong>🎉 Welcome Bonus: {signup_bonus} points!</strong></p>" if signup_bonus > 0 else ""
+    bonus_text = f"\nWelcome Bonus: {signup_bonus} points!\n" if signup_bonus > 0 else ""
+
+    # Password setup section
+    setup_url = ""
+    password_html = ""
+    password_text = ""
+    if password_setup_token:
+        # In production, replace with actual frontend URL
+        frontend_url = settings.FRONTEND_URL
+        setup_url = f"{frontend_url}/customer/setup-password?token={password_setup_token}"
+        password_html = f"""
+            <div style="background-color: #e3f2fd; border: 2px solid #2196F3; padding: 20px; margin: 20px 0; border-radius: 5px; text-align: center;">
+                <h3 style="color: #1976d2; margin-top: 0;">🔐 Set Up Your Account Password</h3>
+                <p>To access your account and track your rewards, please set up your password by clicking the button below:</p>
+                <a href="{setup_url}" class="button" style="display: inline-block; padding: 12px 30px; background-color: #2196F3; color: white; text-decoration: none; border-radius: 5px; margin-top: 10px;">Create Password</a>
+                <p style="font-size: 12px; color: #666; margin-top: 15px;">Or copy and paste this link into your browser:<br><a href="{setup_url}" style="color: #2196F3; word-break: break-all;">{setup_url}</a></p>
+            </div>
+            """
+        password_text = f"""
+            
+SET UP YOUR ACCOUNT PASSWORD
+To access your account and track your rewards, please set up your password by visiting:
+{setup_url}
+"""
+    return {
+        "name": name,
+        "signup_bonus": signup_bonus,
+        "setup_url": setup_url,
+        "bonus_html": bonus_html,
+        "bonus_text": bonus_text,
+        "password_html": password_html,
+        "password_text": password_text,
+    }
+
+
+def _offer_context(payload: Dict[str, Any]) -> Dict[str, Any]:
+    reward_type = payload.get("reward_type")
+    reward_value = payload.get("reward_value")
+
+    # Format reward description
+    if reward_type == "POINTS":
+        reward_desc = f"Earn {reward_value} points"
+    elif reward_type == "DISCOUNT_PERCENT":
+        reward_desc = f"Get {reward_value}% discount"
+    elif reward_type == "FREE_WASH":
+        reward_desc = "Get a FREE wash"
+    elif reward_type == "FREE_MONTHS":
+        reward_desc = f"Get {reward_value} free months"
+    else:
+        reward_desc = f"Special reward: {reward_value}"
+
+    return {
+        "name": payload.get("name") or "Valued Customer",
+        "offer_name": payload.get("offer_name"),
+        "offer_description": payload.get("offer_description") or "Special offer available now!",
+        "reward_type": reward_type,
+        "reward_value": reward_value,
+        "reward_desc": reward_desc,
+    }
+
+
+def _redeem_context(payload: Dict[str, Any]) -> Dict[str, Any]:
+    reward_type = payload.get("reward_type")
+    reward_value = payload.get("reward_value")
+    redemption_code = payload.get("redemption_code")
+
+    # Format reward description
+    if reward_type == "POINTS":
+        reward_desc = f"{reward_value} points have been deducted"
+    elif reward_type == "DISCOUNT_PERCENT":
+        reward_desc = f"{reward_value}% discount will be applied"
+    elif reward_type == "FREE_WASH":
+        reward_desc = "Your free wash is ready!"
+    else:
+        reward_desc = f"Reward: {reward_value}"
+
+    code_html = ""
+    code_text = ""
+    if redemption_code:
+        code_html = f"""
+            <div style="background-color: #fff3cd; border: 1px solid #ffc107; padding: 15px; margin: 20px 0; border-radius: 5px; text-align: center;">
+                <p><strong>Redemption Code:</strong></p>
+                <p style="font-size: 24px; font-weight: bold; color: #856404;">{redemption_code}</p>
+                <p style="font-size: 12px;">Please present this code when you visit us.</p>
+            </div>
+            """
+        code_text = f"\nRedemption Code: {redemption_code}\nPlease present this code when you visit us.\n"
+
+    return {
+        "name": payload.get("name") or "Valued Customer",
+        "offer_name": payload.get("offer_name") or payload.get("offer_title") or "Offer",
+        "reward_type": reward_type,
+        "reward_value": reward_value,
+        "reward_desc": reward_desc,
+        "redemption_code": redemption_code or "",
+        "code_html": code_html,
+        "code_text": code_text,
+    }
+
+
+# type -> (subject, html, text, context builder)
+DEFAULT_TEMPLATES: Dict[str, Tuple[str, str, str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "welcome": (WELCOME_SUBJECT, WELCOME_HTML, WELCOME_TEXT, _welcome_context),
+    "offer": (OFFER_SUBJECT, OFFER_HTML, OFFER_TEXT, _offer_context),
+    "redeem": (REDEEM_SUBJECT, REDEEM_HTML, REDEEM_TEXT, _redeem_context),
+}
+
+# Filled in per recipient by broadcasts; everything else is shared
+RECIPIENT_FIELDS = ("name",)
+
+_defaults = {
+    type: EmailTemplate(subject, html, text)
+    for type, (subject, html, text, _) in DEFAULT_TEMPLATES.items()
+}
+
+_override_cache = TTLCache(
+    "email_templates",
+    maxsize=settings.RULE_CACHE_MAX_BUSINESSES,
+    ttl=settings.RULE_CACHE_TTL_SECONDS,
+)
+
+
+def template_fields(type: str) -> List[str]:
+    """Fields a template of this type may use"""
+    if type not in DEFAULT_TEMPLATES:
+        raise ValueError(f"No email template for notification type '{type}'")
+    return sorted(DEFAULT_TEMPLATES[type][3]({}))
+
+
+def build_context(type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    if type not in DEFAULT_TEMPLATES:
+        raise ValueError(f"No email template for notification type '{type}'")
+    return DEFAULT_TEMPLATES[type][3](payload)
+
+
+def _version_key(business_id) -> str:
+    return f"email-templates:{business_id}"
+
+
+def _load_overrides(business_id, session_factory) -> Dict[str, EmailTemplate]:
+    from app.routers.notifications.email_template_models import EmailTemplateOverride
+    db = session_factory()
+    try:
+        rows = db.query(EmailTemplateOverride).filter(EmailTemplateOverride.business_id == business_id).all()
+    finally:
+        db.close()
+    templates = {}
+    for row in rows:
+        default = _defaults.get(row.type)
+        if default is None:
+            continue
+        subject, html, text = default.sources()
+        templates[row.type] = EmailTemplate(row.subject or subject, row.html_body or html, row.text_body or text)
+    return templates
+
+
+def get_email_template(type: str, business_id=None, session_factory=SessionLocal) -> EmailTemplate:
+    """The business's compiled template for this type, or the default"""
+    if type not in _defaults:
+        raise ValueError(f"No email template for notification type '{type}'")
+    if business_id is None:
+        return _defaults[type]
+
+    key = str(business_id)
+    try:
+        version = get_version_store().get(_version_key(key))
+    except Exception as e:
+        # A shared store that is down only costs a reload
+        logger.warning(f"Email template version lookup failed: {str(e)}")
+        version = None
+    entry = _override_cache.get(key)
+    if entry is None or version is None or entry[0] != version:
+        entry = (version, _load_overrides(business_id, session_factory))
+        if version is not None:
+            _override_cache.set(key, entry)
+    return entry[1].get(type) or _defaults[type]
+
+
+def invalidate_email_templates(business_id):
+    """Call after committing any change to the business's template overrides"""
+    key = str(business_id)
+    try:
+        get_version_store().bump(_version_key(key))
+    except Exception as e:
+        logger.warning(f"Email template version bump failed: {str(e)}")
+    _override_cache.delete(key)
+
+
+def render_email(type: str, payload: Dict[str, Any], business_id=None) -> RenderedEmail:
+    return get_email_template(type, business_id).render(build_context(type, payload))
+
+
+def render_batch(
+    type: str,
+    shared: Dict[str, Any],
+    recipients: Iterable[Dict[str, Any]],
+    business_id=None,
+) -> Iterator[RenderedEmail]:
+    """
+    Render one email per recipient. Shared fields are computed and substituted once;
+    each recipient dict only supplies RECIPIENT_FIELDS (e.g. name).
+    """
+    context = build_context(type, shared)
+    for field in RECIPIENT_FIELDS:
+        context.pop(field, None)
+    template = get_email_template(type, business_id).partial(context)
+    defaults = build_context(type, {})
+    return template.render_many(
+        {field: recipient.get(field) or defaults[field] for field in RECIPIENT_FIELDS}
+        for recipient in recipients
+    )
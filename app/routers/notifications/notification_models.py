@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -12,10 +12,23 @@ class Notification(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=True)
     channel = Column(String, nullable=False)  # email | sms
-    type = Column(String, nullable=False)  # welcome | earn | redeem | campaign
+    type = Column(String, nullable=False)  # welcome | earn | redeem | campaign | offer
     payload = Column(String)  # JSON string with content
-    status = Column(String, default="pending")  # pending | sent | failed
+    status = Column(String, default="pending")  # pending | sending | sent | failed
+    priority = Column(Integer, default=0, nullable=False)  # Higher is delivered first (notification_priority)
     created_at = Column(DateTime, default=datetime.utcnow)
     sent_at = Column(DateTime, nullable=True)
 
+    # Delivery worker bookkeeping
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)  # Retry backoff; NULL = due now
+    claimed_at = Column(DateTime, nullable=True)  # When a worker took the row (status "sending")
+    last_error = Column(String, nullable=True)
+    broadcast_id = Column(UUID(as_uuid=True), ForeignKey("offer_broadcasts.id"), nullable=True)
 
+    __table_args__ = (
+        # Delivery workers claim due rows per channel, highest priority first
+        Index("ix_notifications_dispatch", "channel", "status", priority.desc(), "created_at"),
+        # Delivery stats per offer broadcast
+        Index("ix_notifications_broadcast_status", "broadcast_id", "status"),
+    )
@@ -1,11 +1,27 @@
 from datetime import datetime
 import json
+import uuid
 from typing import Optional
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.routers.notifications.notification_models import Notification
 
+# Delivery order when notifications queue up: a customer waiting at the counter
+# for their redemption code first, bulk offer and campaign mail last
+NOTIFICATION_PRIORITIES = {
+    "redeem": 100,
+    "welcome": 50,
+    "earn": 50,
+    "offer": 10,
+    "campaign": 0,
+}
+
+
+def notification_priority(type: str) -> int:
+    return NOTIFICATION_PRIORITIES.get(type, 0)
+
 
 def queue_notification(
     db: Session,
@@ -15,17 +31,23 @@ def queue_notification(
     type: str,
     payload: dict,
 ):
-    """Simple abstraction to store notifications; actual sending can be wired later."""
-    notif = Notification(
-        customer_id=customer_id,
-        channel=channel,
-        type=type,
-        payload=json.dumps(payload),
-        status="pending",
-        created_at=datetime.utcnow(),
-    )
-    db.add(notif)
+    """
+    Queue a notification for delivery. The row is written in the caller's
+    transaction, never buffered, so it commits or rolls back with the work it
+    announces. Returns the notification id.
+    """
+    notification_id = uuid.uuid4()
+    db.execute(insert(Notification), [{
+        "id": notification_id,
+        "customer_id": customer_id,
+        "channel": channel,
+        "type": type,
+        "payload": json.dumps(payload),
+        "status": "pending",
+        "priority": notification_priority(type),
+        "created_at": datetime.utcnow(),
+    }])
     # caller commits
-    return notif
+    return notification_id
 
 
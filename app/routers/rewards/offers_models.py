@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Date, Boolean, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Date, Boolean, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -43,3 +43,7 @@ class Offer(Base):
     points_required = Column(Integer)  # Derived from reward_value when reward_type is POINTS
     status = Column(String)  # Alias for is_active
     expiry_date = Column(DateTime)  # Alias for end_date
+
+    __table_args__ = (
+        Index("ix_offers_business_active", "business_id", "is_active"),
+    )
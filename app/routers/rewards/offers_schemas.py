@@ -46,6 +46,7 @@ class OfferResponse(BaseModel):
     is_active: bool
     created_at: datetime
     updated_at: datetime
+    broadcast_id: Optional[UUID] = None  # Set when creating an offer started an email broadcast
 
     class Config:
         from_attributes = True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -11,12 +11,24 @@ class PointsLedger(Base):
     points_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     member_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=True)  # For future member support
     customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), nullable=True)  # For phone-only profiles
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=True)  # The customer's business
     transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), nullable=True)
     rule_id = Column(UUID(as_uuid=True), ForeignKey("offers.id"), nullable=True)  # Can reference offers or earning_rules
     points_earned = Column(Integer, nullable=False)  # Can be negative for redemptions
     reward_type_applied = Column(String(30), nullable=False)  # POINTS / DISCOUNT / FREE_MONTH
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Business ledger listing, newest first, keyset on (created_at, points_id)
+        Index("ix_points_ledger_business_created_id", "business_id", "created_at", "points_id"),
+        # Ledger history is read by customer_id OR member_id, newest first
+        Index("ix_points_ledger_customer_created", "customer_id", "created_at",
+              postgresql_include=["points_earned"]),
+        # member_id is almost always NULL; a partial index keeps the OR plan on both indexes
+        Index("ix_points_ledger_member_created", "member_id", "created_at",
+              postgresql_where=text("member_id IS NOT NULL"), sqlite_where=text("member_id IS NOT NULL")),
+    )
+
 
 class PointBalance(Base):
     __tablename__ = "point_balances"
@@ -25,3 +37,18 @@ class PointBalance(Base):
     total_points = Column(Integer, default=0, nullable=False)
     last_updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+
+
+class PointBalanceSnapshot(Base):
+    """
+    A customer's ledger total up to as_of. A balance is the snapshot plus the
+    ledger entries created after it (see points_replay_service).
+    """
+    __tablename__ = "point_balance_snapshots"
+
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"), primary_key=True)
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=True)
+    total_points = Column(Integer, nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+    as_of = Column(DateTime, nullable=False)  # Covers entries created at or before this
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
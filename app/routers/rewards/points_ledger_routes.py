@@ -1,62 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import List, Optional
 from datetime import datetime, date
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.database import run_db
+from app.dependencies import current_business, get_business_user
 from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance
+from app.routers.rewards.points_ledger_service import list_ledger_entries
 from app.routers.rewards.points_ledger_schemas import PointsLedgerResponse, PointBalanceResponse
 from app.routers.customers.cust_models import Customer
 
 router = APIRouter()
 
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Read-heavy endpoints: async, with queries run through run_db (the async engine when configured)
 
 
 @router.get("/points/ledger", response_model=List[PointsLedgerResponse])
-def get_points_ledger(
+async def get_points_ledger(
+    response: Response,
     customer_id: Optional[str] = None,
-    limit: int = 100,
-    offset: int = 0,
-    db: Session = Depends(get_db),
-    current: dict = Depends(get_current_business),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_business_user),
 ):
-    """Get points ledger entries for the business."""
-    business_id = current["business"].id
-    
-    # Get all customer IDs for this business
-    customer_ids = [c.id for c in db.query(Customer.id).filter(Customer.business_id == business_id).all()]
-    
-    query = db.query(PointsLedger).filter(
-        (PointsLedger.customer_id.in_(customer_ids)) | (PointsLedger.member_id.in_(customer_ids))
-    )
-    
-    if customer_id:
-        customer_uuid = UUID(customer_id)
-        query = query.filter(
-            (PointsLedger.customer_id == customer_uuid) | (PointsLedger.member_id == customer_uuid)
+    """
+    Get points ledger entries for the business, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page
+    (no header on the last page).
+    """
+    entries, next_cursor = await run_db(_points_ledger, user, customer_id, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
+
+
+def _points_ledger(db: Session, user: dict, customer_id: Optional[str], limit: int, cursor: Optional[str]):
+    business_id = current_business(db, user)["business"].id
+    try:
+        return list_ledger_entries(
+            db, business_id=business_id,
+            customer_id=UUID(customer_id) if customer_id else None,
+            limit=limit, cursor=cursor,
         )
-    
-    ledger_entries = query.order_by(PointsLedger.created_at.desc()).offset(offset).limit(limit).all()
-    return ledger_entries
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/points/balances", response_model=List[PointBalanceResponse])
-def get_point_balances(
+async def get_point_balances(
     customer_id: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current: dict = Depends(get_current_business),
+    user: dict = Depends(get_business_user),
 ):
     """Get point balances for customers in the business."""
-    business_id = current["business"].id
+    return await run_db(_point_balances, user, customer_id)
+
+
+def _point_balances(db: Session, user: dict, customer_id: Optional[str]):
+    business_id = current_business(db, user)["business"].id
     
     query = db.query(PointBalance).join(
         Customer, PointBalance.customer_id == Customer.id
@@ -71,13 +72,16 @@ def get_point_balances(
 
 
 @router.get("/points/balance/{customer_id}", response_model=PointBalanceResponse)
-def get_customer_balance(
+async def get_customer_balance(
     customer_id: str,
-    db: Session = Depends(get_db),
-    current: dict = Depends(get_current_business),
+    user: dict = Depends(get_business_user),
 ):
     """Get point balance for a specific customer."""
-    business_id = current["business"].id
+    return await run_db(_customer_balance, user, customer_id)
+
+
+def _customer_balance(db: Session, user: dict, customer_id: str):
+    business_id = current_business(db, user)["business"].id
     customer_uuid = UUID(customer_id)
     
     # Verify customer belongs to business
@@ -91,29 +95,33 @@ def get_customer_balance(
     
     balance = db.query(PointBalance).filter(PointBalance.customer_id == customer_uuid).first()
     
-    # If balance doesn't exist, create one from customer.points
+    # If balance doesn't exist, create one from the ledger
     if not balance:
-        balance = PointBalance(
-            customer_id=customer_uuid,
-            total_points=customer.points or 0
-        )
-        db.add(balance)
+        from app.routers.rewards.points_ledger_service import ensure_point_balance
+        ensure_point_balance(db, customer_uuid)
         db.commit()
-        db.refresh(balance)
+        balance = db.query(PointBalance).filter(PointBalance.customer_id == customer_uuid).first()
     
     return balance
 
 
 @router.get("/points/ledger/{customer_id}", response_model=List[PointsLedgerResponse])
-def get_customer_ledger(
+async def get_customer_ledger(
+    response: Response,
     customer_id: str,
-    limit: int = 100,
-    offset: int = 0,
-    db: Session = Depends(get_db),
-    current: dict = Depends(get_current_business),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_business_user),
 ):
-    """Get points ledger entries for a specific customer."""
-    business_id = current["business"].id
+    """Get points ledger entries for a specific customer, paged like GET /points/ledger."""
+    entries, next_cursor = await run_db(_customer_ledger, user, customer_id, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
+
+
+def _customer_ledger(db: Session, user: dict, customer_id: str, limit: int, cursor: Optional[str]):
+    business_id = current_business(db, user)["business"].id
     customer_uuid = UUID(customer_id)
     
     # Verify customer belongs to business
@@ -125,9 +133,7 @@ def get_customer_ledger(
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     
-    ledger_entries = db.query(PointsLedger).filter(
-        (PointsLedger.customer_id == customer_uuid) | (PointsLedger.member_id == customer_uuid)
-    ).order_by(PointsLedger.created_at.desc()).offset(offset).limit(limit).all()
-    
-    return ledger_entries
-
+    try:
+        return list_ledger_entries(db, customer_id=customer_uuid, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
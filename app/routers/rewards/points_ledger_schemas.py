@@ -17,6 +17,7 @@ class PointsLedgerResponse(BaseModel):
     points_id: UUID
     member_id: Optional[UUID]
     customer_id: Optional[UUID]
+    business_id: Optional[UUID] = None
     transaction_id: Optional[UUID]
     rule_id: Optional[UUID]
     points_earned: int
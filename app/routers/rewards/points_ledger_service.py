@@ -1,7 +1,79 @@
+from sqlalchemy import and_, bindparam, exists, func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
-from uuid import UUID
+from sqlalchemy.orm.util import identity_key
+from uuid import UUID, uuid4
+from collections import defaultdict
 from datetime import datetime
-from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.database import dialect_insert
+from app.routers.customers.dashboard_service import invalidate_customer_dashboards
+from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance, PointBalanceSnapshot
+from app.routers.transactions.transaction_list_service import decode_cursor, encode_cursor
+
+
+class InsufficientPointsError(ValueError):
+    """Raised by deduct_points_from_ledger when the balance can't cover the deduction"""
+
+
+def _increment_balances(db: Session, totals: Dict[UUID, int]) -> None:
+    """
+    Apply point deltas to point_balances and customers.points in single statements.
+    Balances are upserted, so concurrent writers never read-modify-write a balance;
+    writers create missing rows from the ledger first (ensure_point_balances).
+    """
+    _increment_point_balances(db, totals)
+    _increment_customer_points(db, totals)
+
+
+def _increment_point_balances(db: Session, totals: Dict[UUID, int]) -> None:
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, PointBalance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PointBalance.customer_id],
+        set_={
+            "total_points": PointBalance.__table__.c.total_points + stmt.excluded.total_points,
+            "last_updated_at": stmt.excluded.last_updated_at,
+        },
+    )
+    db.execute(stmt, [
+        {"customer_id": cid, "total_points": delta, "last_updated_at": now}
+        for cid, delta in totals.items()
+    ])
+    _expire_loaded(db, PointBalance, totals, "total_points")
+
+
+def _increment_customer_points(db: Session, totals: Dict[UUID, int]) -> None:
+    # customer.points is kept for backward compatibility
+    from app.routers.customers.cust_models import Customer
+    customers = Customer.__table__
+    db.execute(
+        update(customers)
+        .where(customers.c.id == bindparam("b_customer_id"))
+        .values(points=func.coalesce(customers.c.points, 0) + bindparam("b_delta")),
+        [{"b_customer_id": cid, "b_delta": delta} for cid, delta in totals.items()]
+    )
+    _expire_loaded(db, Customer, totals, "points")
+    # Every ledger write ends here; cached dashboards show the balance
+    invalidate_customer_dashboards(db, totals)
+
+
+def _expire_loaded(db: Session, model, ids, attribute: str) -> None:
+    """Rows already loaded in this session would otherwise keep showing the old value"""
+    for pk in ids:
+        obj = db.identity_map.get(identity_key(model, pk))
+        if obj is not None:
+            db.expire(obj, [attribute])
+
+
+def _business_ids(db: Session, customer_ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+    """Each customer's business, for ledger entries whose caller didn't pass business_id"""
+    from app.routers.customers.cust_models import Customer
+    customer_ids = set(customer_ids)
+    if not customer_ids:
+        return {}
+    return dict(db.execute(
+        select(Customer.id, Customer.business_id).where(Customer.id.in_(customer_ids))
+    ).all())
 
 
 def add_points_to_ledger(
@@ -11,54 +83,178 @@ def add_points_to_ledger(
     reward_type_applied: str,
     transaction_id: UUID = None,
     rule_id: UUID = None,
-    member_id: UUID = None
+    member_id: UUID = None,
+    business_id: UUID = None
 ) -> PointsLedger:
     """Add an entry to the points ledger and update the balance."""
-    
+    if business_id is None:
+        business_id = _business_ids(db, [customer_id]).get(customer_id)
+    ensure_point_balance(db, customer_id)
+
     # Create ledger entry
     ledger_entry = PointsLedger(
         member_id=member_id,
         customer_id=customer_id,
+        business_id=business_id,
         transaction_id=transaction_id,
         rule_id=rule_id,
         points_earned=points_earned,
         reward_type_applied=reward_type_applied
     )
     db.add(ledger_entry)
-    
-    # Update or create balance
-    balance = db.query(PointBalance).filter(PointBalance.customer_id == customer_id).first()
-    if balance:
-        balance.total_points = (balance.total_points or 0) + points_earned
-        balance.last_updated_at = datetime.utcnow()
-    else:
-        balance = PointBalance(
-            customer_id=customer_id,
-            total_points=points_earned
-        )
-        db.add(balance)
-    
-    # Also update customer.points for backward compatibility
-    from app.routers.customers.cust_models import Customer
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if customer:
-        customer.points = (customer.points or 0) + points_earned
-    
     db.flush()
+
+    _increment_balances(db, {customer_id: points_earned})
     return ledger_entry
 
 
+def ledger_balance(customer_id):
+    """
+    SQL expression for a customer's balance replayed from the ledger: their
+    snapshot plus the entries after it. customer_id may be a value or a column.
+    """
+    snapshot = PointBalanceSnapshot
+    as_of = select(snapshot.as_of).where(snapshot.customer_id == customer_id).scalar_subquery()
+    base = select(snapshot.total_points).where(snapshot.customer_id == customer_id).scalar_subquery()
+    tail = select(func.sum(PointsLedger.points_earned)).where(
+        PointsLedger.customer_id == customer_id,
+        or_(as_of.is_(None), PointsLedger.created_at > as_of),
+    ).scalar_subquery()
+    return func.coalesce(base, 0) + func.coalesce(tail, 0)
+
+
+def ensure_point_balances(db: Session, customer_ids: Iterable[UUID]) -> None:
+    """
+    Create missing balance rows from the ledger. Writers call this before adding
+    their entries, so the increment that follows starts from the replayed balance.
+    """
+    from app.routers.customers.cust_models import Customer
+    customer_ids = set(customer_ids)
+    if not customer_ids:
+        return
+    stmt = dialect_insert(db, PointBalance).from_select(
+        ["customer_id", "total_points", "last_updated_at"],
+        select(Customer.id, ledger_balance(Customer.id), literal(datetime.utcnow()))
+        .where(Customer.id.in_(customer_ids), ~exists().where(PointBalance.customer_id == Customer.id))
+    ).on_conflict_do_nothing(index_elements=[PointBalance.customer_id])
+    db.execute(stmt)
+
+
+def ensure_point_balance(db: Session, customer_id: UUID) -> None:
+    """Create the customer's balance row from the ledger if it doesn't exist yet"""
+    ensure_point_balances(db, [customer_id])
+
+
+def deduct_points_from_ledger(
+    db: Session,
+    customer_id: UUID,
+    points: int,
+    reward_type_applied: str,
+    rule_id: UUID = None,
+    transaction_id: UUID = None,
+    business_id: UUID = None
+) -> int:
+    """
+    Deduct points only if the balance covers them, in one conditional UPDATE, and
+    record the negative ledger entry. Returns the new balance.
+    Raises InsufficientPointsError without changing anything otherwise.
+    """
+    ensure_point_balance(db, customer_id)
+    balances = PointBalance.__table__
+    new_balance = db.execute(
+        update(balances)
+        .where(balances.c.customer_id == customer_id, balances.c.total_points >= points)
+        .values(total_points=balances.c.total_points - points, last_updated_at=datetime.utcnow())
+        .returning(balances.c.total_points)
+    ).scalar()
+    if new_balance is None:
+        raise InsufficientPointsError("Insufficient points")
+    _expire_loaded(db, PointBalance, [customer_id], "total_points")
+
+    if business_id is None:
+        business_id = _business_ids(db, [customer_id]).get(customer_id)
+    db.add(PointsLedger(
+        customer_id=customer_id,
+        business_id=business_id,
+        transaction_id=transaction_id,
+        rule_id=rule_id,
+        points_earned=-points,
+        reward_type_applied=reward_type_applied
+    ))
+    db.flush()
+    _increment_customer_points(db, {customer_id: -points})
+    return new_balance
+
+
+def add_points_to_ledger_bulk(db: Session, entries: List[dict]) -> None:
+    """
+    Add many ledger entries at once and apply the per-customer totals to balances.
+    Each entry takes the same keys as add_points_to_ledger's arguments.
+    Writes go out as executemany batches; balances are incremented in SQL.
+    """
+    if not entries:
+        return
+
+    now = datetime.utcnow()
+    businesses = _business_ids(db, [entry["customer_id"] for entry in entries if entry.get("business_id") is None])
+    ledger_rows = []
+    totals = defaultdict(int)
+    for entry in entries:
+        ledger_rows.append({
+            "points_id": uuid4(),
+            "member_id": entry.get("member_id"),
+            "customer_id": entry["customer_id"],
+            "business_id": entry.get("business_id") or businesses.get(entry["customer_id"]),
+            "transaction_id": entry.get("transaction_id"),
+            "rule_id": entry.get("rule_id"),
+            "points_earned": entry["points_earned"],
+            "reward_type_applied": entry["reward_type_applied"],
+            "created_at": now,
+        })
+        totals[entry["customer_id"]] += entry["points_earned"]
+    ensure_point_balances(db, totals)
+    db.execute(insert(PointsLedger), ledger_rows)
+    _increment_balances(db, totals)
+
+
 def get_customer_balance(db: Session, customer_id: UUID) -> int:
     """Get the current point balance for a customer."""
     balance = db.query(PointBalance).filter(PointBalance.customer_id == customer_id).first()
     if balance:
         return balance.total_points or 0
     
-    # Fallback to customer.points if balance doesn't exist
-    from app.routers.customers.cust_models import Customer
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if customer:
-        return customer.points or 0
-    
-    return 0
+    # No balance row yet: replay the customer's ledger
+    return db.execute(select(ledger_balance(customer_id))).scalar() or 0
+
 
+def list_ledger_entries(
+    db: Session,
+    business_id: UUID = None,
+    customer_id: UUID = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Tuple[List[PointsLedger], Optional[str]]:
+    """
+    One page of ledger entries, newest first, for a business and/or a customer
+    (as customer or member). Pages are keyset on (created_at, points_id); pass
+    the returned cursor back for the next page (None on the last one).
+    Raises ValueError for an invalid cursor.
+    """
+    query = select(PointsLedger)
+    if business_id is not None:
+        query = query.where(PointsLedger.business_id == business_id)
+    if customer_id is not None:
+        query = query.where(or_(PointsLedger.customer_id == customer_id, PointsLedger.member_id == customer_id))
+    if cursor:
+        created_at, points_id = decode_cursor(cursor)
+        query = query.where(or_(
+            PointsLedger.created_at < created_at,
+            and_(PointsLedger.created_at == created_at, PointsLedger.points_id < points_id),
+        ))
+    entries = db.execute(
+        query.order_by(PointsLedger.created_at.desc(), PointsLedger.points_id.desc()).limit(limit + 1)
+    ).scalars().all()
+    if len(entries) <= limit:
+        return entries, None
+    entries = entries[:limit]
+    return entries, encode_cursor(entries[-1].created_at, entries[-1].points_id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -14,6 +14,12 @@ class PointsHistory(Base):
     reason = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Issued/redeemed totals per business filter on the sign of points
+        Index("ix_points_history_business_points", "business_id", "points"),
+        Index("ix_points_history_customer", "customer_id"),
+    )
+
 
 class EarningRule(Base):
     __tablename__ = "earning_rules"
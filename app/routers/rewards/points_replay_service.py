@@ -0,0 +1,219 @@
+"""
+Point balances replayed from the points ledger.
+
+points_ledger is the append-only source of truth: awards, redemptions and
+adjustments are only ever added to it. point_balances and customers.points are
+projections of the ledger, incremented in the same transaction as each entry
+(see points_ledger_service); points_history is the older per-event log kept for
+reports. point_balance_snapshots holds each customer's ledger total up to a
+point in time, so a balance replays as its snapshot plus the entries after it.
+
+take_snapshots advances the snapshots, replay_balances corrects the
+projections from the ledger and verify_balances reports where they drift. All
+three are set-based SQL over every customer (or one business) at once.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import dialect_insert
+from app.routers.customers.cust_models import Customer
+from app.routers.customers.dashboard_service import invalidate_customer_dashboards
+from app.routers.rewards.points_ledger_models import PointBalance, PointBalanceSnapshot, PointsLedger
+from app.routers.rewards.points_ledger_service import (
+    _increment_customer_points,
+    _increment_point_balances,
+    ledger_balance,
+)
+from app.routers.rewards.points_models import PointsHistory
+
+Ledger = PointsLedger
+Snapshot = PointBalanceSnapshot
+
+
+def _business_customer_ids(business_id: UUID):
+    """
+    The business's customers. Their balances cover all of their entries, whatever
+    business_id an entry was written with, so business filters go through this.
+    """
+    return select(Customer.id).where(Customer.business_id == business_id)
+
+
+def _ledger_totals(business_id: Optional[UUID]):
+    """
+    (customer_id, points) summed over the whole ledger in one pass. Entries
+    count towards their customer_id, the balance the writers increment.
+    """
+    totals = select(
+        Ledger.customer_id.label("customer_id"),
+        func.sum(Ledger.points_earned).label("points"),
+    ).where(Ledger.customer_id.isnot(None))
+    if business_id is not None:
+        totals = totals.where(Ledger.customer_id.in_(_business_customer_ids(business_id)))
+    return totals.group_by(Ledger.customer_id).subquery()
+
+
+def _customers(business_id: Optional[UUID]):
+    query = select(Customer.id, Customer.business_id, Customer.points)
+    if business_id is not None:
+        query = query.where(Customer.business_id == business_id)
+    return query.subquery()
+
+
+def take_snapshots(
+    db: Session,
+    business_id: Optional[UUID] = None,
+    as_of: Optional[datetime] = None,
+    rebuild: bool = False,
+) -> int:
+    """
+    Move each customer's snapshot forward to as_of (default: now minus
+    POINTS_SNAPSHOT_LAG_SECONDS), adding the entries created since its last
+    one; with rebuild, snapshots are recomputed from the whole ledger.
+    Returns the number of snapshots that took in new entries. The caller commits.
+    """
+    if as_of is None:
+        as_of = datetime.utcnow() - timedelta(seconds=settings.POINTS_SNAPSHOT_LAG_SECONDS)
+    if rebuild:
+        clear = delete(Snapshot)
+        if business_id is not None:
+            clear = clear.where(Snapshot.customer_id.in_(_business_customer_ids(business_id)))
+        db.execute(clear)
+
+    # One row per customer (the upsert can't touch a snapshot twice), labelled
+    # with the customer's business rather than the entries' business_id
+    new_entries = (
+        select(
+            Ledger.customer_id,
+            Customer.business_id,
+            func.sum(Ledger.points_earned),
+            func.count(),
+            literal(as_of),
+            literal(datetime.utcnow()),
+        )
+        .join(Customer, Customer.id == Ledger.customer_id)
+        .outerjoin(Snapshot, Snapshot.customer_id == Ledger.customer_id)
+        .where(
+            Ledger.created_at <= as_of,
+            or_(Snapshot.as_of.is_(None), Ledger.created_at > Snapshot.as_of),
+        )
+    )
+    if business_id is not None:
+        new_entries = new_entries.where(Customer.business_id == business_id)
+    new_entries = new_entries.group_by(Ledger.customer_id, Customer.business_id)
+
+    stmt = dialect_insert(db, Snapshot).from_select(
+        ["customer_id", "business_id", "total_points", "entry_count", "as_of", "updated_at"],
+        new_entries,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Snapshot.customer_id],
+        set_={
+            "total_points": Snapshot.__table__.c.total_points + stmt.excluded.total_points,
+            "entry_count": Snapshot.__table__.c.entry_count + stmt.excluded.entry_count,
+            "as_of": stmt.excluded.as_of,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    written = db.execute(stmt).rowcount
+
+    # Customers without new entries are unchanged up to as_of as well. Only the
+    # customers whose entries were just read may advance past them.
+    advance = update(Snapshot).where(Snapshot.as_of < as_of)
+    if business_id is not None:
+        advance = advance.where(Snapshot.customer_id.in_(_business_customer_ids(business_id)))
+    db.execute(advance.values(as_of=as_of))
+    return written
+
+
+def replay_balances(db: Session, business_id: Optional[UUID] = None, full: bool = False) -> int:
+    """
+    Correct point_balances and customers.points from the ledger (from the
+    snapshots onwards, or the full ledger with full=True) for every customer or
+    one business. Only drifted rows are written, as deltas, so entries committed
+    while the replay runs are kept. Returns the number of customers corrected.
+    The caller commits.
+    """
+    customers = _customers(business_id)
+    query = select(customers.c.id).select_from(customers)
+    if full:
+        totals = _ledger_totals(business_id)
+        query = query.outerjoin(totals, totals.c.customer_id == customers.c.id)
+        expected = func.coalesce(totals.c.points, 0)
+    else:
+        # Index range scans of each customer's entries after their snapshot
+        expected = ledger_balance(customers.c.id)
+    balance = func.coalesce(PointBalance.total_points, 0)
+    points = func.coalesce(customers.c.points, 0)
+    rows = db.execute(
+        query.add_columns(expected - balance, expected - points)
+        .outerjoin(PointBalance, PointBalance.customer_id == customers.c.id)
+        .where(or_(balance != expected, points != expected))
+    ).all()
+
+    balance_deltas: Dict[UUID, int] = {cid: delta for cid, delta, _ in rows if delta}
+    points_deltas: Dict[UUID, int] = {cid: delta for cid, _, delta in rows if delta}
+    if balance_deltas:
+        _increment_point_balances(db, balance_deltas)
+    if points_deltas:
+        _increment_customer_points(db, points_deltas)
+    invalidate_customer_dashboards(db, [row[0] for row in rows])
+    return len(rows)
+
+
+def verify_balances(db: Session, business_id: Optional[UUID] = None, sample_size: int = 20) -> dict:
+    """
+    Compare every customer's full-ledger total with point_balances,
+    customers.points, the snapshot replay and the points_history sum. Returns
+    the number of customers that drift from each, plus a sample of them.
+    points_history drift is reported but not counted in "drifted": it is a log
+    that replay_balances doesn't rewrite.
+    """
+    ledger = _ledger_totals(business_id)
+    customers = _customers(business_id)
+    history = select(
+        PointsHistory.customer_id.label("customer_id"),
+        func.sum(PointsHistory.points).label("points"),
+    ).where(PointsHistory.customer_id.isnot(None))
+    if business_id is not None:
+        history = history.where(PointsHistory.business_id == business_id)
+    history = history.group_by(PointsHistory.customer_id).subquery()
+
+    expected = func.coalesce(ledger.c.points, 0)
+    values = {
+        "point_balances": func.coalesce(PointBalance.total_points, 0),
+        "customer_points": func.coalesce(customers.c.points, 0),
+        "snapshots": ledger_balance(customers.c.id),
+        "points_history": func.coalesce(history.c.points, 0),
+    }
+    repairable = or_(*(values[source] != expected for source in ("point_balances", "customer_points", "snapshots")))
+    joined = (
+        select(customers.c.id, customers.c.business_id)
+        .select_from(customers)
+        .outerjoin(ledger, ledger.c.customer_id == customers.c.id)
+        .outerjoin(history, history.c.customer_id == customers.c.id)
+        .outerjoin(PointBalance, PointBalance.customer_id == customers.c.id)
+    )
+
+    counts = db.execute(
+        joined.with_only_columns(
+            func.count(),
+            func.coalesce(func.sum(case((repairable, 1), else_=0)), 0),
+            *[func.coalesce(func.sum(case((value != expected, 1), else_=0)), 0) for value in values.values()],
+        )
+    ).one()
+    report = {"customers": counts[0], "drifted": counts[1]}
+    report.update(zip(values, counts[2:]))
+
+    samples = db.execute(
+        joined.add_columns(expected, *values.values()).where(repairable).limit(sample_size)
+    ).all()
+    report["samples"] = [
+        dict(customer_id=str(row[0]), business_id=str(row[1]) if row[1] else None, ledger=row[2], **dict(zip(values, row[3:])))
+        for row in samples
+    ]
+    return report
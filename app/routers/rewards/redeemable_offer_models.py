@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Numeric
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -31,3 +31,7 @@ class RedeemableOffer(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=True)  # Optional expiry date
 
+    __table_args__ = (
+        Index("ix_redeemable_offers_customer_business", "customer_id", "business_id", "is_redeemed", "created_at"),
+    )
+
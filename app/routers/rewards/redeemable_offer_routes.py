@@ -3,8 +3,7 @@ from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import List
 
-from app.database import SessionLocal
-from app.dependencies import get_current_customer, get_current_business
+from app.dependencies import get_current_customer, get_current_business, get_db
 from app.routers.rewards.redeemable_offer_models import RedeemableOffer
 from app.routers.rewards.redeemable_offer_schemas import RedeemableOfferResponse, RedeemOfferRequest
 from app.routers.rewards.redeemable_offer_service import (
@@ -18,14 +17,6 @@ from app.routers.transactions.transaction_models import Transaction
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/customer/redeemable-offers", response_model=List[RedeemableOfferResponse])
 def get_my_redeemable_offers(
     current: dict = Depends(get_current_customer),
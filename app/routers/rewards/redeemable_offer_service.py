@@ -1,52 +1,52 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from uuid import UUID
 from typing import List, Optional
 from datetime import datetime
 from app.routers.rewards.redeemable_offer_models import RedeemableOffer
 from app.routers.transactions.transaction_models import Transaction
 from app.routers.customers.cust_models import Customer
+from app.routers.customers.dashboard_service import invalidate_customer_dashboards
+from app.routers.customers.visit_stats_service import get_visit_count
 from app.routers.rewards.offers_models import Offer
 
 
 def get_customer_transaction_count(db: Session, customer_id: UUID, business_id: UUID) -> int:
     """Get the count of approved transactions for a customer"""
-    count = db.query(func.count(Transaction.id)).filter(
-        Transaction.business_id == business_id,
-        Transaction.phone_number == db.query(Customer.phone).filter(Customer.id == customer_id).scalar_subquery(),
-        Transaction.is_approved == True
-    ).scalar() or 0
-    return count
+    phone = db.query(Customer.phone).filter(Customer.id == customer_id).scalar()
+    if phone is None:
+        return 0
+    return get_visit_count(db, business_id, phone)
 
 
 def get_customer_transaction_count_by_phone(db: Session, phone_number: str, business_id: UUID) -> int:
     """Get the count of approved transactions for a customer by phone number"""
-    count = db.query(func.count(Transaction.id)).filter(
-        Transaction.business_id == business_id,
-        Transaction.phone_number == phone_number,
-        Transaction.is_approved == True
-    ).scalar() or 0
-    return count
+    return get_visit_count(db, business_id, phone_number)
 
 
 def check_and_create_redeemable_offer(
     db: Session,
     customer: Customer,
     transaction: Transaction,
-    business_id: UUID
+    business_id: UUID,
+    transaction_count: Optional[int] = None,
+    customer_type: Optional[str] = None
 ) -> Optional[RedeemableOffer]:
     """
     Check if customer completed 4th transaction and create redeemable offer.
     Returns the created offer or None if not eligible.
+    Batch callers pass transaction_count (including this one) and customer_type
+    as they were at this transaction; otherwise both are read from the database.
     """
     # Check if customer is member or non-member
-    is_member = customer.membership_id is not None and customer.membership_id != ''
-    customer_type = 'MEMBER' if is_member else 'NON_MEMBER'
+    if customer_type is None:
+        is_member = customer.membership_id is not None and customer.membership_id != ''
+        customer_type = 'MEMBER' if is_member else 'NON_MEMBER'
     
     # Get transaction count (including this one)
-    transaction_count = get_customer_transaction_count_by_phone(
-        db, customer.phone, business_id
-    )
+    if transaction_count is None:
+        transaction_count = get_customer_transaction_count_by_phone(
+            db, customer.phone, business_id
+        )
     
     # Only create offer after 4th transaction
     if transaction_count != 4:
@@ -99,6 +99,7 @@ def check_and_create_redeemable_offer(
     
     db.add(redeemable_offer)
     db.flush()
+    invalidate_customer_dashboards(db, [customer.id])
     return redeemable_offer
 
 
@@ -141,5 +142,6 @@ def mark_offer_as_redeemed(
     offer.redeemed_transaction_id = transaction_id
     
     db.flush()
+    invalidate_customer_dashboards(db, [offer.customer_id])
     return offer
 
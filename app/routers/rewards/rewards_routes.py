@@ -4,27 +4,29 @@ from uuid import UUID
 from datetime import datetime, date as date_type
 import uuid as _uuid
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.dependencies import get_current_business, get_db
 from app.routers.rewards.offers_models import Offer
 from app.routers.rewards.offers_schemas import OfferCreate, OfferResponse
+from app.routers.rewards.rule_cache import get_active_rules, invalidate_business_rules
 from app.routers.rewards.redemption_models import Redemption
 from app.routers.rewards.points_models import PointsHistory, EarningRule
 from app.routers.rewards.points_schemas import EarningRuleCreate, EarningRuleResponse
 from app.routers.customers.cust_models import Customer
+from app.routers.businesses.daily_stats_service import record_event
 from app.routers.notifications.notification_service import queue_notification
+from app.routers.notifications.broadcast_models import OfferBroadcast
+from app.routers.notifications.broadcast_schemas import OfferBroadcastResponse
+from app.write_behind import write_behind
+from app.routers.notifications.broadcast_service import (
+    broadcast_status,
+    create_offer_broadcast,
+    offer_broadcast_due,
+    submit_offer_broadcast,
+)
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/offers/create", response_model=OfferResponse)
 def create_offer(
     payload: OfferCreate,
@@ -67,67 +69,42 @@ def create_offer(
     db.add(offer)
     db.commit()
     db.refresh(offer)
+    invalidate_business_rules(business_id)
     
-    # Send email notifications to eligible customers if offer is active
-    if offer.is_active:
+    # Announce the offer to eligible customers by email. Recipients are
+    # enqueued in the background; the response carries the broadcast id
+    offer.broadcast_id = None
+    if offer_broadcast_due(offer):
         try:
-            from app.routers.notifications.email_service import email_service
-            from sqlalchemy import or_
-            from datetime import date
-            
-            # Get eligible customers based on customer_type
-            customer_type_filter = offer.customer_type
-            today = date.today()
-            
-            # Check if offer is currently valid
-            if offer.start_date <= today and (offer.end_date is None or offer.end_date >= today):
-                # Get customers matching the offer criteria
-                customers_query = db.query(Customer).filter(
-                    Customer.business_id == business_id
-                )
-                
-                if customer_type_filter == 'MEMBER':
-                    customers_query = customers_query.filter(
-                        Customer.membership_id.isnot(None),
-                        Customer.membership_id != ''
-                    )
-                elif customer_type_filter == 'NON_MEMBER':
-                    customers_query = customers_query.filter(
-                        or_(
-                            Customer.membership_id.is_(None),
-                            Customer.membership_id == ''
-                        )
-                    )
-                # If 'ANY', no additional filter needed
-                
-                # Only get customers with email
-                customers_query = customers_query.filter(Customer.email.isnot(None), Customer.email != '')
-                
-                eligible_customers = customers_query.all()
-                
-                # Send email to each eligible customer
-                for customer in eligible_customers:
-                    try:
-                        email_service.send_offer_notification_email(
-                            customer_name=customer.name or "Valued Customer",
-                            customer_email=customer.email,
-                            offer_name=offer.name,
-                            offer_description=offer.description,
-                            reward_type=offer.reward_type,
-                            reward_value=str(offer.reward_value)
-                        )
-                    except Exception as e:
-                        # Log error but continue with other customers
-                        import logging
-                        logging.error(f"Error sending offer email to {customer.email}: {str(e)}")
+            broadcast = create_offer_broadcast(db, offer)
+            db.commit()
+            submit_offer_broadcast(broadcast.id)
+            offer.broadcast_id = broadcast.id
         except Exception as e:
             # Log error but don't fail offer creation
+            db.rollback()
             import logging
-            logging.error(f"Error sending offer notifications: {str(e)}")
+            logging.error(f"Error starting offer broadcast: {str(e)}")
     
     return offer
 
 
+@router.get("/offers/broadcasts/{broadcast_id}", response_model=OfferBroadcastResponse)
+def get_offer_broadcast(
+    broadcast_id: UUID,
+    db: Session = Depends(get_db),
+    current: dict = Depends(get_current_business),
+):
+    """Progress and delivery counts of an offer's email broadcast"""
+    broadcast = db.query(OfferBroadcast).filter(
+        OfferBroadcast.id == broadcast_id,
+        OfferBroadcast.business_id == current["business"].id
+    ).first()
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return broadcast_status(db, broadcast)
+
+
 @router.get("/offers", response_model=list[OfferResponse])
 def get_offers(
     status: str = None,  # Filter by status: Active or Inactive
@@ -198,10 +175,7 @@ def get_eligible_offers(
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
 
-    offers = db.query(Offer).filter(
-        Offer.business_id == business_id,
-        Offer.is_active == True
-    ).all()
+    offers = get_active_rules(db, business_id)
     
     # Filter eligible offers based on customer points and reward type
     from app.routers.rewards.points_ledger_service import get_customer_balance
@@ -254,7 +228,7 @@ def redeem_offer(
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
 
-    # Check if customer has enough points for POINTS reward type
+    # Check and deduct points for POINTS reward type
     points_needed = 0
     if offer.reward_type == "POINTS":
         try:
@@ -262,32 +236,31 @@ def redeem_offer(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid reward value")
         
-        from app.routers.rewards.points_ledger_service import get_customer_balance
-        customer_balance = get_customer_balance(db, customer.id)
-        
-        if customer_balance < points_needed:
+        # Use ledger system (negative points for redemption); the balance check and
+        # the deduction are one conditional UPDATE so concurrent redemptions can't overdraw
+        from app.routers.rewards.points_ledger_service import deduct_points_from_ledger, InsufficientPointsError
+        try:
+            deduct_points_from_ledger(
+                db=db,
+                customer_id=customer.id,
+                points=points_needed,
+                reward_type_applied=offer.reward_type,
+                rule_id=offer.id,
+                business_id=business_id
+            )
+        except InsufficientPointsError:
+            db.rollback()
             raise HTTPException(status_code=400, detail="Insufficient points")
-    
-    # Deduct points if reward type is POINTS
-    if offer.reward_type == "POINTS":
-        # Use ledger system (negative points for redemption)
-        from app.routers.rewards.points_ledger_service import add_points_to_ledger
-        add_points_to_ledger(
-            db=db,
-            customer_id=customer.id,
-            points_earned=-points_needed,
-            reward_type_applied=offer.reward_type,
-            rule_id=offer.id
-        )
         
-        # Also keep old PointsHistory for backward compatibility
-        history = PointsHistory(
-            customer_id=customer.id,
-            business_id=business_id,
-            points=-points_needed,
-            reason="redeem",
-        )
-        db.add(history)
+        # Also keep old PointsHistory for backward compatibility (written after commit)
+        write_behind(db, PointsHistory, [{
+            "id": _uuid.uuid4(),
+            "customer_id": customer.id,
+            "business_id": business_id,
+            "points": -points_needed,
+            "reason": "redeem",
+            "created_at": datetime.utcnow(),
+        }])
     redemption = Redemption(
         customer_id=customer.id,
         offer_id=offer.id,
@@ -296,25 +269,10 @@ def redeem_offer(
         redemption_code=_generate_redemption_code(),
     )
     db.add(redemption)
+    record_event(db, business_id, offers_redeemed=1, points_redeemed=points_needed)
 
-    # Send redemption confirmation email
+    # Redemption confirmation email, sent by the delivery worker after commit
     if customer.email:
-        try:
-            from app.routers.notifications.email_service import email_service
-            email_service.send_redemption_confirmation_email(
-                customer_name=customer.name or "Customer",
-                customer_email=customer.email,
-                offer_name=offer.name or offer.title or "Offer",
-                reward_type=offer.reward_type,
-                reward_value=str(offer.reward_value),
-                redemption_code=redemption.redemption_code
-            )
-        except Exception as e:
-            # Log error but don't fail redemption
-            import logging
-            logging.error(f"Error sending redemption email: {str(e)}")
-        
-        # Also queue notification for tracking
         queue_notification(
             db,
             customer_id=customer.id,
@@ -322,9 +280,13 @@ def redeem_offer(
             type="redeem",
             payload={
                 "email": customer.email,
-                "name": customer.name,
+                "name": customer.name or "Customer",
                 "offer_title": offer.name or offer.title,
+                "offer_name": offer.name or offer.title or "Offer",
+                "reward_type": offer.reward_type,
+                "reward_value": str(offer.reward_value),
                 "redemption_code": redemption.redemption_code,
+                "business_id": str(business_id),
             },
         )
 
@@ -343,6 +305,8 @@ def redeem_offer(
 
     db.commit()
     db.refresh(redemption)
+    from app.routers.notifications.delivery_service import wake_delivery_worker
+    wake_delivery_worker()
 
     return {
         "redemption_id": str(redemption.id),
@@ -0,0 +1,84 @@
+"""
+Per-business cache of active reward rules.
+
+Entries are stamped with the business's rule version. Every route that changes a
+business's offers calls invalidate_business_rules after committing, which bumps the
+version so the next lookup reloads from the database. Cached Offer rows are
+detached from their session and shared between requests: read them, never modify them.
+"""
+import logging
+from typing import List
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache, get_version_store
+from app.config import settings
+from app.routers.rewards.offers_models import Offer
+from app.routers.rewards.rule_engine import CompiledRuleSet
+
+logger = logging.getLogger(__name__)
+
+_rule_cache = TTLCache(
+    "business_rules",
+    maxsize=settings.RULE_CACHE_MAX_BUSINESSES,
+    ttl=settings.RULE_CACHE_TTL_SECONDS,
+)
+
+
+class BusinessRules:
+    """Active offers of one business, plus the same rules compiled for evaluation"""
+    def __init__(self, version: int, offers: List[Offer]):
+        self.version = version
+        self.offers = offers
+        self.compiled = CompiledRuleSet(offers)
+
+
+def _rule_version(key: str):
+    try:
+        return get_version_store().get(key)
+    except Exception as e:
+        # A shared store that is down only costs a reload
+        logger.warning(f"Rule cache version lookup failed: {str(e)}")
+        return None
+
+
+def get_business_rules(db: Session, business_id: UUID) -> BusinessRules:
+    key = str(business_id)
+    version = _rule_version(key)
+    entry = _rule_cache.get(key)
+    if entry is not None and version is not None and entry.version == version:
+        return entry
+
+    offers = db.query(Offer).filter(
+        Offer.business_id == business_id,
+        Offer.is_active == True
+    ).all()
+    # Keep the loaded attributes but disconnect the rows from this request's session
+    for offer in offers:
+        db.expunge(offer)
+
+    entry = BusinessRules(version, offers)
+    if version is not None:
+        _rule_cache.set(key, entry)
+    return entry
+
+
+def get_active_rules(db: Session, business_id: UUID) -> List[Offer]:
+    """Active offers for the business (read-only, shared)"""
+    return get_business_rules(db, business_id).offers
+
+
+def get_compiled_rules(db: Session, business_id: UUID) -> CompiledRuleSet:
+    """Active offers for the business compiled for apply/evaluate"""
+    return get_business_rules(db, business_id).compiled
+
+
+def invalidate_business_rules(business_id: UUID):
+    """Call after committing any change to the business's offers"""
+    key = str(business_id)
+    try:
+        get_version_store().bump(key)
+    except Exception as e:
+        logger.warning(f"Rule cache version bump failed: {str(e)}")
+    _rule_cache.delete(key)
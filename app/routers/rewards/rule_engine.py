@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime, date
 from decimal import Decimal
 from app.routers.rewards.offers_models import Offer
@@ -62,79 +62,201 @@ def rule_applies_to_transaction(rule: Offer, transaction: Transaction, customer:
     return True
 
 
+# Distinct descriptions remembered per rule set; POS exports reuse a small set of plan names
+MAX_MATCH_CACHE_ENTRIES = 4096
+
+REWARD_TYPES = ("POINTS", "DISCOUNT_PERCENT", "FREE_MONTHS")
+
+
+class CompiledRule:
+    """An Offer reduced to what evaluation needs, with its reward value parsed once"""
+    __slots__ = ("id", "name", "reward_type", "per_unit", "value", "discount_ratio",
+                 "wash", "customer_type", "start_date", "end_date")
+
+    def __init__(self, rule: Offer, value: float):
+        self.id = str(rule.id)
+        self.name = rule.name
+        self.reward_type = rule.reward_type
+        self.per_unit = rule.per_unit
+        self.value = value
+        self.discount_ratio = value / 100.0
+        self.wash = rule.wash_type.lower() if rule.wash_type else None
+        self.customer_type = rule.customer_type
+        self.start_date = rule.start_date
+        self.end_date = rule.end_date
+
+    def applies_to_customer(self, bucket: str) -> bool:
+        if self.customer_type == 'ANY':
+            return True
+        if bucket == 'MEMBER':
+            return self.customer_type != 'NON_MEMBER'
+        if bucket == 'NON_MEMBER':
+            return self.customer_type != 'MEMBER'
+        # No customer: only rules that require a specific type are skipped
+        return self.customer_type not in ['MEMBER', 'NON_MEMBER']
+
+
+class _RulesForDay:
+    """The rules in their date range on one day, bucketed by customer type, with their match memo"""
+    __slots__ = ("as_of", "buckets", "wash_tokens", "matches")
+
+    def __init__(self, as_of: date, buckets: Dict[str, Tuple[CompiledRule, ...]],
+                 wash_tokens: Dict[str, Tuple[str, ...]]):
+        self.as_of = as_of
+        self.buckets = buckets
+        self.wash_tokens = wash_tokens
+        self.matches: Dict[Tuple[str, Optional[str]], Tuple[CompiledRule, ...]] = {}
+
+
+class CompiledRuleSet:
+    """
+    A business's reward rules prepared for evaluating many transactions.
+    Rules are sorted by priority, parsed and lowercased once, and bucketed by customer
+    type; the rules matching a description's wash type are remembered per description.
+    Produces the same RewardResult as apply_reward_rules.
+
+    Cached rule sets are shared between threads. The day's buckets and memo are
+    built together and swapped in with one assignment, and each evaluation uses the
+    state it read, so a thread never mixes one day's buckets with another's memo.
+    """
+
+    def __init__(self, rules: Sequence[Offer]):
+        compiled = []
+        # Sort rules by priority (higher priority first)
+        for rule in sorted(rules, key=lambda r: r.priority, reverse=True):
+            if not rule.is_active or rule.reward_type not in REWARD_TYPES:
+                continue
+            try:
+                value = float(rule.reward_value)
+            except (ValueError, TypeError):
+                continue
+            compiled.append(CompiledRule(rule, value))
+        self.rules = compiled
+        self._day: Optional[_RulesForDay] = None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _select(self, today: date) -> _RulesForDay:
+        """Bucket the rules that are in their date range today by customer type"""
+        current = [
+            rule for rule in self.rules
+            if not (rule.start_date and today < rule.start_date)
+            and not (rule.end_date and today > rule.end_date)
+        ]
+        buckets = {}
+        wash_tokens = {}
+        for bucket in ('MEMBER', 'NON_MEMBER', 'NONE'):
+            buckets[bucket] = tuple(rule for rule in current if rule.applies_to_customer(bucket))
+            wash_tokens[bucket] = tuple({rule.wash for rule in buckets[bucket] if rule.wash})
+        return _RulesForDay(today, buckets, wash_tokens)
+
+    def _refresh(self) -> _RulesForDay:
+        day = self._day
+        today = date.today()
+        if day is None or day.as_of != today:
+            # Threads that race here build equal states; the last assignment wins
+            day = self._day = self._select(today)
+        return day
+
+    def _matching_rules(self, day: _RulesForDay, bucket: str, description: Optional[str]) -> Tuple[CompiledRule, ...]:
+        key = (bucket, description)
+        rules = day.matches.get(key)
+        if rules is not None:
+            return rules
+
+        rules = day.buckets[bucket]
+        # A rule's wash type must appear in the description; rules are not
+        # filtered when the transaction has no description
+        if description and day.wash_tokens[bucket]:
+            desc_lower = description.lower()
+            matched = {token for token in day.wash_tokens[bucket] if token in desc_lower}
+            rules = tuple(rule for rule in rules if not rule.wash or rule.wash in matched)
+        if len(day.matches) < MAX_MATCH_CACHE_ENTRIES:
+            day.matches[key] = rules
+        return rules
+
+    def _evaluate(self, day: _RulesForDay, transaction: Transaction, customer: Customer = None) -> RewardResult:
+        if customer is None:
+            bucket = 'NONE'
+        elif customer.membership_id is not None and customer.membership_id != '':
+            bucket = 'MEMBER'
+        else:
+            bucket = 'NON_MEMBER'
+
+        result = RewardResult()
+        amount = None
+        for rule in self._matching_rules(day, bucket, transaction.description):
+            # Apply rule based on reward type
+            if rule.reward_type == "POINTS":
+                if rule.per_unit == "PER_TRANSACTION" or rule.per_unit == "PER_VISIT":
+                    points = int(rule.value)
+                elif rule.per_unit == "PER_DOLLAR":
+                    if amount is None:
+                        amount = float(transaction.amount)
+                    points = int(amount * rule.value)
+                else:
+                    points = 0
+
+                if points > 0:
+                    result.points_earned += points
+                    result.applied_rule_ids.append(rule.id)
+                    result.applied_rules.append({
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "reward_type": "POINTS",
+                        "points": points
+                    })
+
+            elif rule.reward_type == "DISCOUNT_PERCENT":
+                # reward_value is percentage (e.g., 20 for 20%)
+                if amount is None:
+                    amount = float(transaction.amount)
+                discount = round(amount * rule.discount_ratio, 2)
+                if discount > 0:
+                    result.discount_amount += Decimal(str(discount))
+                    result.applied_rule_ids.append(rule.id)
+                    result.applied_rules.append({
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "reward_type": "DISCOUNT_PERCENT",
+                        "discount": discount
+                    })
+
+            else:  # FREE_MONTHS
+                months = int(rule.value)
+                if months > 0:
+                    result.free_months += months
+                    result.applied_rule_ids.append(rule.id)
+                    result.applied_rules.append({
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "reward_type": "FREE_MONTHS",
+                        "months": months
+                    })
+
+        return result
+
+    def evaluate(self, transaction: Transaction, customer: Customer = None) -> RewardResult:
+        """Apply the rules to a single transaction"""
+        return self._evaluate(self._refresh(), transaction, customer)
+
+    def evaluate_many(
+        self,
+        transactions: Sequence[Transaction],
+        customers: Optional[Sequence[Optional[Customer]]] = None
+    ) -> List[RewardResult]:
+        """Apply the rules to each transaction; customers[i] belongs to transactions[i]"""
+        day = self._refresh()
+        if customers is None:
+            return [self._evaluate(day, transaction) for transaction in transactions]
+        return [self._evaluate(day, transaction, customer) for transaction, customer in zip(transactions, customers)]
+
+
 def apply_reward_rules(transaction: Transaction, rules: List[Offer], customer: Customer = None) -> RewardResult:
     """
     Apply reward rules to a transaction and return the result.
     Rules are processed in priority order (higher priority first).
+    Callers evaluating many transactions should build a CompiledRuleSet once instead.
     """
-    result = RewardResult()
-    
-    # Sort rules by priority (higher priority first)
-    sorted_rules = sorted(rules, key=lambda r: r.priority, reverse=True)
-    
-    for rule in sorted_rules:
-        # Check if rule applies to this transaction
-        if not rule_applies_to_transaction(rule, transaction, customer):
-            continue
-        
-        # Check max uses per customer if specified
-        if rule.max_uses_per_customer and customer:
-            # TODO: Implement usage tracking per customer per rule
-            # For now, we'll skip this check
-            pass
-        
-        try:
-            reward_value = float(rule.reward_value)
-        except (ValueError, TypeError):
-            continue
-        
-        # Apply rule based on reward type
-        if rule.reward_type == "POINTS":
-            if rule.per_unit == "PER_TRANSACTION":
-                points = int(reward_value)
-            elif rule.per_unit == "PER_DOLLAR":
-                points = int(float(transaction.amount) * reward_value)
-            elif rule.per_unit == "PER_VISIT":
-                points = int(reward_value)  # Same as per transaction for now
-            else:
-                points = 0
-            
-            points = round(points)  # Round to whole points
-            if points > 0:
-                result.points_earned += points
-                result.applied_rule_ids.append(str(rule.id))
-                result.applied_rules.append({
-                    "rule_id": str(rule.id),
-                    "rule_name": rule.name,
-                    "reward_type": "POINTS",
-                    "points": points
-                })
-        
-        elif rule.reward_type == "DISCOUNT_PERCENT":
-            # reward_value is percentage (e.g., 20 for 20%)
-            discount = float(transaction.amount) * (reward_value / 100.0)
-            discount = round(discount, 2)
-            if discount > 0:
-                result.discount_amount += Decimal(str(discount))
-                result.applied_rule_ids.append(str(rule.id))
-                result.applied_rules.append({
-                    "rule_id": str(rule.id),
-                    "rule_name": rule.name,
-                    "reward_type": "DISCOUNT_PERCENT",
-                    "discount": discount
-                })
-        
-        elif rule.reward_type == "FREE_MONTHS":
-            months = int(reward_value)
-            if months > 0:
-                result.free_months += months
-                result.applied_rule_ids.append(str(rule.id))
-                result.applied_rules.append({
-                    "rule_id": str(rule.id),
-                    "rule_name": rule.name,
-                    "reward_type": "FREE_MONTHS",
-                    "months": months
-                })
-    
-    return result
-
+    return CompiledRuleSet(rules).evaluate(transaction, customer)
@@ -6,10 +6,11 @@ from typing import List, Optional
 from datetime import datetime, date as date_type
 from pydantic import BaseModel
 
-from app.database import SessionLocal
-from app.dependencies import get_current_business
+from app.dependencies import get_current_business, get_db
 from app.routers.rewards.offers_models import Offer
 from app.routers.rewards.offers_schemas import OfferResponse
+from app.routers.rewards.rule_cache import get_compiled_rules, invalidate_business_rules
+from app.routers.customers.visit_stats_service import get_visit_count
 from app.routers.transactions.transaction_models import Transaction
 from app.routers.customers.cust_models import Customer
 
@@ -27,14 +28,6 @@ def test_endpoint(current: dict = Depends(get_current_business)):
     }
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/rules", response_model=List[OfferResponse])
 def list_rules(
     active_only: bool = False,
@@ -95,6 +88,7 @@ def toggle_rule(
     rule.is_active = not rule.is_active
     db.commit()
     db.refresh(rule)
+    invalidate_business_rules(business_id)
     
     return {"id": str(rule.id), "is_active": rule.is_active}
 
@@ -119,6 +113,7 @@ def delete_rule(
     
     db.delete(rule)
     db.commit()
+    invalidate_business_rules(business_id)
     
     return {"message": "Rule deleted successfully"}
 
@@ -130,7 +125,6 @@ def test_rule_application(
     current: dict = Depends(get_current_business),
 ):
     """Test which rules would apply to a specific transaction"""
-    from app.routers.rewards.rule_engine import apply_reward_rules
     
     business_id = current["business"].id
     trans_uuid = UUID(transaction_id)
@@ -149,14 +143,8 @@ def test_rule_application(
         Customer.phone == transaction.phone_number
     ).first()
     
-    # Get all active rules
-    rules = db.query(Offer).filter(
-        Offer.business_id == business_id,
-        Offer.is_active == True
-    ).all()
-    
-    # Apply rules
-    result = apply_reward_rules(transaction, rules, customer)
+    # Apply the business's active rules (cached)
+    result = get_compiled_rules(db, business_id).evaluate(transaction, customer)
     
     return {
         "transaction_id": str(transaction.id),
@@ -264,6 +252,8 @@ def initialize_fixed_rules(
         created_rules.append("Non-member rule")
     
     db.commit()
+    if created_rules:
+        invalidate_business_rules(business_id)
     
     # Refresh to get the created rules with IDs
     if 'Member rule' in created_rules:
@@ -417,6 +407,8 @@ def check_customer_eligibility(
     
     eligible_rules = []
     visit_count = 0
+    # Customer visits (approved transactions)
+    customer_visit_count = get_visit_count(db, business_id, customer.phone)
     
     for rule in rules:
         # Check if rule applies to this customer type
@@ -434,12 +426,7 @@ def check_customer_eligibility(
         )
         
         if is_member_rule and customer_type == 'MEMBER':
-            # Count customer visits (approved transactions)
-            visit_count = db.query(func.count(Transaction.id)).filter(
-                Transaction.business_id == business_id,
-                Transaction.phone_number == customer.phone,
-                Transaction.is_approved == True
-            ).scalar() or 0
+            visit_count = customer_visit_count
             
             eligible_rules.append({
                 "rule_id": str(rule.id),
@@ -452,12 +439,7 @@ def check_customer_eligibility(
                 "visit_count": visit_count
             })
         elif is_non_member_rule and customer_type == 'NON_MEMBER':
-            # Count customer visits (approved transactions)
-            visit_count = db.query(func.count(Transaction.id)).filter(
-                Transaction.business_id == business_id,
-                Transaction.phone_number == customer.phone,
-                Transaction.is_approved == True
-            ).scalar() or 0
+            visit_count = customer_visit_count
             
             eligible_rules.append({
                 "rule_id": str(rule.id),
@@ -533,11 +515,7 @@ def apply_rule_reward(
     
     elif rule.reward_type == 'FREE_WASH' or (rule.customer_type == 'NON_MEMBER' and rule.reward_type != 'POINTS'):
         # For non-member rule (5th wash), check if it's actually the 5th visit
-        visit_count = db.query(func.count(Transaction.id)).filter(
-            Transaction.business_id == business_id,
-            Transaction.phone_number == customer.phone,
-            Transaction.is_approved == True
-        ).scalar() or 0
+        visit_count = get_visit_count(db, business_id, customer.phone)
         
         # Check if this is for 5th wash rule
         is_5th_wash_rule = (
@@ -561,7 +539,8 @@ def apply_rule_reward(
                 customer_id=customer.id,
                 points_earned=points,
                 reward_type_applied="POINTS",
-                rule_id=rule.id
+                rule_id=rule.id,
+                business_id=business_id
             )
             db.commit()
             
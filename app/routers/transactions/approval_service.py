@@ -0,0 +1,259 @@
+"""
+Set-based approval of uploaded transactions.
+
+Customers and approved-visit counts (from customer_visit_stats) for the whole batch
+are loaded with one query each, wash sequences are assigned in memory, and
+transactions and ledger entries are written with executemany instead of per-row
+round trips; PointsHistory rows and notifications go through the write-behind
+buffer. The batch's daily KPI rollup is one upsert.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Sequence, Union
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session
+
+from app.routers.businesses.daily_stats_service import record_approved_transactions
+from app.routers.customers.cust_models import Customer
+from app.routers.customers.dashboard_service import invalidate_customer_dashboards
+from app.routers.customers.visit_stats_models import CustomerVisitStats
+from app.routers.customers.visit_stats_service import record_visits
+from app.routers.notifications.notification_service import queue_notification
+from app.routers.rewards.offers_models import Offer
+from app.routers.rewards.points_ledger_service import add_points_to_ledger_bulk
+from app.routers.rewards.points_models import PointsHistory
+from app.routers.rewards.redeemable_offer_service import (
+    check_and_create_redeemable_offer,
+    get_customer_redeemable_offers,
+    mark_offer_as_redeemed,
+)
+from app.routers.rewards.rule_engine import CompiledRuleSet
+from app.routers.transactions.transaction_models import Transaction
+from app.routers.transactions.transaction_schemas import TransactionCreate
+from app.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists well below driver/SQLite bound-parameter limits
+IN_CLAUSE_BATCH_SIZE = 1000
+
+
+def batched(items: Iterable, size: int = IN_CLAUSE_BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_customers_by_phone(db: Session, business_id: UUID, phones: Iterable[str]) -> Dict[str, Customer]:
+    """Load the business's customers for the given phones, keyed by phone"""
+    customers = {}
+    for batch in batched(set(phones)):
+        for customer in db.query(Customer).filter(
+            Customer.business_id == business_id,
+            Customer.phone.in_(batch)
+        ):
+            customers.setdefault(customer.phone, customer)
+    return customers
+
+
+def count_approved_by_phone(db: Session, business_id: UUID, phones: Iterable[str]) -> Dict[str, int]:
+    """Approved visit counts per phone, read from customer_visit_stats in batches"""
+    counts = defaultdict(int)
+    for batch in batched(set(phones)):
+        rows = db.query(CustomerVisitStats.phone_number, CustomerVisitStats.visit_count).filter(
+            CustomerVisitStats.business_id == business_id,
+            CustomerVisitStats.phone_number.in_(batch)
+        ).all()
+        for phone, count in rows:
+            counts[phone] = count
+    return counts
+
+
+def _redeem_fifth_visit_offer(db: Session, customer: Customer, transaction_id: UUID, business_id: UUID):
+    """Mark the customer's most recent unredeemed offer as redeemed by this transaction"""
+    redeemable_offers = get_customer_redeemable_offers(db, customer.id, business_id, include_redeemed=False)
+    if not redeemable_offers:
+        return
+    offer_to_redeem = redeemable_offers[0]
+    try:
+        mark_offer_as_redeemed(db, offer_to_redeem.id, transaction_id)
+
+        # Redemption confirmation email, sent by the delivery worker after commit
+        if customer.email:
+            queue_notification(
+                db,
+                customer_id=customer.id,
+                channel="email",
+                type="redeem",
+                payload={
+                    "email": customer.email,
+                    "name": customer.name or "Customer",
+                    "offer_name": f"{offer_to_redeem.customer_type} - {offer_to_redeem.reward_type}",
+                    "reward_type": offer_to_redeem.reward_type,
+                    "reward_value": offer_to_redeem.reward_value,
+                    "redemption_code": None,  # No code for automatic redemption
+                    "business_id": str(business_id),
+                },
+            )
+    except Exception as e:
+        # Log error but don't fail transaction
+        logger.error(f"Error marking offer as redeemed: {e}")
+
+
+def approve_transaction_batch(
+    db: Session,
+    business_id: UUID,
+    transactions: List[TransactionCreate],
+    reward_rules: Union[CompiledRuleSet, Sequence[Offer]],
+) -> List[dict]:
+    """
+    Approve a batch of transactions for a business.
+    Behaves like approving the rows one at a time in order (several rows for the
+    same phone get consecutive sequences) but issues a fixed number of queries,
+    plus a few for each 4th/5th visit's offer.
+    reward_rules may be a CompiledRuleSet so long imports compile the rules once.
+    The caller commits.
+    """
+    if not transactions:
+        return []
+
+    if not isinstance(reward_rules, CompiledRuleSet):
+        reward_rules = CompiledRuleSet(reward_rules)
+
+    phones = [t.phone_number for t in transactions]
+    customers = load_customers_by_phone(db, business_id, phones)
+    counts = count_approved_by_phone(db, business_id, phones)
+
+    now = datetime.utcnow()
+    new_customers = []
+    transaction_rows = []
+    milestones = []  # (row, customer, sequence, is_member, is_redemption) for 4th/5th visits
+    ledger_entries = []
+    history_rows = []
+
+    for trans_data in transactions:
+        # Get or create customer first (needed for sequence calculation)
+        customer = customers.get(trans_data.phone_number)
+        if not customer:
+            # Create customer with membership_id if provided in transaction
+            customer = Customer(
+                id=uuid4(),
+                business_id=business_id,
+                phone=trans_data.phone_number,
+                membership_id=trans_data.membership_id if trans_data.membership_id else None,
+            )
+            customers[trans_data.phone_number] = customer
+            new_customers.append(customer)
+        elif trans_data.membership_id and not customer.membership_id:
+            # Update existing customer with membership_id if not already set
+            customer.membership_id = trans_data.membership_id
+
+        # Sequence = approved transactions before this one + 1, including earlier rows of this batch
+        transaction_sequence = counts[trans_data.phone_number] + 1
+        counts[trans_data.phone_number] = transaction_sequence
+
+        # Check if this is 5th transaction and if discount/0 amount indicates redemption
+        is_member = customer.membership_id is not None and customer.membership_id != ''
+        is_redemption = False
+        if transaction_sequence == 5:
+            # Check if discount_amount > 0 (member) or amount == 0 (non-member) indicates redemption
+            if is_member and trans_data.discount_amount > 0:
+                is_redemption = True
+            elif not is_member and trans_data.amount == 0:
+                is_redemption = True
+
+        row = {
+            "id": uuid4(),
+            "business_id": business_id,
+            "phone_number": trans_data.phone_number,
+            "customer_code": trans_data.customer_code,
+            "license_plate": trans_data.license_plate,
+            "date": trans_data.date,
+            "description": trans_data.description,
+            "quantity": trans_data.quantity,
+            "amount": trans_data.amount,
+            "discount_amount": trans_data.discount_amount,
+            "transaction_sequence": transaction_sequence,
+            "is_approved": True,
+            "created_at": now,
+            "approved_at": now,
+        }
+        transaction_rows.append(row)
+
+        if transaction_sequence in (4, 5):
+            milestones.append((row, customer, transaction_sequence, is_member, is_redemption))
+
+        # Apply reward rules using the rule engine
+        reward_result = reward_rules.evaluate(trans_data, customer)
+        if reward_result.points_earned > 0:
+            # Use the first rule ID if available
+            rule_id = None
+            if reward_result.applied_rule_ids:
+                try:
+                    rule_id = UUID(reward_result.applied_rule_ids[0])
+                except ValueError:
+                    pass
+
+            ledger_entries.append({
+                "customer_id": customer.id,
+                "business_id": business_id,
+                "points_earned": reward_result.points_earned,
+                "reward_type_applied": "POINTS",
+                "transaction_id": row["id"],
+                "rule_id": rule_id,
+            })
+            # Also keep old PointsHistory for backward compatibility
+            history_rows.append({
+                "id": uuid4(),
+                "customer_id": customer.id,
+                "business_id": business_id,
+                "points": reward_result.points_earned,
+                "reason": "transaction",
+                "created_at": now,
+            })
+
+    # New customers and membership updates go out in one flush
+    db.add_all(new_customers)
+    db.flush()
+
+    # Core insert: the ORM bulk path leaves out None values, splitting the executemany
+    # into one statement per run of rows with the same blank columns
+    db.execute(Transaction.__table__.insert(), transaction_rows)
+    record_visits(db, business_id, transaction_rows)
+
+    # 4th/5th visit offers are rare; handle them in batch order so an offer created
+    # by a 4th visit can be redeemed by a 5th visit later in the same upload
+    for row, customer, transaction_sequence, is_member, is_redemption in milestones:
+        if transaction_sequence == 5 and is_redemption:
+            _redeem_fifth_visit_offer(db, customer, row["id"], business_id)
+        elif transaction_sequence == 4:
+            try:
+                check_and_create_redeemable_offer(
+                    db, customer, Transaction(**row), business_id,
+                    transaction_count=4,
+                    customer_type='MEMBER' if is_member else 'NON_MEMBER'
+                )
+            except Exception as e:
+                # Log error but don't fail transaction
+                logger.error(f"Error creating redeemable offer: {e}")
+
+    add_points_to_ledger_bulk(db, ledger_entries)
+    # Legacy history rows are written after commit, off the hot transaction
+    write_behind(db, PointsHistory, history_rows)
+
+    record_approved_transactions(
+        db, business_id, transaction_rows,
+        new_customers=len(new_customers),
+        points_issued=sum(row["points"] for row in history_rows),
+    )
+    # New visits change the history and counts even when no points were earned
+    invalidate_customer_dashboards(db, {customers[t.phone_number].id for t in transactions})
+
+    return transaction_rows
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.database import Base
+
+
+class ImportJob(Base):
+    """A transaction file being parsed and approved in the background"""
+    __tablename__ = "import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)  # Stored upload, kept until the job finishes
+    status = Column(String, default="queued")  # queued | running | completed | failed
+    claim_token = Column(UUID(as_uuid=True), nullable=True)  # Set by each claim; progress writes must match it
+    chunk_size = Column(Integer, nullable=False)  # Rows per commit; fixed so a resumed job sees the same chunks
+    rows_processed = Column(Integer, default=0)  # Source rows committed so far (approved + rejected)
+    rows_approved = Column(Integer, default=0)
+    rows_rejected = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # Heartbeat, bumped on every claim and chunk commit
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,179 @@
+"""
+Background import jobs for large transaction files.
+
+The upload is stored on disk and a worker thread parses it chunk by chunk, approving
+each chunk through the same path as POST /transactions/approve. Every chunk is
+committed together with the job's progress counters, so a job interrupted by a
+crash or restart resumes after the last committed chunk without double-approving.
+Progress writes are fenced by the worker's claim (app.background_jobs): if a slow
+chunk lets another worker take the job over, the first worker's chunk is rolled
+back and it stops.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.background_jobs import JobReclaimed, claim_job, resume_jobs, update_job
+from app.config import settings
+from app.database import SessionLocal
+from app.routers.notifications.delivery_service import wake_delivery_worker
+from app.routers.rewards.rule_cache import get_compiled_rules
+from app.routers.rewards.rule_engine import CompiledRuleSet
+from app.routers.transactions.approval_service import approve_transaction_batch
+from app.routers.transactions.import_job_models import ImportJob
+from app.routers.transactions.transaction_parser import iter_transaction_chunks
+from app.routers.transactions.transaction_schemas import TransactionCreate
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=settings.IMPORT_WORKERS, thread_name_prefix="transaction-import")
+
+
+def create_import_job(db: Session, business_id: UUID, filename: str, contents: bytes) -> ImportJob:
+    """Store the upload and create a queued job for it. The caller commits."""
+    os.makedirs(settings.IMPORT_UPLOAD_DIR, exist_ok=True)
+    job_id = uuid4()
+    extension = os.path.splitext(filename)[1].lower()
+    file_path = os.path.join(settings.IMPORT_UPLOAD_DIR, f"{job_id}{extension}")
+    with open(file_path, "wb") as f:
+        f.write(contents)
+
+    job = ImportJob(
+        id=job_id,
+        business_id=business_id,
+        filename=filename,
+        file_path=file_path,
+        status="queued",
+        chunk_size=settings.IMPORT_CHUNK_SIZE,
+    )
+    db.add(job)
+    return job
+
+
+def claim_import_job(db: Session, job_id: UUID) -> Optional[UUID]:
+    """
+    Atomically take ownership of a queued job, or of a running job whose worker
+    stopped reporting progress. Returns the claim token, or None if another
+    worker owns it.
+    """
+    return claim_job(db, ImportJob, job_id, settings.IMPORT_STALE_SECONDS)
+
+
+def _approve_chunk(db: Session, business_id: UUID, rows: list, reward_rules: CompiledRuleSet) -> int:
+    """Approve one parsed chunk; returns the number of rows that failed validation"""
+    transactions = []
+    invalid = 0
+    for row in rows:
+        try:
+            transactions.append(TransactionCreate(**row))
+        except ValidationError:
+            invalid += 1
+    approve_transaction_batch(db, business_id, transactions, reward_rules)
+    return invalid
+
+
+def run_import_job(job_id: UUID):
+    """Worker entry point: process a job from its last committed chunk to the end"""
+    db = SessionLocal()
+    try:
+        claim = claim_import_job(db, job_id)
+        if claim is None:
+            return
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        business_id, file_path, filename, chunk_size = job.business_id, job.file_path, job.filename, job.chunk_size
+        processed, approved, rejected = job.rows_processed or 0, job.rows_approved or 0, job.rows_rejected or 0
+
+        try:
+            with open(file_path, "rb") as f:
+                contents = f.read()
+
+            # Same cached, compiled rules the approve endpoint uses
+            reward_rules = get_compiled_rules(db, business_id)
+
+            for chunk in iter_transaction_chunks(contents, filename, chunk_size):
+                source_rows = len(chunk.rows) + chunk.rejected
+                if chunk.start_row + source_rows <= processed:
+                    continue  # Already committed before a restart
+
+                invalid = _approve_chunk(db, business_id, chunk.rows, reward_rules)
+                progress = {
+                    "rows_processed": chunk.start_row + source_rows,
+                    "rows_approved": approved + len(chunk.rows) - invalid,
+                    "rows_rejected": rejected + chunk.rejected + invalid,
+                }
+                # Transactions and progress land in the same commit, and only if
+                # this worker still owns the job at the progress it started from
+                update_job(db, ImportJob, job_id, claim, progress, expected={"rows_processed": processed})
+                db.commit()
+                processed, approved, rejected = progress["rows_processed"], progress["rows_approved"], progress["rows_rejected"]
+                wake_delivery_worker(["email"])
+
+            finished_at = datetime.utcnow()
+            update_job(db, ImportJob, job_id, claim, {"status": "completed", "finished_at": finished_at},
+                       expected={"rows_processed": processed})
+            db.commit()
+        except JobReclaimed:
+            db.rollback()
+            logger.warning(f"Import job {job_id} was taken over by another worker; stopping without committing")
+            return
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Import job {job_id} failed: {str(e)}")
+            try:
+                update_job(db, ImportJob, job_id, claim,
+                           {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()})
+                db.commit()
+            except JobReclaimed:
+                db.rollback()
+            return
+
+        # Failed jobs keep their upload so the file can be inspected
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning(f"Could not remove import file {file_path}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error running import job {job_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def submit_import_job(job_id: UUID):
+    _executor.submit(run_import_job, job_id)
+
+
+def resume_import_jobs():
+    """Requeue jobs left queued or running by a previous process (called on startup)"""
+    resumed = resume_jobs(ImportJob, settings.IMPORT_STALE_SECONDS, submit_import_job)
+    if resumed:
+        logger.info(f"Resuming {resumed} transaction import job(s)")
+
+
+def import_job_status(job: ImportJob) -> dict:
+    """Job progress as returned by GET /transactions/imports/{id}"""
+    rows_per_second: Optional[float] = None
+    if job.started_at:
+        end = job.finished_at or datetime.utcnow()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round((job.rows_processed or 0) / elapsed, 1)
+
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_processed": job.rows_processed or 0,
+        "rows_approved": job.rows_approved or 0,
+        "rows_rejected": job.rows_rejected or 0,
+        "rows_per_second": rows_per_second,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
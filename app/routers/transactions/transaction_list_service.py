@@ -0,0 +1,282 @@
+"""
+Listing and export of a business's approved transactions.
+
+Rows are read newest first in keyset order on (date, id): a page continues
+strictly after the cursor of the previous one, so deep pages cost the same as
+the first and rows inserted meanwhile never shift a page. Customer details come
+from one outer join on (business_id, phone) and only when a customer field is
+requested; only the requested columns are selected. Exports stream the same
+rows as NDJSON or CSV in keyset batches instead of building one response.
+"""
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.routers.customers.cust_models import Customer
+from app.routers.transactions.transaction_models import Transaction
+
+# Rows fetched per round trip when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+
+def _text(value):
+    return str(value) if value is not None else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _money(value):
+    return float(value) if value else 0
+
+
+def _raw(value):
+    return value
+
+
+# Output field -> (selected column, formatter), in response order
+TRANSACTION_FIELDS: Dict[str, Tuple[Any, Callable]] = {
+    "id": (Transaction.id, _text),
+    "business_id": (Transaction.business_id, _text),
+    "phone_number": (Transaction.phone_number, _raw),
+    "customer_code": (Transaction.customer_code, _raw),
+    "license_plate": (Transaction.license_plate, _raw),
+    "date": (Transaction.date, _iso),
+    "description": (Transaction.description, _raw),
+    "quantity": (Transaction.quantity, _raw),
+    "amount": (Transaction.amount, _money),
+    "discount_amount": (Transaction.discount_amount, _money),
+    "transaction_sequence": (Transaction.transaction_sequence, _raw),
+    "is_approved": (Transaction.is_approved, _raw),
+    "created_at": (Transaction.created_at, _iso),
+    "approved_at": (Transaction.approved_at, _iso),
+    "customer_name": (Customer.name, _raw),
+    "customer_email": (Customer.email, _raw),
+    "customer_id": (Customer.id, _text),
+    "membership_id": (Customer.membership_id, _raw),
+}
+
+CUSTOMER_FIELDS = frozenset({"customer_name", "customer_email", "customer_id", "membership_id"})
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field names to return, in response order; all fields if empty"""
+    if not fields:
+        return list(TRANSACTION_FIELDS)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - TRANSACTION_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    if not requested:
+        return list(TRANSACTION_FIELDS)
+    return [name for name in TRANSACTION_FIELDS if name in requested]
+
+
+def encode_cursor(date: datetime, transaction_id) -> str:
+    raw = f"{date.isoformat()}|{transaction_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, transaction_id = raw.split("|")
+        return datetime.fromisoformat(date), UUID(transaction_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+class TransactionListing:
+    """An ordered, filtered and projected query over a business's approved transactions"""
+
+    def __init__(
+        self,
+        business_id: UUID,
+        fields: Sequence[str],
+        phone_number: Optional[str] = None,
+        license_plate: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ):
+        self.fields = list(fields)
+        # id and date are always selected (first) for the keyset cursor
+        columns = [Transaction.id, Transaction.date] + [TRANSACTION_FIELDS[name][0] for name in self.fields]
+        self._formatters = [(name, TRANSACTION_FIELDS[name][1], index + 2) for index, name in enumerate(self.fields)]
+
+        query = select(*columns).where(Transaction.business_id == business_id, Transaction.is_approved == True)
+        if CUSTOMER_FIELDS.intersection(self.fields):
+            query = query.outerjoin(Customer, and_(
+                Customer.business_id == Transaction.business_id,
+                Customer.phone == Transaction.phone_number,
+            ))
+        if phone_number:
+            query = query.where(Transaction.phone_number == phone_number)
+        if license_plate:
+            query = query.where(Transaction.license_plate == license_plate)
+        if start_date:
+            query = query.where(Transaction.date >= start_date)
+        if end_date:
+            query = query.where(Transaction.date < end_date)
+        self._query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+    def _after(self, cursor: Optional[Tuple[datetime, UUID]]):
+        if cursor is None:
+            return self._query
+        date, transaction_id = cursor
+        return self._query.where(or_(
+            Transaction.date < date,
+            and_(Transaction.date == date, Transaction.id < transaction_id),
+        ))
+
+    def _fetch(self, db: Session, cursor, limit: int) -> Tuple[List[dict], Optional[Tuple[datetime, UUID]], bool]:
+        """Up to limit rows after cursor, the cursor of the last row and whether more rows follow"""
+        rows = db.execute(self._after(cursor).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        result = []
+        last_id = cursor[1] if cursor else None
+        for row in rows:
+            # A phone shared by several customer records would repeat the transaction
+            if row[0] == last_id:
+                continue
+            last_id = row[0]
+            result.append({name: fmt(row[index]) for name, fmt, index in self._formatters})
+        last = (rows[-1][1], rows[-1][0]) if rows else cursor
+        return result, last, has_more
+
+    def page(self, db: Session, limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """One page of rows and the cursor for the next page (None on the last page)"""
+        rows, last, has_more = self._fetch(db, decode_cursor(cursor) if cursor else None, limit)
+        return rows, encode_cursor(*last) if has_more else None
+
+    def iter_rows(self, cursor: Optional[str] = None, session_factory=SessionLocal,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[dict]]:
+        """
+        Every row after cursor, in batches. Uses its own session so it can outlive
+        the request's (streamed responses are sent after dependencies are closed).
+        """
+        position = decode_cursor(cursor) if cursor else None
+        db = session_factory()
+        try:
+            while True:
+                rows, position, has_more = self._fetch(db, position, batch_size)
+                if rows:
+                    yield rows
+                if not has_more:
+                    break
+        finally:
+            db.close()
+
+    def iter_ndjson(self, cursor: Optional[str] = None) -> Iterator[str]:
+        for rows in self.iter_rows(cursor):
+            yield "".join(json.dumps(row) + "\n" for row in rows)
+
+    def iter_csv(self, cursor: Optional[str] = None) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fields)
+        writer.writeheader()
+        for rows in self.iter_rows(cursor):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+# Sort keys for the per phone/plate summary; all descending, spend first
+SUMMARY_SORTS = ("spend", "transactions", "quantity")
+
+
+def summarize_transactions(
+    db: Session,
+    business_id: UUID,
+    sort: str = "spend",
+    limit: int = 100,
+    offset: int = 0,
+    include_transactions: bool = False,
+) -> Tuple[List[dict], bool]:
+    """
+    Approved transactions grouped by phone number and license plate, totalled by
+    the database, and whether more groups follow this page. With
+    include_transactions, each group on the page also lists its transactions
+    (newest first), loaded with one query for the whole page.
+    """
+    if sort not in SUMMARY_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(SUMMARY_SORTS)}")
+
+    total_transactions = func.count(Transaction.id)
+    total_quantity = func.coalesce(func.sum(Transaction.quantity), 0)
+    total_amount = func.coalesce(func.sum(Transaction.amount), 0)
+    order = {"spend": total_amount, "transactions": total_transactions, "quantity": total_quantity}[sort]
+
+    groups = db.execute(
+        select(
+            Transaction.phone_number,
+            Transaction.license_plate,
+            total_transactions,
+            total_quantity,
+            total_amount,
+        )
+        .where(Transaction.business_id == business_id, Transaction.is_approved == True)
+        .group_by(Transaction.phone_number, Transaction.license_plate)
+        # Phone and plate break ties so pages are stable
+        .order_by(order.desc(), Transaction.phone_number, Transaction.license_plate)
+        # One extra group tells whether there is another page
+        .limit(limit + 1)
+        .offset(offset)
+    ).all()
+    has_more = len(groups) > limit
+
+    summary = {}
+    for phone_number, license_plate, count, quantity, amount in groups[:limit]:
+        summary[(phone_number, license_plate)] = {
+            "phone_number": phone_number,
+            "license_plate": license_plate,
+            "total_transactions": count,
+            "total_quantity": int(quantity),
+            "total_amount": float(amount),
+        }
+
+    if include_transactions and summary:
+        for group in summary.values():
+            group["transactions"] = []
+        phones = {phone_number for phone_number, _ in summary}
+        rows = db.execute(
+            select(
+                Transaction.phone_number,
+                Transaction.license_plate,
+                Transaction.id,
+                Transaction.date,
+                Transaction.description,
+                Transaction.quantity,
+                Transaction.amount,
+            )
+            .where(
+                Transaction.business_id == business_id,
+                Transaction.is_approved == True,
+                Transaction.phone_number.in_(phones),
+            )
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+        ).all()
+        for phone_number, license_plate, transaction_id, date, description, quantity, amount in rows:
+            group = summary.get((phone_number, license_plate))
+            if group is not None:
+                group["transactions"].append({
+                    "id": str(transaction_id),
+                    "date": date,
+                    "description": description,
+                    "quantity": quantity,
+                    "amount": float(amount),
+                })
+
+    return list(summary.values()), has_more
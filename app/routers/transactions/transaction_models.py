@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Numeric, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Numeric, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -22,3 +22,11 @@ class Transaction(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     approved_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Per-customer visit counts and history; id is included so counts can be index-only on Postgres
+        Index("ix_transactions_business_phone_approved", "business_id", "phone_number", "is_approved",
+              postgresql_include=["id"]),
+        # Business transaction lists, newest first; id makes (date, id) keyset pages index-ordered
+        Index("ix_transactions_business_approved_date_id", "business_id", "is_approved", "date", "id"),
+    )
+
@@ -0,0 +1,325 @@
+"""
+Vectorized parser for POS transaction exports (Excel/CSV).
+
+Column detection runs once per file and every field is normalized with pandas
+column operations, so the cost per row is a handful of C-level string ops
+instead of a Python loop over every column.
+"""
+import logging
+import warnings
+from datetime import datetime
+from io import BytesIO
+from typing import Iterator, List, Dict, Any, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CHUNK_SIZE = 50000
+MAX_DATE_FORMAT_PASSES = 5
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+# Map common Excel column names to our expected column names.
+# When several source columns map to the same field, the first one present wins.
+COLUMN_MAPPING = {
+    # Date columns
+    'created': 'date',
+    'paid': 'date',
+    'modified': 'date',
+    'sale date': 'date',
+    'transaction date': 'date',
+    'date': 'date',
+    # Customer code (separate from phone number)
+    'customer': 'customer_code',
+    'customer code': 'customer_code',
+    'customer id': 'customer_code',
+    # Phone number columns - "Customer Phone" is the key one!
+    'customer phone': 'phone_number',
+    'phone': 'phone_number',
+    'phone number': 'phone_number',
+    'phone_number': 'phone_number',
+    'phone no': 'phone_number',
+    'mobile': 'phone_number',
+    'mobile number': 'phone_number',
+    'tel': 'phone_number',
+    'telephone': 'phone_number',
+    # License plate columns
+    'license': 'license_plate',
+    'license plate': 'license_plate',
+    'license_plate': 'license_plate',
+    'plate': 'license_plate',
+    'vehicle': 'license_plate',
+    # Description columns
+    'pass plan': 'description',
+    'description': 'description',
+    'notes': 'description',
+    'comments': 'description',
+    # Amount columns
+    'total': 'amount',
+    'total $': 'amount',
+    'amount': 'amount',
+    'price': 'amount',
+    'sales dollar': 'amount',
+    'upsell dol': 'amount',
+}
+
+CUSTOMER_CODE_CANDIDATES = ['customer', 'customer code', 'customer id']
+PHONE_CANDIDATES = ['customer phone', 'phone', 'phone number', 'phone no', 'mobile', 'mobile number', 'tel', 'telephone']
+DESCRIPTION_CANDIDATES = ['description', 'pass plan', 'notes', 'comments']
+AMOUNT_CANDIDATES = ['amount', 'total', 'total $', 'sales dollar', 'upsell dol']
+
+
+class ParsedChunk:
+    """A slice of parsed preview rows plus the number of rows that could not be parsed"""
+    def __init__(self, rows: List[Dict[str, Any]], rejected: int = 0, start_row: int = 0):
+        self.rows = rows
+        self.rejected = rejected
+        self.start_row = start_row  # Offset of the first source row in this chunk
+
+
+class ColumnPlan:
+    """Source columns for each preview field, resolved once from the file header"""
+
+    def __init__(self, columns: List[str]):
+        present = set(columns)
+
+        def first_mapped(field: str) -> Optional[str]:
+            # A column already named like the field is kept as-is (mirrors the mapping rule)
+            if field in present:
+                return field
+            for source, target in COLUMN_MAPPING.items():
+                if target == field and source in present:
+                    return source
+            return None
+
+        def ordered(*names) -> List[str]:
+            result = []
+            for name in names:
+                if name and name in present and name not in result:
+                    result.append(name)
+            return result
+
+        self.date = first_mapped('date')
+        self.license_plate = first_mapped('license_plate')
+        self.customer_code = ordered(first_mapped('customer_code'), *CUSTOMER_CODE_CANDIDATES)
+        self.description = ordered(first_mapped('description'), *DESCRIPTION_CANDIDATES)
+        self.amount = ordered(first_mapped('amount'), *AMOUNT_CANDIDATES)
+        self.quantity = 'quantity' if 'quantity' in present else None
+        self.discount_amount = 'discount_amount' if 'discount_amount' in present else None
+        self.membership_id = 'membership_id' if 'membership_id' in present else None
+
+        # Phone: explicit phone columns first, then any phone-like column name
+        # (excluding customer code columns), then a digit scan of the remaining columns.
+        self.phone = ordered(first_mapped('phone_number'), *PHONE_CANDIDATES)
+        for col in columns:
+            col_lower = col.lower()
+            if any(cc in col_lower for cc in ['customer', 'code', 'id']):
+                continue
+            if any(keyword in col_lower for keyword in ['phone', 'mobile', 'tel', 'contact']) and col not in self.phone:
+                self.phone.append(col)
+
+        claimed = set(self.customer_code) | set(self.description) | set(self.amount) | set(self.phone)
+        claimed.update(c for c in (self.date, self.license_plate, self.quantity, self.discount_amount, self.membership_id) if c)
+        self.phone_scan = [col for col in columns if col not in claimed]
+
+
+def is_supported_transaction_file(filename: str) -> bool:
+    return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """Stringify, strip and blank out empty/'nan' cells (NaN stays NaN)"""
+    if not pd.api.types.is_string_dtype(series):
+        series = series.map(str, na_action='ignore')
+    text = series.str.strip()
+    return text.where(text.notna() & (text != '') & (text != 'nan'))
+
+
+def _coalesce(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """First non-blank text value across the given columns, row by row"""
+    result = pd.Series(pd.NA, index=df.index, dtype=object)
+    for col in columns:
+        missing = result.isna()
+        if not missing.any():
+            break
+        result = result.where(~missing, _clean_text(df[col]))
+    return result
+
+
+def _parse_amount(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    amount = pd.Series(float('nan'), index=df.index)
+    for col in columns:
+        missing = amount.isna()
+        if not missing.any():
+            break
+        raw = df[col]
+        if not pd.api.types.is_string_dtype(raw):
+            raw = raw.map(str, na_action='ignore')
+        # Remove $ and commas if present; an empty cell after cleanup counts as 0
+        text = raw.str.replace(r'[$,]', '', regex=True).str.strip()
+        values = pd.to_numeric(text.where(text != '', '0'), errors='coerce')
+        amount = amount.where(~missing, values)
+    return amount.fillna(0).astype(float)
+
+
+def _parse_dates(series: pd.Series, now: datetime) -> pd.Series:
+    # POS exports repeat the same timestamps a lot, so only parse distinct values
+    values = pd.Series(series.dropna().unique(), dtype=object)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype=object)
+    pending = values.index
+    leftover = []
+    # pandas infers one format per call from the first value; each pass picks up
+    # every value sharing that format, so mixed-format files take a few passes
+    for _ in range(MAX_DATE_FORMAT_PASSES):
+        if not len(pending):
+            break
+        try:
+            with warnings.catch_warnings():
+                # "Could not infer format" just means this pass falls back to dateutil
+                warnings.simplefilter('ignore', UserWarning)
+                attempt = pd.to_datetime(values[pending], errors='coerce')
+        except (ValueError, TypeError):
+            break
+        hits = attempt.notna().to_numpy()
+        if not hits.any():
+            # The first value has no usable format; parse it on its own below
+            leftover.append(pending[0])
+            pending = pending[1:]
+            continue
+        parsed[pending[hits]] = attempt[hits].astype(object)
+        pending = pending[~hits]
+    for idx in leftover + list(pending):
+        parsed[idx] = pd.to_datetime(values[idx], errors='coerce')
+
+    dates = series.map(dict(zip(values.tolist(), parsed.tolist()))).astype(object)
+    return dates.where(dates.notna(), now)
+
+
+def _optional(series: pd.Series) -> List[Optional[Any]]:
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def parse_transaction_frame(df: pd.DataFrame, plan: ColumnPlan, start_row: int = 0) -> ParsedChunk:
+    """Convert a raw DataFrame chunk into preview rows using a precomputed column plan"""
+    now = datetime.now()
+    index = df.index
+
+    if plan.date:
+        dates = _parse_dates(df[plan.date], now)
+    else:
+        dates = pd.Series([now] * len(df), index=index, dtype=object)
+
+    customer_code = _coalesce(df, plan.customer_code)
+
+    phone = _coalesce(df, plan.phone)
+    for col in plan.phone_scan:
+        missing = phone.isna()
+        if not missing.any():
+            break
+        # Looks like a phone number if it has 10+ digits and is reasonably long
+        text = _clean_text(df[col])
+        looks_like_phone = (text.str.count(r'\d') >= 10) & (text.str.len() >= 10)
+        phone = phone.where(~missing, text.where(looks_like_phone.fillna(False)))
+
+    no_phone = int(phone.isna().sum())
+    if no_phone:
+        logger.warning(f"No phone number found for {no_phone} row(s) starting at row {start_row}")
+    # Leave blank - customer code and phone number are SEPARATE fields
+    phone = phone.fillna('')
+
+    if plan.license_plate:
+        license_plate = _clean_text(df[plan.license_plate]).fillna('')
+    else:
+        license_plate = pd.Series('', index=index, dtype=object)
+
+    description = _coalesce(df, plan.description)
+    amount = _parse_amount(df, plan.amount)
+
+    # Rows with unparseable quantity/discount values are rejected, not guessed
+    valid = pd.Series(True, index=index)
+    if plan.quantity:
+        raw_quantity = _clean_text(df[plan.quantity])
+        quantity = pd.to_numeric(raw_quantity, errors='coerce')
+        valid &= ~(quantity.isna() & raw_quantity.notna())
+        quantity = quantity.fillna(1).astype('int64')
+    else:
+        quantity = pd.Series(1, index=index, dtype='int64')
+
+    if plan.discount_amount:
+        raw_discount = _clean_text(df[plan.discount_amount])
+        discount = pd.to_numeric(raw_discount, errors='coerce')
+        valid &= ~(discount.isna() & raw_discount.notna())
+        discount = discount.fillna(0).astype(float)
+    else:
+        discount = pd.Series(0.0, index=index)
+
+    if plan.membership_id:
+        membership_id = df[plan.membership_id].map(str, na_action='ignore').str.strip()
+    else:
+        membership_id = pd.Series(None, index=index, dtype=object)
+
+    keep = valid.to_numpy()
+    rejected = int((~keep).sum())
+    if rejected:
+        logger.warning(f"Skipped {rejected} unparseable row(s) starting at row {start_row}")
+
+    columns = {
+        'phone_number': phone[keep].tolist(),
+        'customer_code': _optional(customer_code[keep]),
+        'license_plate': license_plate[keep].tolist(),
+        'date': dates[keep].tolist(),
+        'description': _optional(description[keep]),
+        'quantity': quantity[keep].tolist(),
+        'amount': amount[keep].tolist(),
+        'discount_amount': discount[keep].tolist(),
+        'membership_id': _optional(membership_id[keep]),
+    }
+    names = list(columns)
+    rows = [dict(zip(names, values)) for values in zip(*columns.values())]
+    return ParsedChunk(rows, rejected=rejected, start_row=start_row)
+
+
+def iter_transaction_chunks(
+    contents: bytes,
+    filename: str,
+    chunk_size: int = PREVIEW_CHUNK_SIZE
+) -> Iterator[ParsedChunk]:
+    """
+    Parse an uploaded transaction file chunk by chunk.
+    CSV files are streamed with pandas' chunked reader; Excel files are read once
+    and sliced, since openpyxl cannot stream rows into pandas.
+    """
+    name = filename.lower()
+    # Read everything as text so phone numbers and codes keep their exact digits
+    if name.endswith('.csv'):
+        frames = pd.read_csv(BytesIO(contents), dtype=str, chunksize=chunk_size)
+    elif name.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(BytesIO(contents), dtype=str)
+        frames = (df.iloc[start:start + chunk_size] for start in range(0, max(len(df), 1), chunk_size))
+    else:
+        raise ValueError("Unsupported file format. Please upload Excel or CSV.")
+
+    plan = None
+    start_row = 0
+    for frame in frames:
+        frame = _normalize_columns(frame)
+        if plan is None:
+            plan = ColumnPlan(list(frame.columns))
+            logger.info(f"Resolved transaction columns from {list(frame.columns)}")
+        chunk = parse_transaction_frame(frame, plan, start_row=start_row)
+        start_row += len(frame)
+        yield chunk
+
+
+def parse_transaction_file(contents: bytes, filename: str, chunk_size: int = PREVIEW_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """Parse a whole transaction file into a flat list of preview rows"""
+    rows = []
+    for chunk in iter_transaction_chunks(contents, filename, chunk_size):
+        rows.extend(chunk.rows)
+    return rows
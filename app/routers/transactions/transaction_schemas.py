@@ -44,3 +44,16 @@ class TransactionPreview(BaseModel):
     discount_amount: Decimal = 0  # Discount from Excel
     membership_id: str | None = None  # Membership ID from Excel
 
+
+class ImportJobResponse(BaseModel):
+    id: UUID
+    filename: str
+    status: str
+    rows_processed: int
+    rows_approved: int
+    rows_rejected: int
+    rows_per_second: float | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
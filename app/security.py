@@ -1,54 +1,117 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any, Dict
 from jose import jwt
 import bcrypt
 import hashlib
 from app.config import settings
 
+def _bcrypt_input(password_bytes: bytes) -> bytes:
+    # Bcrypt has a 72-byte limit: longer passwords are pre-hashed with SHA256,
+    # whose hex digest (64 characters) is well under the limit
+    if len(password_bytes) > 72:
+        return hashlib.sha256(password_bytes).hexdigest().encode('utf-8')
+    return password_bytes
+
 def hash_password(password: str):
     """
     Hash password using bcrypt.
     Bcrypt has a 72-byte limit, so we pre-hash with SHA256 if password is longer.
     This allows passwords of any length while maintaining security.
     """
-    password_bytes = password.encode('utf-8')
-    
-    # If password is longer than 72 bytes, pre-hash with SHA256
-    # SHA256 produces 32 bytes (64 hex chars), which is under the 72-byte limit
-    if len(password_bytes) > 72:
-        # Pre-hash with SHA256 to get a fixed 32-byte output
-        # Use hexdigest which is 64 characters (well under 72 bytes)
-        sha256_hex = hashlib.sha256(password_bytes).hexdigest()
-        # Hash the SHA256 hex string with bcrypt
-        return bcrypt.hashpw(sha256_hex.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    else:
-        # Hash directly with bcrypt
-        return bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(_bcrypt_input(password.encode('utf-8')), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(plain: str, hashed: str):
     """
     Verify password against hash.
-    Handles both direct bcrypt hashes and SHA256-prehashed passwords.
+    hash_password stores passwords longer than 72 bytes SHA256-prehashed, so the
+    password's length picks the variant and a single bcrypt check is enough.
     """
-    plain_bytes = plain.encode('utf-8')
-    hashed_bytes = hashed.encode('utf-8')
-    
-    # Try direct verification first (for passwords <= 72 bytes)
     try:
-        if bcrypt.checkpw(plain_bytes, hashed_bytes):
-            return True
-    except:
-        pass
-    
-    # If that fails and password is long, try SHA256 pre-hash
-    if len(plain_bytes) > 72:
+        return bcrypt.checkpw(_bcrypt_input(plain.encode('utf-8')), hashed.encode('utf-8'))
+    except Exception:
+        # Malformed or empty stored hash
+        return False
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so async login handlers never
+    hold the shared request threadpool for the ~250ms a check takes. At most
+    `max_queue` calls wait behind the running ones; further calls raise
+    PasswordHasherBusy rather than queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
         try:
-            sha256_hex = hashlib.sha256(plain_bytes).hexdigest()
-            if bcrypt.checkpw(sha256_hex.encode('utf-8'), hashed_bytes):
-                return True
-        except:
-            pass
-    
-    return False
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._busy_seconds += elapsed
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            self._peak_queued = max(self._peak_queued, self._pending - self.workers)
+        try:
+            return await asyncio.wrap_future(self._executor.submit(self._timed, fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": min(self._pending, self.workers),
+                "queued": max(self._pending - self.workers, 0),
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_ms": round(1000 * self._busy_seconds / self._completed, 1) if self._completed else None,
+            }
+
+
+_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password hashing pool; raises PasswordHasherBusy when it is saturated"""
+    return await _hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password on the password hashing pool; raises PasswordHasherBusy when it is saturated"""
+    return await _hasher.run(verify_password, plain, hashed)
+
+
+def password_hasher_stats() -> Dict[str, Any]:
+    return _hasher.stats()
 
 def create_access_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
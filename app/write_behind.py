@@ -0,0 +1,258 @@
+"""
+Write-behind buffer for secondary rows (legacy points_history).
+
+By default (WRITE_BEHIND_MODE=inline) write_behind() simply inserts the rows in
+the caller's transaction. With WRITE_BEHIND_MODE=buffered, approvals,
+redemptions and signups stage them on their session instead of inserting them
+in the hot transaction. When the session commits, the staged rows move to a
+per-process buffer; a background thread writes them as batched INSERTs every
+WRITE_BEHIND_FLUSH_MS, or as soon as WRITE_BEHIND_BATCH_SIZE rows are waiting.
+Rows are staged per transaction, so a rolled-back savepoint drops the rows
+staged inside it and a rolled-back transaction drops all of them.
+
+Buffered rows live in memory until flushed, so a crash can lose the last flush
+interval of them. Only rows that can be rebuilt or lost are buffered: ledger
+entries, balances and the notifications outbox are always written inline.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_STAGED_ROWS = "write_behind_rows"
+
+
+class WriteBehindBuffer:
+    """
+    Rows waiting to be inserted, per model, flushed by a daemon thread in
+    batches of `batch_size`. Committers flush themselves once `max_rows` are
+    waiting (e.g. while the database is down), so memory stays bounded.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_seconds: float = 0.2, max_rows: int = 50000):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_rows = max_rows
+        self._pending: Dict[Any, List[dict]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.depth = 0
+        self.peak_depth = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.flush_seconds_total = 0.0
+
+    def add(self, staged: List[Tuple[Any, List[dict]]]):
+        with self._lock:
+            for model, rows in staged:
+                self._pending[model].extend(rows)
+                self.depth += len(rows)
+            self.peak_depth = max(self.peak_depth, self.depth)
+            depth = self.depth
+        self._ensure_started()
+        if depth >= self.max_rows:
+            self.flush()
+        elif depth >= self.batch_size:
+            self._wake.set()
+
+    def _take(self) -> Dict[Any, List[dict]]:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+            return pending
+
+    def _put_back(self, model, rows: List[dict]):
+        with self._lock:
+            self._pending[model][:0] = rows
+
+    def flush(self) -> int:
+        """Write every buffered row now; returns the number written"""
+        with self._flush_lock:
+            started = time.perf_counter()
+            written = 0
+            for model, rows in self._take().items():
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    try:
+                        written += self._insert(model, batch)
+                    except Exception as e:
+                        # Database unavailable: keep the rest for the next flush
+                        self._put_back(model, rows[start:])
+                        self.failed_flushes += 1
+                        logger.warning(f"Write-behind flush of {model.__tablename__} failed, will retry: {str(e)}")
+                        break
+            with self._lock:
+                self.depth -= written
+                self.flushed += written
+                self.flush_seconds_total += time.perf_counter() - started
+            return written
+
+    def _insert(self, model, batch: List[dict]) -> int:
+        db = SessionLocal()
+        try:
+            try:
+                db.execute(insert(model), batch)
+                db.commit()
+            except (IntegrityError, DataError):
+                # One bad row (e.g. its customer was deleted since) mustn't block the batch
+                db.rollback()
+                return self._insert_each(db, model, batch)
+        finally:
+            db.close()
+        self.batches += 1
+        return len(batch)
+
+    def _insert_each(self, db: Session, model, batch: List[dict]) -> int:
+        written = 0
+        for row in batch:
+            try:
+                db.execute(insert(model), [row])
+                db.commit()
+                written += 1
+            except (IntegrityError, DataError) as e:
+                db.rollback()
+                with self._lock:
+                    self.dropped += 1
+                    self.depth -= 1
+                logger.error(f"Dropped a buffered {model.__tablename__} row: {str(e)}")
+        self.batches += 1
+        return written
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self.depth:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Write-behind flush error: {str(e)}")
+
+    def stop(self):
+        """Stop the flusher and write what is left"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": settings.WRITE_BEHIND_MODE,
+                "depth": self.depth,
+                "peak_depth": self.peak_depth,
+                "pending": {model.__tablename__: len(rows) for model, rows in self._pending.items() if rows},
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failed_flushes": self.failed_flushes,
+                "dropped": self.dropped,
+                "avg_batch_rows": round(self.flushed / self.batches, 1) if self.batches else None,
+                "flush_seconds_total": round(self.flush_seconds_total, 3),
+            }
+
+
+_buffer = WriteBehindBuffer(
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_seconds=settings.WRITE_BEHIND_FLUSH_MS / 1000,
+    max_rows=settings.WRITE_BEHIND_MAX_ROWS,
+)
+
+# Buffered rows are written when the process exits normally (CLI commands, tests)
+atexit.register(_buffer.flush)
+
+
+def write_behind(db: Session, model, rows: List[dict]):
+    """
+    Insert these rows of `model` after db's transaction commits (inline, in the
+    transaction, with WRITE_BEHIND_MODE=inline). Rows are full column dicts,
+    including the primary key.
+    """
+    if not rows:
+        return
+    if settings.WRITE_BEHIND_MODE == "inline":
+        db.execute(insert(model), rows)
+        return
+    if not db.in_transaction():
+        # Tie the rows to a transaction, so its rollback/close drops them
+        db.begin()
+    transaction = db.get_nested_transaction() or db.get_transaction()
+    db.info.setdefault(_STAGED_ROWS, {}).setdefault(transaction, []).append((model, rows))
+
+
+def flush_write_behind() -> int:
+    """Write buffered rows now (e.g. before reading them back)"""
+    return _buffer.flush()
+
+
+def stop_write_behind():
+    """Stop the flusher and write what is left (called on shutdown)"""
+    _buffer.stop()
+
+
+def write_behind_stats() -> Dict[str, Any]:
+    return _buffer.stats()
+
+
+def _within(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_staged_rows(session):
+    staged = session.info.get(_STAGED_ROWS)
+    if not staged:
+        return
+    if session.in_nested_transaction():
+        # A savepoint was released: its rows now belong to the enclosing transaction
+        savepoint = session.get_nested_transaction()
+        rows = staged.pop(savepoint, None)
+        if rows:
+            staged.setdefault(savepoint.parent, []).extend(rows)
+        return
+    session.info.pop(_STAGED_ROWS)
+    _buffer.add([entry for rows in staged.values() for entry in rows])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_rows(session, previous_transaction):
+    # Rows staged in the rolled-back transaction or savepoint, or in savepoints inside it
+    staged = session.info.get(_STAGED_ROWS)
+    if staged:
+        for transaction in [t for t in staged if _within(t, previous_transaction)]:
+            del staged[transaction]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_staged_rows(session, transaction):
+    # Still staged when the outermost transaction ends: it was rolled back or closed
+    if transaction.parent is None:
+        session.info.pop(_STAGED_ROWS, None)
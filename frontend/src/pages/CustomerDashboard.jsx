@@ -8,6 +8,8 @@ function CustomerDashboard() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [redeeming, setRedeeming] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadDashboard();
@@ -20,6 +22,7 @@ function CustomerDashboard() {
       setError(null);
       const data = await getCustomerDashboard();
       setDashboardData(data);
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       setError('Failed to load dashboard data');
       console.error(err);
@@ -28,6 +31,22 @@ function CustomerDashboard() {
     }
   };
 
+  const loadMoreTransactions = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getCustomerDashboard(nextCursor);
+      setDashboardData(prev => ({
+        ...prev,
+        transactions: [...(prev.transactions || []), ...(data.transactions || [])]
+      }));
+      setNextCursor(data.next_cursor || null);
+    } catch (err) {
+      console.error('Failed to load more transactions:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadRedeemableOffers = async () => {
     try {
       const offers = await getCustomerRedeemableOffers();
@@ -267,6 +286,17 @@ function CustomerDashboard() {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="text-center mt-4">
+                  <button
+                    className="px-4 py-2 bg-gray-100 text-gray-700 rounded-md hover:bg-gray-200"
+                    onClick={loadMoreTransactions}
+                    disabled={loadingMore}
+                  >
+                    {loadingMore ? 'Loading...' : 'Load More'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -27,7 +27,7 @@ function PointsPage() {
     setLoading(true);
     setError('');
     try {
-      const res = await getPointsLedger(null, 100, 0);
+      const res = await getPointsLedger(null, 100);
       setLedger(res.data || []);
     } catch (err) {
       setError('Failed to load points ledger');
@@ -10,6 +10,8 @@ function TransactionsPage() {
   const [filterStartDate, setFilterStartDate] = useState('');
   const [filterEndDate, setFilterEndDate] = useState('');
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadTransactions();
@@ -25,6 +27,7 @@ function TransactionsPage() {
         filterEndDate || null
       );
       setTransactions(response.data || []);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (err) {
       console.error('Failed to load transactions:', err);
     } finally {
@@ -32,6 +35,25 @@ function TransactionsPage() {
     }
   };
 
+  const loadMoreTransactions = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await getTransactions(
+        filterPhone || null,
+        filterLicense || null,
+        filterStartDate || null,
+        filterEndDate || null,
+        nextCursor
+      );
+      setTransactions(prev => [...prev, ...(response.data || [])]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (err) {
+      console.error('Failed to load more transactions:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFilter = () => {
     loadTransactions();
   };
@@ -268,6 +290,17 @@ function TransactionsPage() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="text-center">
+                <button
+                  className="px-4 py-2 bg-gray-100 text-gray-700 rounded-md hover:bg-gray-200"
+                  onClick={loadMoreTransactions}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load More'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -170,23 +170,27 @@ export const approveTransactions = (transactions) => {
   return api.post('/transactions/approve', transactions);
 };
 
-export const getTransactions = (phoneNumber = null, licensePlate = null, startDate = null, endDate = null) => {
-  const params = {};
+export const getTransactions = (phoneNumber = null, licensePlate = null, startDate = null, endDate = null, cursor = null, limit = 500) => {
+  const params = { limit };
   if (phoneNumber) params.phone_number = phoneNumber;
   if (licensePlate) params.license_plate = licensePlate;
   if (startDate) params.start_date = startDate;
   if (endDate) params.end_date = endDate;
+  if (cursor) params.cursor = cursor;
   return api.get('/transactions/', { params });
 };
 
-export const getTransactionSummary = () => {
-  return api.get('/transactions/summary');
+export const getTransactionSummary = (sort = 'spend', limit = 100, offset = 0, includeTransactions = false) => {
+  const params = { sort, limit, offset };
+  if (includeTransactions) params.include_transactions = true;
+  return api.get('/transactions/summary', { params });
 };
 
 // Points Ledger endpoints
-export const getPointsLedger = (customerId = null, limit = 100, offset = 0) => {
-  const params = { limit, offset };
+export const getPointsLedger = (customerId = null, limit = 100, cursor = null) => {
+  const params = { limit };
   if (customerId) params.customer_id = customerId;
+  if (cursor) params.cursor = cursor;
   return api.get('/rewards/points/ledger', { params });
 };
 
@@ -200,8 +204,10 @@ export const getCustomerBalance = (customerId) => {
   return api.get(`/rewards/points/balance/${customerId}`);
 };
 
-export const getCustomerLedger = (customerId, limit = 100, offset = 0) => {
-  return api.get(`/rewards/points/ledger/${customerId}`, { params: { limit, offset } });
+export const getCustomerLedger = (customerId, limit = 100, cursor = null) => {
+  const params = { limit };
+  if (cursor) params.cursor = cursor;
+  return api.get(`/rewards/points/ledger/${customerId}`, { params });
 };
 
 // Rule Management APIs
@@ -233,8 +239,10 @@ export const testRuleApplication = async (transactionId) => {
 };
 
 // Customer Portal APIs
-export const getCustomerDashboard = async () => {
-  const response = await api.get('/customer/dashboard');
+export const getCustomerDashboard = async (cursor = null) => {
+  const params = {};
+  if (cursor) params.cursor = cursor;
+  const response = await api.get('/customer/dashboard', { params });
   return response.data;
 };
 
@@ -0,0 +1,82 @@
+"""
+Alembic environment.
+
+Tables are still created by Base.metadata.create_all on startup; migrations
+carry the changes create_all cannot make to existing databases (new columns,
+new indexes, backfills).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.config import settings
+from app.database import Base, normalize_db_url
+
+# Import all models so autogenerate sees every table
+from app.routers.organizations.org_models import Organization
+from app.routers.businesses.biz_models import Business
+from app.routers.businesses.daily_stats_models import BusinessDailyStats
+from app.routers.customers.cust_models import Customer
+from app.routers.customers.visit_stats_models import CustomerVisitStats
+from app.routers.rewards.offers_models import Offer
+from app.routers.rewards.points_models import PointsHistory, EarningRule
+from app.routers.rewards.points_ledger_models import PointsLedger, PointBalance
+from app.routers.admin.admin_models import Admin
+from app.routers.transactions.transaction_models import Transaction
+from app.routers.transactions.import_job_models import ImportJob
+from app.routers.businesses.staff_models import Staff
+from app.routers.rewards.redemption_models import Redemption
+from app.routers.rewards.redeemable_offer_models import RedeemableOffer
+from app.routers.campaigns.campaign_models import Campaign
+from app.routers.notifications.notification_models import Notification
+from app.routers.notifications.broadcast_models import OfferBroadcast
+from app.routers.notifications.email_template_models import EmailTemplateOverride
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+config.set_main_option("sqlalchemy.url", normalize_db_url(settings.DB_URL).replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of running it ("alembic upgrade head --sql")."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=settings.DB_URL.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't ALTER most things in place; batch mode recreates the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,53 @@
+"""customer plan and date_of_birth columns
+
+Replaces the one-off add_plan_column.py / add_date_of_birth_column.py scripts.
+Databases that already have the columns (or no customers table yet, which
+create_all will build in full) are left alone.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _customer_columns():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("customers"):
+        return None
+    return {column["name"] for column in inspector.get_columns("customers")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = _customer_columns()
+    if columns is None:
+        return
+    with op.batch_alter_table("customers") as batch_op:
+        if "plan" not in columns:
+            batch_op.add_column(sa.Column("plan", sa.String(), nullable=True))
+        if "date_of_birth" not in columns:
+            batch_op.add_column(sa.Column("date_of_birth", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    columns = _customer_columns()
+    if columns is None:
+        return
+    with op.batch_alter_table("customers") as batch_op:
+        if "date_of_birth" in columns:
+            batch_op.drop_column("date_of_birth")
+        if "plan" in columns:
+            batch_op.drop_column("plan")
@@ -0,0 +1,69 @@
+"""indexes for hot lookups
+
+Composite indexes for the per-business customer/transaction lookups done on every
+upload, approval and dashboard call, and for points ledger history. On Postgres the
+indexes are built CONCURRENTLY so existing tables stay writable during the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, postgres INCLUDE columns, partial index condition)
+INDEXES = [
+    ("ix_transactions_business_phone_approved", "transactions", ["business_id", "phone_number", "is_approved"], ["id"], None),
+    ("ix_transactions_business_approved_date", "transactions", ["business_id", "is_approved", "date"], None, None),
+    ("ix_customers_business_phone", "customers", ["business_id", "phone"], None, None),
+    ("ix_customers_email", "customers", ["email"], None, None),
+    ("ix_points_ledger_customer_created", "points_ledger", ["customer_id", "created_at"], ["points_earned"], None),
+    ("ix_points_ledger_member_created", "points_ledger", ["member_id", "created_at"], None, "member_id IS NOT NULL"),
+    ("ix_redeemable_offers_customer_business", "redeemable_offers", ["customer_id", "business_id", "is_redeemed", "created_at"], None, None),
+    ("ix_offers_business_active", "offers", ["business_id", "is_active"], None, None),
+    ("ix_points_history_business_points", "points_history", ["business_id", "points"], None, None),
+    ("ix_points_history_customer", "points_history", ["customer_id"], None, None),
+    ("ix_staff_business_id", "staff", ["business_id"], None, None),
+]
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = _existing_tables()
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    for name, table, columns, include, where in INDEXES:
+        # Tables that don't exist yet get these indexes from create_all
+        if table not in tables:
+            continue
+        where_clause = sa.text(where) if where else None
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name, table, columns, if_not_exists=True,
+                    postgresql_include=include or [], postgresql_where=where_clause,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.create_index(name, table, columns, if_not_exists=True, sqlite_where=where_clause)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing_tables()
+    for name, table, columns, include, where in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
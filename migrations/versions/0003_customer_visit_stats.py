@@ -0,0 +1,60 @@
+"""customer_visit_stats table
+
+Per-phone approved-visit counters maintained on approval. The table is
+backfilled from transactions here; `python -m app.cli rebuild-visit-stats`
+recomputes it at any time.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("customer_visit_stats"):
+        op.create_table(
+            "customer_visit_stats",
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), primary_key=True),
+            sa.Column("phone_number", sa.String(), primary_key=True),
+            sa.Column("visit_count", sa.Integer(), nullable=False),
+            sa.Column("last_visit_at", sa.DateTime(), nullable=True),
+            sa.Column("lifetime_spend", sa.Numeric(12, 2), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+    if inspector.has_table("transactions"):
+        op.execute("DELETE FROM customer_visit_stats")
+        op.execute(
+            """
+            INSERT INTO customer_visit_stats
+                (business_id, phone_number, visit_count, last_visit_at, lifetime_spend, updated_at)
+            SELECT business_id, phone_number, COUNT(id), MAX(date), COALESCE(SUM(amount), 0), CURRENT_TIMESTAMP
+            FROM transactions
+            WHERE is_approved = true
+            GROUP BY business_id, phone_number
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("customer_visit_stats"):
+        op.drop_table("customer_visit_stats")
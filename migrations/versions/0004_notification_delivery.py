@@ -0,0 +1,61 @@
+"""notification delivery columns
+
+Adds the retry/claim bookkeeping used by the email delivery worker. Email
+notifications that were already pending before this revision were tracking
+rows for mails the request had sent synchronously, so they are marked sent
+rather than delivered a second time.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_notifications_channel_status_next"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("notifications"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("notifications")}
+
+    if "attempts" not in columns:
+        with op.batch_alter_table("notifications") as batch_op:
+            batch_op.add_column(sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+            batch_op.add_column(sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column("claimed_at", sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column("last_error", sa.String(), nullable=True))
+        op.execute(
+            "UPDATE notifications SET status = 'sent', sent_at = created_at "
+            "WHERE channel = 'email' AND status = 'pending'"
+        )
+
+    op.create_index(
+        INDEX_NAME, "notifications", ["channel", "status", "next_attempt_at"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("notifications"):
+        return
+    op.drop_index(INDEX_NAME, table_name="notifications", if_exists=True)
+    columns = {column["name"] for column in inspector.get_columns("notifications")}
+    with op.batch_alter_table("notifications") as batch_op:
+        for name in ("last_error", "claimed_at", "next_attempt_at", "attempts"):
+            if name in columns:
+                batch_op.drop_column(name)
@@ -0,0 +1,93 @@
+"""offer broadcasts
+
+Table for background offer announcements, the notifications.broadcast_id
+link used for per-broadcast delivery stats, and the (business_id, id)
+customer index the recipient stream pages over.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    ("ix_notifications_broadcast_status", "notifications", ["broadcast_id", "status"]),
+    ("ix_customers_business_id_id", "customers", ["business_id", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("offer_broadcasts"):
+        op.create_table(
+            "offer_broadcasts",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), nullable=False),
+            sa.Column("offer_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("offers.id"), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("subject", sa.String(), nullable=False),
+            sa.Column("html_body", sa.Text(), nullable=False),
+            sa.Column("text_body", sa.Text(), nullable=True),
+            sa.Column("recipients_queued", sa.Integer(), nullable=True),
+            sa.Column("last_customer_id", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+        )
+
+    tables = set(inspector.get_table_names())
+    if "notifications" in tables:
+        columns = {column["name"] for column in inspector.get_columns("notifications")}
+        if "broadcast_id" not in columns:
+            with op.batch_alter_table("notifications") as batch_op:
+                batch_op.add_column(sa.Column(
+                    "broadcast_id", postgresql.UUID(as_uuid=True),
+                    sa.ForeignKey("offer_broadcasts.id", name="fk_notifications_broadcast_id"),
+                    nullable=True,
+                ))
+
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    for name, table, columns in INDEXES:
+        if table not in tables:
+            continue
+        if is_postgres:
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, columns in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
+    if "notifications" in tables:
+        columns = {column["name"] for column in inspector.get_columns("notifications")}
+        if "broadcast_id" in columns:
+            with op.batch_alter_table("notifications") as batch_op:
+                batch_op.drop_constraint("fk_notifications_broadcast_id", type_="foreignkey")
+                batch_op.drop_column("broadcast_id")
+    if "offer_broadcasts" in tables:
+        op.drop_table("offer_broadcasts")
@@ -0,0 +1,42 @@
+"""per-business email template overrides
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses") or inspector.has_table("email_templates"):
+        return
+    op.create_table(
+        "email_templates",
+        sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), primary_key=True),
+        sa.Column("type", sa.String(), primary_key=True),
+        sa.Column("subject", sa.String(), nullable=True),
+        sa.Column("html_body", sa.Text(), nullable=True),
+        sa.Column("text_body", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("email_templates"):
+        op.drop_table("email_templates")
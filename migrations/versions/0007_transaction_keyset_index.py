@@ -0,0 +1,48 @@
+"""transaction list keyset index
+
+GET /transactions/ pages on (date, id). The business/date index gains id so each
+page is a single ordered index range scan; the old index is a prefix of the new
+one and is dropped.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_INDEX = ("ix_transactions_business_approved_date", ["business_id", "is_approved", "date"])
+NEW_INDEX = ("ix_transactions_business_approved_date_id", ["business_id", "is_approved", "date", "id"])
+
+
+def _swap(create, drop) -> None:
+    if not sa.inspect(op.get_bind()).has_table("transactions"):
+        return
+    name, columns = create
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, "transactions", columns, if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(drop[0], table_name="transactions", if_exists=True, postgresql_concurrently=True)
+    else:
+        op.create_index(name, "transactions", columns, if_not_exists=True)
+        op.drop_index(drop[0], table_name="transactions", if_exists=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _swap(NEW_INDEX, OLD_INDEX)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap(OLD_INDEX, NEW_INDEX)
@@ -0,0 +1,91 @@
+"""business_daily_stats rollup table
+
+Per-business per-day KPI totals maintained as transactions are approved,
+offers redeemed and customers created. The table is backfilled from the raw
+tables here; `python -m app.cli rebuild-daily-stats` recomputes it at any time.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCE_TABLES = ("transactions", "points_history", "customers", "redemptions")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("business_daily_stats"):
+        op.create_table(
+            "business_daily_stats",
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("visits", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Numeric(14, 2), nullable=False),
+            sa.Column("discounts", sa.Numeric(14, 2), nullable=False),
+            sa.Column("points_issued", sa.Integer(), nullable=False),
+            sa.Column("points_redeemed", sa.Integer(), nullable=False),
+            sa.Column("new_customers", sa.Integer(), nullable=False),
+            sa.Column("offers_redeemed", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+    if all(inspector.has_table(table) for table in SOURCE_TABLES):
+        op.execute("DELETE FROM business_daily_stats")
+        op.execute(
+            """
+            INSERT INTO business_daily_stats
+                (business_id, day, visits, revenue, discounts, points_issued, points_redeemed,
+                 new_customers, offers_redeemed, updated_at)
+            SELECT business_id, day, SUM(visits), SUM(revenue), SUM(discounts), SUM(points_issued),
+                   SUM(points_redeemed), SUM(new_customers), SUM(offers_redeemed), CURRENT_TIMESTAMP
+            FROM (
+                SELECT business_id, DATE(date) AS day, COUNT(id) AS visits,
+                       COALESCE(SUM(amount), 0) AS revenue, COALESCE(SUM(discount_amount), 0) AS discounts,
+                       0 AS points_issued, 0 AS points_redeemed, 0 AS new_customers, 0 AS offers_redeemed
+                FROM transactions
+                WHERE is_approved = true AND date IS NOT NULL
+                GROUP BY business_id, DATE(date)
+                UNION ALL
+                SELECT business_id, DATE(created_at), 0, 0, 0,
+                       SUM(CASE WHEN points > 0 THEN points ELSE 0 END),
+                       SUM(CASE WHEN points < 0 THEN -points ELSE 0 END), 0, 0
+                FROM points_history
+                WHERE business_id IS NOT NULL AND created_at IS NOT NULL
+                GROUP BY business_id, DATE(created_at)
+                UNION ALL
+                SELECT business_id, DATE(created_at), 0, 0, 0, 0, 0, COUNT(id), 0
+                FROM customers
+                WHERE business_id IS NOT NULL AND created_at IS NOT NULL
+                GROUP BY business_id, DATE(created_at)
+                UNION ALL
+                SELECT business_id, DATE(created_at), 0, 0, 0, 0, 0, 0, COUNT(id)
+                FROM redemptions
+                WHERE created_at IS NOT NULL
+                GROUP BY business_id, DATE(created_at)
+            ) AS facts
+            GROUP BY business_id, day
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("business_daily_stats"):
+        op.drop_table("business_daily_stats")
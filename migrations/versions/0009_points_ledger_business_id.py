@@ -0,0 +1,69 @@
+"""points_ledger.business_id
+
+The business ledger listing filtered on `customer_id IN (every customer of the
+business) OR member_id IN (...)`. Ledger rows now carry their business, backfilled
+here from the customer (or member) they belong to, and are listed by keyset on
+(business_id, created_at, points_id).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = ("ix_points_ledger_business_created_id", ["business_id", "created_at", "points_id"])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("points_ledger"):
+        return
+    if "business_id" not in {column["name"] for column in inspector.get_columns("points_ledger")}:
+        # A plain ADD COLUMN: batch mode would rebuild the SQLite table and lose its UUID column types
+        op.add_column("points_ledger", sa.Column("business_id", postgresql.UUID(as_uuid=True), nullable=True))
+        if op.get_bind().dialect.name == "postgresql":
+            op.create_foreign_key(
+                "fk_points_ledger_business_id", "points_ledger", "businesses", ["business_id"], ["id"]
+            )
+
+    op.execute(
+        """
+        UPDATE points_ledger
+        SET business_id = (
+            SELECT customers.business_id FROM customers
+            WHERE customers.id = COALESCE(points_ledger.customer_id, points_ledger.member_id)
+        )
+        WHERE business_id IS NULL
+        """
+    )
+
+    name, columns = INDEX
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, "points_ledger", columns, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        op.create_index(name, "points_ledger", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("points_ledger"):
+        return
+    op.drop_index(INDEX[0], table_name="points_ledger", if_exists=True)
+    if "business_id" in {column["name"] for column in inspector.get_columns("points_ledger")}:
+        # Dropping the column drops its foreign key too
+        op.drop_column("points_ledger", "business_id")
@@ -0,0 +1,113 @@
+"""point_balance_snapshots and opening ledger balances
+
+The points ledger becomes the source of truth for balances. Customers whose
+balance (point_balances, else customers.points) isn't covered by their ledger
+entries get one OPENING_BALANCE entry for the difference, so replaying the
+ledger reproduces every balance shown today. `python -m app.cli verify-points`
+then reports any customers.points left out of step, and `replay-points`
+corrects them.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPENING_BALANCE = "OPENING_BALANCE"
+SOURCE_TABLES = ("customers", "point_balances", "points_ledger")
+BATCH_SIZE = 10000
+
+customers = sa.table(
+    "customers",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("business_id", postgresql.UUID(as_uuid=True)),
+    sa.column("points", sa.Integer()),
+)
+point_balances = sa.table(
+    "point_balances",
+    sa.column("customer_id", postgresql.UUID(as_uuid=True)),
+    sa.column("total_points", sa.Integer()),
+)
+points_ledger = sa.table(
+    "points_ledger",
+    sa.column("points_id", postgresql.UUID(as_uuid=True)),
+    sa.column("customer_id", postgresql.UUID(as_uuid=True)),
+    sa.column("business_id", postgresql.UUID(as_uuid=True)),
+    sa.column("points_earned", sa.Integer()),
+    sa.column("reward_type_applied", sa.String(30)),
+    sa.column("created_at", sa.DateTime()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("point_balance_snapshots"):
+        op.create_table(
+            "point_balance_snapshots",
+            sa.Column("customer_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("customers.id"), primary_key=True),
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), nullable=True),
+            sa.Column("total_points", sa.Integer(), nullable=False),
+            sa.Column("entry_count", sa.Integer(), nullable=False),
+            sa.Column("as_of", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+    if not all(inspector.has_table(table) for table in SOURCE_TABLES):
+        return
+    ledger_totals = (
+        sa.select(points_ledger.c.customer_id, sa.func.sum(points_ledger.c.points_earned).label("points"))
+        .where(points_ledger.c.customer_id.isnot(None))
+        .group_by(points_ledger.c.customer_id)
+        .subquery()
+    )
+    shown = sa.func.coalesce(point_balances.c.total_points, customers.c.points, 0)
+    missing = shown - sa.func.coalesce(ledger_totals.c.points, 0)
+    rows = op.get_bind().execute(
+        sa.select(customers.c.id, customers.c.business_id, missing)
+        .select_from(customers)
+        .outerjoin(point_balances, point_balances.c.customer_id == customers.c.id)
+        .outerjoin(ledger_totals, ledger_totals.c.customer_id == customers.c.id)
+        .where(missing != 0)
+    ).all()
+
+    now = datetime.utcnow()
+    entries = [
+        {
+            "points_id": uuid.uuid4(),
+            "customer_id": customer_id,
+            "business_id": business_id,
+            "points_earned": points,
+            "reward_type_applied": OPENING_BALANCE,
+            "created_at": now,
+        }
+        for customer_id, business_id, points in rows
+    ]
+    for start in range(0, len(entries), BATCH_SIZE):
+        op.bulk_insert(points_ledger, entries[start:start + BATCH_SIZE])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("points_ledger"):
+        op.execute(points_ledger.delete().where(points_ledger.c.reward_type_applied == OPENING_BALANCE))
+    if inspector.has_table("point_balance_snapshots"):
+        op.drop_table("point_balance_snapshots")
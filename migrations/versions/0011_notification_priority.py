@@ -0,0 +1,70 @@
+"""notifications.priority
+
+Delivery workers claim notifications highest priority first, so a redemption
+confirmation isn't queued behind a campaign or offer broadcast. Pending rows are
+backfilled from their type; the polling index becomes
+(channel, status, priority DESC, created_at), which serves the claim's ORDER BY.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_INDEX = ("ix_notifications_channel_status_next", ["channel", "status", "next_attempt_at"])
+NEW_INDEX = ("ix_notifications_dispatch", ["channel", "status", sa.text("priority DESC"), "created_at"])
+
+# notification_service.NOTIFICATION_PRIORITIES when this revision was written
+PRIORITIES = {"redeem": 100, "welcome": 50, "earn": 50, "offer": 10, "campaign": 0}
+
+
+def _swap(create, drop) -> None:
+    name, columns = create
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, "notifications", columns, if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(drop[0], table_name="notifications", if_exists=True, postgresql_concurrently=True)
+    else:
+        op.create_index(name, "notifications", columns, if_not_exists=True)
+        op.drop_index(drop[0], table_name="notifications", if_exists=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("notifications"):
+        return
+    if "priority" not in {column["name"] for column in inspector.get_columns("notifications")}:
+        # A plain ADD COLUMN: batch mode would rebuild the SQLite table and lose its UUID column types
+        op.add_column("notifications", sa.Column("priority", sa.Integer(), nullable=False, server_default="0"))
+
+    notifications = sa.table(
+        "notifications", sa.column("type", sa.String()), sa.column("status", sa.String()), sa.column("priority", sa.Integer())
+    )
+    op.execute(
+        notifications.update()
+        .where(notifications.c.status.in_(["pending", "sending"]))
+        .values(priority=sa.case(PRIORITIES, value=notifications.c.type, else_=0))
+    )
+    _swap(NEW_INDEX, OLD_INDEX)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("notifications"):
+        return
+    _swap(OLD_INDEX, NEW_INDEX)
+    if "priority" in {column["name"] for column in inspector.get_columns("notifications")}:
+        op.drop_column("notifications", "priority")
@@ -0,0 +1,54 @@
+"""campaign_awards
+
+Campaigns are evaluated by `python -m app.cli run-campaigns`. Each award is
+recorded once per (campaign, customer, period), which keeps repeated runs from
+awarding a bonus twice; credited_at marks the awards whose points are in the
+ledger.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, Sequence[str], None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = ("ix_campaign_awards_credited_at", ["credited_at"])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("campaign_awards"):
+        op.create_table(
+            "campaign_awards",
+            sa.Column("campaign_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("campaigns.id"), primary_key=True),
+            sa.Column("customer_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("customers.id"), primary_key=True),
+            sa.Column("period", sa.String(), primary_key=True),
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), nullable=False),
+            sa.Column("points", sa.Integer(), nullable=False),
+            sa.Column("awarded_at", sa.DateTime(), nullable=False),
+            sa.Column("credited_at", sa.DateTime(), nullable=True),
+        )
+    name, columns = INDEX
+    op.create_index(name, "campaign_awards", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("campaign_awards"):
+        op.drop_index(INDEX[0], table_name="campaign_awards", if_exists=True)
+        op.drop_table("campaign_awards")
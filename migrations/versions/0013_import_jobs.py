@@ -0,0 +1,63 @@
+"""import_jobs
+
+Table for background transaction imports (POST /transactions/imports), with
+the claim_token that fences progress writes to the worker that owns the job.
+Databases that got the table from create_all before this revision only gain
+the claim_token column.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, Sequence[str], None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("businesses"):
+        return
+    if not inspector.has_table("import_jobs"):
+        op.create_table(
+            "import_jobs",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("business_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("businesses.id"), nullable=False),
+            sa.Column("filename", sa.String(), nullable=False),
+            sa.Column("file_path", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("claim_token", postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column("chunk_size", sa.Integer(), nullable=False),
+            sa.Column("rows_processed", sa.Integer(), nullable=True),
+            sa.Column("rows_approved", sa.Integer(), nullable=True),
+            sa.Column("rows_rejected", sa.Integer(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+        )
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("import_jobs")}
+    if "claim_token" not in columns:
+        # A plain ADD COLUMN: batch mode would rebuild the SQLite table and lose its UUID column types
+        op.add_column("import_jobs", sa.Column("claim_token", postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("import_jobs"):
+        op.drop_table("import_jobs")
@@ -0,0 +1,43 @@
+"""offer broadcast claim token
+
+offer_broadcasts.claim_token, which fences a broadcast's cursor writes to the
+worker that owns it.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, Sequence[str], None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    # An empty database gets every table from create_all on first startup
+    if not inspector.has_table("offer_broadcasts"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("offer_broadcasts")}
+    if "claim_token" not in columns:
+        # A plain ADD COLUMN: batch mode would rebuild the SQLite table and lose its UUID column types
+        op.add_column("offer_broadcasts", sa.Column("claim_token", postgresql.UUID(as_uuid=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("offer_broadcasts"):
+        columns = {column["name"] for column in inspector.get_columns("offer_broadcasts")}
+        if "claim_token" in columns:
+            op.drop_column("offer_broadcasts", "claim_token")
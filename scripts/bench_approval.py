@@ -0,0 +1,186 @@
+"""
+Benchmark for set-based transaction approval (POST /transactions/approve).
+
+Creates a throwaway business with a few reward rules and existing customers,
+then approves a synthetic upload (default 50k rows) through
+approve_transaction_batch, the same path as the endpoint and import jobs. Phones
+repeat across the upload and about half of them are new customers, so customer
+creation, in-batch sequences and 4th/5th-visit offers are all exercised.
+
+Prints the wall time, rows/s and the number of SQL round trips per batch. Those
+stay flat as the batch grows, apart from a few per 4th or 5th visit, whose
+offers are created and redeemed one at a time (--phones well above --rows
+leaves almost none). Use the configured DATABASE_URL (Postgres
+for meaningful numbers). The business and its rows are deleted at the end
+unless --keep is given.
+
+    python scripts/bench_approval.py [--rows 50000] [--phones 20000] [--batch-size 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.main  # noqa: E402,F401  (registers every model and creates missing tables)
+from sqlalchemy import delete, event, select  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.routers.businesses.biz_models import Business  # noqa: E402
+from app.routers.businesses.daily_stats_models import BusinessDailyStats  # noqa: E402
+from app.routers.customers.cust_models import Customer  # noqa: E402
+from app.routers.customers.visit_stats_models import CustomerVisitStats  # noqa: E402
+from app.routers.notifications.notification_models import Notification  # noqa: E402
+from app.routers.rewards.offers_models import Offer  # noqa: E402
+from app.routers.rewards.points_ledger_models import PointBalance, PointBalanceSnapshot, PointsLedger  # noqa: E402
+from app.routers.rewards.points_models import PointsHistory  # noqa: E402
+from app.routers.rewards.redeemable_offer_models import RedeemableOffer  # noqa: E402
+from app.routers.rewards.rule_cache import get_compiled_rules  # noqa: E402
+from app.routers.transactions.approval_service import approve_transaction_batch  # noqa: E402
+from app.routers.transactions.transaction_models import Transaction  # noqa: E402
+from app.routers.transactions.transaction_schemas import TransactionCreate  # noqa: E402
+from app.write_behind import flush_write_behind  # noqa: E402
+
+RULES = [
+    dict(name="points per dollar", reward_type="POINTS", reward_value="2", per_unit="PER_DOLLAR", priority=5),
+    dict(name="gold bonus", reward_type="POINTS", reward_value="10", wash_type="gold", priority=3),
+    dict(name="member discount", customer_type="MEMBER", reward_type="DISCOUNT_PERCENT", reward_value="20", priority=10),
+    dict(name="free wash", customer_type="NON_MEMBER", reward_type="FREE_WASH", reward_value="FREE", priority=10),
+]
+
+
+def phone(n: int) -> str:
+    return f"555{n:07d}"
+
+
+def create_business(existing_customers: int, label: str = "approval bench"):
+    """
+    A business with RULES and customers for phones 0..existing_customers-1 (every
+    other one a member, every third one with an email address)
+    """
+    db = SessionLocal()
+    try:
+        business = Business(id=uuid.uuid4(), name=label, email=f"bench-{uuid.uuid4()}@example.com", password_hash="x")
+        db.add(business)
+        db.flush()
+        db.add_all([Offer(business_id=business.id, start_date=date(2020, 1, 1), **rule) for rule in RULES])
+        db.add_all([
+            Customer(id=uuid.uuid4(), business_id=business.id, phone=phone(i), points=0,
+                     membership_id=f"M{i}" if i % 2 else None,
+                     email=f"bench-{business.id}-{i}@example.com" if i % 3 == 0 else None)
+            for i in range(existing_customers)
+        ])
+        db.commit()
+        return business.id
+    finally:
+        db.close()
+
+
+def make_upload(rows: int, phones: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        TransactionCreate(
+            phone_number=phone(rng.randrange(phones)),
+            license_plate=f"PL{i % 5000}",
+            date=start + timedelta(minutes=i),
+            description=rng.choice(["Gold wash", "Silver wash", None]),
+            amount=Decimal(rng.choice(["0", "10.50", "3", "24.99"])),
+            discount_amount=Decimal(rng.choice(["0", "0", "2"])),
+            membership_id=rng.choice([None, None, None, f"MX{i}"]),
+        )
+        for i in range(rows)
+    ]
+
+
+def delete_business(business_id):
+    """Delete the business and everything approvals wrote for it"""
+    db = SessionLocal()
+    try:
+        customer_ids = select(Customer.id).where(Customer.business_id == business_id)
+        for statement in (
+            delete(Notification).where(Notification.customer_id.in_(customer_ids)),
+            delete(RedeemableOffer).where(RedeemableOffer.business_id == business_id),
+            delete(PointsHistory).where(PointsHistory.business_id == business_id),
+            delete(PointsLedger).where(PointsLedger.customer_id.in_(customer_ids)),
+            delete(PointBalanceSnapshot).where(PointBalanceSnapshot.customer_id.in_(customer_ids)),
+            delete(PointBalance).where(PointBalance.customer_id.in_(customer_ids)),
+            delete(CustomerVisitStats).where(CustomerVisitStats.business_id == business_id),
+            delete(BusinessDailyStats).where(BusinessDailyStats.business_id == business_id),
+            delete(Transaction).where(Transaction.business_id == business_id),
+            delete(Customer).where(Customer.business_id == business_id),
+            delete(Offer).where(Offer.business_id == business_id),
+            delete(Business).where(Business.id == business_id),
+        ):
+            db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark set-based transaction approval")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--phones", type=int, default=20000, help="Distinct phones in the upload")
+    parser.add_argument("--customers", type=int, default=10000, help="Phones that are already customers")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per approval (default: the whole upload)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark business and its rows")
+    args = parser.parse_args(argv)
+    batch_size = args.batch_size or args.rows
+
+    business_id = create_business(args.customers)
+    upload = make_upload(args.rows, args.phones, args.seed)
+
+    statements = []
+
+    def count_statement(*_):
+        statements[-1] += 1
+
+    db = SessionLocal()
+    try:
+        batches = []
+        started = time.perf_counter()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            for start in range(0, len(upload), batch_size):
+                statements.append(0)
+                batch_started = time.perf_counter()
+                reward_rules = get_compiled_rules(db, business_id)
+                approved = approve_transaction_batch(db, business_id, upload[start:start + batch_size], reward_rules)
+                db.commit()
+                batches.append((len(approved), time.perf_counter() - batch_started))
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        approve_seconds = time.perf_counter() - started
+        flush_write_behind()
+        total_seconds = time.perf_counter() - started
+
+        customers = db.query(Customer).filter(Customer.business_id == business_id).count()
+        offers = db.query(RedeemableOffer).filter(RedeemableOffer.business_id == business_id).count()
+        milestones = db.query(Transaction).filter(
+            Transaction.business_id == business_id, Transaction.transaction_sequence.in_([4, 5])
+        ).count()
+    finally:
+        db.close()
+        if not args.keep:
+            delete_business(business_id)
+
+    rows = sum(count for count, _ in batches)
+    print(f"{rows} rows over {args.phones} phones in {len(batches)} batch(es) of up to {batch_size}: "
+          f"{approve_seconds:.2f}s ({rows / approve_seconds:,.0f} rows/s), "
+          f"{total_seconds:.2f}s including the write-behind flush")
+    slowest = max(seconds for _, seconds in batches)
+    print(f"  slowest batch {slowest:.2f}s; SQL round trips per batch: min {min(statements)}, max {max(statements)} "
+          f"({milestones} 4th/5th visits in total)")
+    print(f"  {customers} customers after approval ({customers - args.customers} created), {offers} redeemable offers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Benchmark for the compiled reward rule engine (default 100 rules x 100k transactions).
+
+Builds a synthetic rule set with every kind of rule the engine has to handle:
+inactive, not yet started, expired, MEMBER / NON_MEMBER / ANY, wash types in
+mixed case, unparseable reward values and unknown reward types and units. It then
+evaluates the same transactions (with members, non-members and unknown
+customers) two ways:
+
+  - baseline: the per-transaction loop apply_reward_rules used before rules were
+    compiled (sort the rules, check each one with rule_applies_to_transaction,
+    parse its reward value), kept below as the reference
+  - CompiledRuleSet(rules).evaluate_many, as approvals and imports use it
+
+Prints both timings and exits 1 unless every result (points, discount, free
+months, applied rules in order) is identical. No database is needed.
+
+    python scripts/bench_rule_engine.py [--rules 100] [--transactions 100000] [--baseline-sample 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routers.customers.cust_models import Customer  # noqa: E402
+from app.routers.rewards.offers_models import Offer  # noqa: E402
+from app.routers.rewards.rule_engine import (  # noqa: E402
+    CompiledRuleSet,
+    RewardResult,
+    apply_reward_rules,
+    rule_applies_to_transaction,
+)
+from app.routers.transactions.transaction_schemas import TransactionCreate  # noqa: E402
+
+
+def reference_apply_reward_rules(transaction, rules, customer=None) -> RewardResult:
+    """The uncompiled evaluation CompiledRuleSet replaced, rule by rule"""
+    result = RewardResult()
+    for rule in sorted(rules, key=lambda r: r.priority, reverse=True):
+        if not rule_applies_to_transaction(rule, transaction, customer):
+            continue
+        try:
+            reward_value = float(rule.reward_value)
+        except (ValueError, TypeError):
+            continue
+
+        if rule.reward_type == "POINTS":
+            if rule.per_unit in ("PER_TRANSACTION", "PER_VISIT"):
+                points = int(reward_value)
+            elif rule.per_unit == "PER_DOLLAR":
+                points = int(float(transaction.amount) * reward_value)
+            else:
+                points = 0
+            if points > 0:
+                result.points_earned += points
+                result.applied_rule_ids.append(str(rule.id))
+                result.applied_rules.append({"rule_id": str(rule.id), "rule_name": rule.name,
+                                             "reward_type": "POINTS", "points": points})
+        elif rule.reward_type == "DISCOUNT_PERCENT":
+            discount = round(float(transaction.amount) * (reward_value / 100.0), 2)
+            if discount > 0:
+                result.discount_amount += Decimal(str(discount))
+                result.applied_rule_ids.append(str(rule.id))
+                result.applied_rules.append({"rule_id": str(rule.id), "rule_name": rule.name,
+                                             "reward_type": "DISCOUNT_PERCENT", "discount": discount})
+        elif rule.reward_type == "FREE_MONTHS":
+            months = int(reward_value)
+            if months > 0:
+                result.free_months += months
+                result.applied_rule_ids.append(str(rule.id))
+                result.applied_rules.append({"rule_id": str(rule.id), "rule_name": rule.name,
+                                             "reward_type": "FREE_MONTHS", "months": months})
+    return result
+
+
+def make_rules(count: int, rng: random.Random):
+    today = date.today()
+    return [
+        Offer(
+            id=uuid.uuid4(),
+            name=f"rule {i}",
+            priority=rng.randint(1, 10),
+            is_active=rng.random() > 0.1,
+            start_date=today + timedelta(days=rng.choice([-30, -1, 0, 1])),
+            end_date=rng.choice([None, today - timedelta(days=1), today, today + timedelta(days=5)]),
+            customer_type=rng.choice(["ANY", "ANY", "MEMBER", "NON_MEMBER"]),
+            product_type="ANY",
+            wash_type=rng.choice([None, "", "Gold", "silver", "BRONZE", "ultimate"]),
+            reward_type=rng.choice(["POINTS", "POINTS", "DISCOUNT_PERCENT", "FREE_MONTHS", "UNKNOWN"]),
+            reward_value=rng.choice(["1", "2.5", "20", "x", "0", "3"]),
+            per_unit=rng.choice(["PER_TRANSACTION", "PER_DOLLAR", "PER_VISIT", "OTHER"]),
+        )
+        for i in range(count)
+    ]
+
+
+def make_transactions(count: int, rng: random.Random):
+    descriptions = ["Gold Wash", "silver plan", "Ultimate Bronze", None, "", "basic"] + [f"plan {k}" for k in range(30)]
+    customers = [None, Customer(membership_id=None), Customer(membership_id=""), Customer(membership_id="M1")]
+    transactions = [
+        TransactionCreate(
+            phone_number="5550000000",
+            license_plate="PL1",
+            date="2024-01-01T00:00:00",
+            description=rng.choice(descriptions),
+            amount=Decimal(f"{rng.randint(0, 5000) / 100:.2f}"),
+        )
+        for _ in range(count)
+    ]
+    return transactions, [rng.choice(customers) for _ in range(count)]
+
+
+def outcome(result: RewardResult):
+    return result.points_earned, result.discount_amount, result.free_months, result.applied_rule_ids, result.applied_rules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the compiled rule engine against per-transaction evaluation")
+    parser.add_argument("--rules", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--baseline-sample", type=int, default=None,
+                        help="Evaluate only this many transactions with the slow baseline (default: all)")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    rules = make_rules(args.rules, rng)
+    transactions, customers = make_transactions(args.transactions, rng)
+    sample = min(args.baseline_sample or args.transactions, args.transactions)
+
+    started = time.perf_counter()
+    expected = [reference_apply_reward_rules(t, rules, c) for t, c in zip(transactions[:sample], customers[:sample])]
+    baseline = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compiled_rules = CompiledRuleSet(rules)
+    compile_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    results = compiled_rules.evaluate_many(transactions, customers)
+    compiled = time.perf_counter() - started
+
+    wrapper_sample = min(sample, 10000)
+    started = time.perf_counter()
+    wrapped = [apply_reward_rules(t, rules, c) for t, c in zip(transactions[:wrapper_sample], customers[:wrapper_sample])]
+    wrapper = time.perf_counter() - started
+
+    mismatches = sum(outcome(a) != outcome(b) for a, b in zip(expected, results))
+    mismatches += sum(outcome(a) != outcome(b) for a, b in zip(expected, wrapped))
+
+    per_baseline = baseline / sample * 1e6
+    per_compiled = compiled / args.transactions * 1e6
+    print(f"{args.rules} rules ({len(compiled_rules)} active today) x {args.transactions} transactions")
+    print(f"  baseline              {baseline:7.2f}s for {sample} ({per_baseline:.1f}us each)")
+    print(f"  CompiledRuleSet       {compiled:7.2f}s for {args.transactions} ({per_compiled:.1f}us each), "
+          f"compiled in {compile_seconds * 1000:.1f}ms; {per_baseline / per_compiled:.0f}x faster")
+    print(f"  apply_reward_rules    {wrapper:7.2f}s for {wrapper_sample} (compiles the rules on every call)")
+    if mismatches:
+        print(f"FAIL {mismatches} result(s) differ from the baseline")
+        return 1
+    print("OK: every result matches the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark for the transaction file parser behind /transactions/upload/preview.
+
+Generates a synthetic POS export (default 500k rows) with the messy values real
+exports have: blank and "$1,200.00"-style amounts, mixed date formats, missing
+phones and customer codes. It then times:
+
+  - parse_transaction_file over the whole file (rows/s)
+  - the first chunk of iter_transaction_chunks (what stream=true waits for)
+  - the full preview request, run through upload_transactions_preview while a
+    ticker coroutine measures how long the event loop is ever blocked
+
+Parsing and serialization run in the threadpool, so the longest event-loop
+stall is bounded by GIL hand-offs (a long pandas call in the worker thread) and
+stays a small fraction of a second however large the file is.
+
+    python scripts/bench_transaction_parser.py [--rows 500000] [--xlsx] [--seed 1]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+from starlette.datastructures import UploadFile  # noqa: E402
+
+from app.routers.transactions.transaction_parser import iter_transaction_chunks, parse_transaction_file  # noqa: E402
+from app.routers.transactions.transaction_routes import upload_transactions_preview  # noqa: E402
+
+HEADER = ['Created', 'Customer', 'Customer Phone', 'License Plate', 'Pass Plan', 'Total $', 'Quantity', 'Notes']
+
+
+def make_csv(rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADER)
+    for i in range(rows):
+        phone = '' if rng.random() < 0.02 else f"555{rng.randint(1000000, 9999999)}"
+        created = rng.choice([
+            f"2024-01-{rng.randint(1, 28):02d} 10:{rng.randint(0, 59):02d}:00",
+            f"01/{rng.randint(1, 28):02d}/2024",
+            '',
+        ])
+        writer.writerow([
+            created,
+            f"A-{i:06d}" if rng.random() < 0.8 else '',
+            phone,
+            f"PL{i % 5000}",
+            rng.choice(['Gold Wash', 'Silver', '']),
+            rng.choice(['$12.50', '1,200.00', '', '7', 'abc']),
+            rng.choice(['1', '2', '']),
+            rng.choice(['note', '']),
+        ])
+    return out.getvalue().encode()
+
+
+def to_xlsx(contents: bytes) -> bytes:
+    out = io.BytesIO()
+    pd.read_csv(io.BytesIO(contents), dtype=str).to_excel(out, index=False)
+    return out.getvalue()
+
+
+async def preview_with_ticker(contents: bytes, filename: str, tick: float = 0.005):
+    """Run the preview endpoint; returns (seconds, response bytes, longest event-loop stall)"""
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(tick)
+            now = time.perf_counter()
+            stalls.append(now - last - tick)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    upload = UploadFile(file=io.BytesIO(contents), filename=filename)
+    response = await upload_transactions_preview(file=upload, stream=False, current={})
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    return elapsed, len(response.body), max(stalls, default=0.0)
+
+
+def run(label: str, contents: bytes, filename: str):
+    started = time.perf_counter()
+    rows = parse_transaction_file(contents, filename)
+    parsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = next(iter_transaction_chunks(contents, filename))
+    first_chunk = time.perf_counter() - started
+
+    elapsed, size, stall = asyncio.run(preview_with_ticker(contents, filename))
+    print(f"{label}: {len(rows)} valid rows")
+    print(f"  parse_transaction_file  {parsed:7.2f}s  ({len(rows) / parsed:,.0f} rows/s)")
+    print(f"  first chunk ({len(first.rows)} rows)  {first_chunk:7.2f}s")
+    print(f"  preview request         {elapsed:7.2f}s  ({size / 1e6:.1f} MB of JSON), "
+          f"longest event-loop stall {stall * 1000:.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transaction file parser and preview endpoint")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--xlsx", action="store_true", help="Also benchmark the same rows as an Excel file (slow to generate)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    # Chunks without phones or with unparseable rows log warnings; keep the output readable
+    logging.disable(logging.WARNING)
+
+    started = time.perf_counter()
+    contents = make_csv(args.rows, args.seed)
+    print(f"Generated {args.rows} rows ({len(contents) / 1e6:.1f} MB CSV) in {time.perf_counter() - started:.1f}s")
+    run("CSV", contents, "bench.csv")
+    if args.xlsx:
+        run("XLSX", to_xlsx(contents), "bench.xlsx")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Equivalence check for set-based transaction approval.
+
+approve_transaction_batch must behave exactly like approving the rows one at a
+time in order. This creates two identical throwaway businesses (the reward
+rules and existing customers of scripts/bench_approval.py), approves the same
+synthetic upload into both, and compares the results:
+
+  - business A: the whole upload in batches of --batch-size (default: all of it)
+  - business B: each row on its own, committed before the next
+
+Phones repeat many times, so rows of one phone share a batch, customers are
+created mid-upload, memberships change, and 4th/5th visits create and redeem
+offers. Every table approval writes is compared per phone: transactions and
+their sequences, ledger entries, balances, customers, redeemable offers, points
+history, notifications, visit stats and the daily rollup. Exits 1 on any
+difference. Both businesses are deleted at the end unless --keep is given.
+
+    python scripts/check_approval_equivalence.py [--rows 2000] [--phones 150] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_approval import create_business, delete_business, make_upload  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import aliased  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.routers.businesses.daily_stats_models import BusinessDailyStats  # noqa: E402
+from app.routers.customers.cust_models import Customer  # noqa: E402
+from app.routers.customers.visit_stats_models import CustomerVisitStats  # noqa: E402
+from app.routers.notifications.notification_models import Notification  # noqa: E402
+from app.routers.rewards.offers_models import Offer  # noqa: E402
+from app.routers.rewards.points_ledger_models import PointBalance, PointsLedger  # noqa: E402
+from app.routers.rewards.points_models import PointsHistory  # noqa: E402
+from app.routers.rewards.redeemable_offer_models import RedeemableOffer  # noqa: E402
+from app.routers.rewards.rule_cache import get_compiled_rules  # noqa: E402
+from app.routers.transactions.approval_service import approve_transaction_batch  # noqa: E402
+from app.routers.transactions.transaction_models import Transaction  # noqa: E402
+from app.write_behind import flush_write_behind  # noqa: E402
+
+
+def approve(business_id, upload, batch_size: int):
+    db = SessionLocal()
+    try:
+        for start in range(0, len(upload), batch_size):
+            reward_rules = get_compiled_rules(db, business_id)
+            approve_transaction_batch(db, business_id, upload[start:start + batch_size], reward_rules)
+            db.commit()
+    finally:
+        db.close()
+    flush_write_behind()
+
+
+def snapshot(business_id) -> dict:
+    """Everything approval wrote for the business, without ids or timestamps, in a stable order"""
+    redeemed = aliased(Transaction)
+    trigger = aliased(Transaction)
+    queries = {
+        "transactions": select(
+            Transaction.phone_number, Transaction.transaction_sequence, Transaction.date, Transaction.amount,
+            Transaction.discount_amount, Transaction.description, Transaction.is_approved,
+        ).where(Transaction.business_id == business_id),
+        "points_ledger": select(
+            Customer.phone, Transaction.transaction_sequence, Offer.name, PointsLedger.points_earned,
+            PointsLedger.reward_type_applied,
+        ).join(Customer, Customer.id == PointsLedger.customer_id)
+        .outerjoin(Transaction, Transaction.id == PointsLedger.transaction_id)
+        .outerjoin(Offer, Offer.id == PointsLedger.rule_id)
+        .where(Customer.business_id == business_id),
+        "balances": select(
+            Customer.phone, Customer.membership_id, Customer.points, PointBalance.total_points,
+        ).outerjoin(PointBalance, PointBalance.customer_id == Customer.id)
+        .where(Customer.business_id == business_id),
+        "redeemable_offers": select(
+            Customer.phone, Offer.name, RedeemableOffer.customer_type, RedeemableOffer.reward_type,
+            RedeemableOffer.reward_value, RedeemableOffer.is_redeemed,
+            trigger.transaction_sequence, redeemed.transaction_sequence,
+        ).join(Customer, Customer.id == RedeemableOffer.customer_id)
+        .outerjoin(Offer, Offer.id == RedeemableOffer.rule_id)
+        .outerjoin(trigger, trigger.id == RedeemableOffer.trigger_transaction_id)
+        .outerjoin(redeemed, redeemed.id == RedeemableOffer.redeemed_transaction_id)
+        .where(RedeemableOffer.business_id == business_id),
+        "points_history": select(
+            Customer.phone, PointsHistory.points, PointsHistory.reason,
+        ).join(Customer, Customer.id == PointsHistory.customer_id)
+        .where(PointsHistory.business_id == business_id),
+        "notifications": select(
+            Customer.phone, Notification.channel, Notification.type, func.count(),
+        ).join(Customer, Customer.id == Notification.customer_id)
+        .where(Customer.business_id == business_id)
+        .group_by(Customer.phone, Notification.channel, Notification.type),
+        "visit_stats": select(
+            CustomerVisitStats.phone_number, CustomerVisitStats.visit_count,
+            CustomerVisitStats.last_visit_at, CustomerVisitStats.lifetime_spend,
+        ).where(CustomerVisitStats.business_id == business_id),
+        "daily_stats": select(
+            BusinessDailyStats.day, BusinessDailyStats.visits, BusinessDailyStats.revenue,
+            BusinessDailyStats.discounts, BusinessDailyStats.points_issued, BusinessDailyStats.points_redeemed,
+            BusinessDailyStats.new_customers, BusinessDailyStats.offers_redeemed,
+        ).where(BusinessDailyStats.business_id == business_id),
+    }
+    db = SessionLocal()
+    try:
+        return {
+            name: sorted((tuple(row) for row in db.execute(query)), key=lambda row: tuple(map(str, row)))
+            for name, query in queries.items()
+        }
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check batched approval against row-by-row approval")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--phones", type=int, default=150, help="Fewer phones means more repeat visits per batch")
+    parser.add_argument("--customers", type=int, default=60, help="Phones that are already customers")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per batched approval (default: all)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep both businesses and their rows")
+    args = parser.parse_args(argv)
+
+    upload = make_upload(args.rows, args.phones, args.seed)
+    batched_id = create_business(args.customers, "approval check (batched)")
+    single_id = create_business(args.customers, "approval check (row by row)")
+    try:
+        approve(batched_id, upload, args.batch_size or len(upload))
+        approve(single_id, upload, 1)
+        batched, single = snapshot(batched_id), snapshot(single_id)
+    finally:
+        if not args.keep:
+            delete_business(batched_id)
+            delete_business(single_id)
+
+    failed = False
+    for name in batched:
+        same = batched[name] == single[name]
+        print(f"{'ok  ' if same else 'FAIL'} {name}: {len(batched[name])} batched, {len(single[name])} row by row")
+        if not same:
+            failed = True
+            differences = [pair for pair in zip(batched[name], single[name]) if pair[0] != pair[1]]
+            for batched_row, single_row in differences[:5]:
+                print(f"       batched    {batched_row}\n       row by row {single_row}")
+    if failed:
+        return 1
+    print(f"OK: {args.rows} rows approved in batches and row by row wrote the same data")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Load test: the read-heavy endpoints on the threadpool vs the async engine (default 1k clients).
+
+Seeds a throwaway business with customers and approved transactions (like
+load_pool_sizing.py), then runs the app twice with the same settings apart from
+ASYNC_DATABASE_URL: unset, so the async endpoints run their queries on the
+request threadpool, and set to --async-url, so they run on SQLAlchemy's asyncio
+engine. Each time --clients concurrent clients, half signed in as customers and
+half as the business, cycle through the endpoints served by run_db
+(/customer/dashboard, /customer/points, /customer/offers,
+/staff/customer/lookup/{phone}, /rewards/points/balances, GET /transactions/)
+for --duration seconds.
+
+Prints requests/s, p50/p99/max latency and failed requests for both runs.
+--async-url defaults to DATABASE_URL with its async driver (asyncpg for
+Postgres, aiosqlite for SQLite); when that driver or greenlet isn't installed
+only the threadpool run happens and the script exits 1. The business and its
+rows are deleted at the end unless --keep is given.
+
+    python scripts/load_async_reads.py [--clients 1000] [--duration 20] [--workers 1] [--async-url <url>]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_approval import delete_business, phone  # noqa: E402
+from load_client import Connection, app_server, format_percentiles, percentiles  # noqa: E402
+from load_pool_sizing import business_token, seed_business  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model and creates missing tables)
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from app.database import SessionLocal, db_url  # noqa: E402
+from app.routers.customers.cust_models import Customer  # noqa: E402
+from app.security import create_access_token  # noqa: E402
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def default_async_url() -> str:
+    url = make_url(db_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise SystemExit(f"No known async driver for {url.get_backend_name()}; pass --async-url")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def async_driver_error(async_url: str):
+    """Why the server would fall back to the threadpool with this URL, or None"""
+    try:
+        import greenlet  # noqa: F401
+        from sqlalchemy.ext.asyncio import create_async_engine
+        create_async_engine(async_url).sync_engine.dispose()
+    except ImportError as e:
+        return str(e)
+    return None
+
+
+def customer_tokens(business_id, count: int):
+    db = SessionLocal()
+    try:
+        customer_ids = db.scalars(select(Customer.id).where(Customer.business_id == business_id).limit(count)).all()
+    finally:
+        db.close()
+    return [
+        create_access_token({"sub": str(customer_id), "role": "customer",
+                             "customer_id": str(customer_id), "business_id": str(business_id)})
+        for customer_id in customer_ids
+    ], customer_ids
+
+
+def client_reads(index: int, customer_tokens, customer_ids, token: str, customers: int):
+    """(path, token) pairs for one client: even clients are customers, odd ones the business"""
+    rng = random.Random(index)
+    if index % 2 == 0:
+        customer_token = customer_tokens[index // 2 % len(customer_tokens)]
+        paths = ["/customer/dashboard", "/customer/points", "/customer/offers"]
+        while True:
+            for path in paths:
+                yield path, customer_token
+    while True:
+        yield f"/staff/customer/lookup/{phone(rng.randrange(customers))}", token
+        yield f"/rewards/points/balances?customer_id={rng.choice(customer_ids)}", token
+        yield "/transactions/?limit=20", token
+
+
+async def run_clients(url: str, reads, duration: float):
+    """One coroutine per reads generator until duration elapses; returns latencies, statuses, seconds"""
+    latencies = []
+    statuses = Counter()
+    deadline = time.monotonic() + duration
+
+    async def client(requests):
+        connection = Connection(url)
+        try:
+            while time.monotonic() < deadline:
+                path, token = next(requests)
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.request("GET", path, token=token)
+                except (ConnectionError, asyncio.TimeoutError):
+                    status = "connection error"
+                    await connection.close()
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(requests) for requests in reads))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the threadpool and async engine paths under many clients")
+    parser.add_argument("--clients", type=int, default=1000, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--async-url", default=None, help="ASYNC_DATABASE_URL for the async run")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=20000, help="Approved transactions to seed")
+    parser.add_argument("--keep", action="store_true", help="Keep the test business")
+    args = parser.parse_args(argv)
+
+    async_url = args.async_url or default_async_url()
+    driver_error = async_driver_error(async_url)
+    runs = {"threadpool": ""}
+    if driver_error is None:
+        runs["async engine"] = async_url
+    else:
+        print(f"Async driver unavailable for {make_url(async_url).drivername} ({driver_error}); "
+              f"only the threadpool run is possible")
+
+    business_id = seed_business(args.customers, args.rows, "async reads load test")
+    results = {}
+    try:
+        tokens, customer_ids = customer_tokens(business_id, max(1, args.clients // 2))
+        token = business_token(business_id)
+        for label, url_setting in runs.items():
+            with app_server({"ASYNC_DATABASE_URL": url_setting}, workers=args.workers) as url:
+                reads = [client_reads(i, tokens, customer_ids, token, args.customers) for i in range(args.clients)]
+                results[label] = asyncio.run(run_clients(url, reads, args.duration))
+    finally:
+        if not args.keep:
+            delete_business(business_id)
+
+    print(f"{args.clients} clients, {args.workers} worker(s), {args.duration:.0f}s per run "
+          f"({make_url(db_url).get_backend_name()})")
+    for label, (latencies, statuses, seconds) in results.items():
+        errors = {status: count for status, count in statuses.items() if status != 200}
+        print(f"  {label:<13} {statuses[200] / seconds:,.0f} requests/s; {format_percentiles(percentiles(latencies))}")
+        if errors:
+            print(f"  {'':<13} failed: {errors}")
+    return 0 if driver_error is None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Load test: latency of other endpoints during a login storm (store opening).
+
+Starts the app under uvicorn (or uses --url), creates a throwaway business with
+a known password and logs in once for a token. A probe then calls a non-auth
+endpoint (GET /business/staff/ by default) every --probe-interval seconds:
+first with the server idle, then while --logins concurrent clients sign in to
+/auth/login-business back to back. Each login runs bcrypt on the server's
+password hashing pool.
+
+Prints the probe's p50/p99/max for both phases, the login outcomes (200, 503
+from a full hashing queue, anything else) and the server's password hashing
+counters (queue depth, rejections) from GET /admin/metrics, read with a
+throwaway admin. With --max-p99-ms it exits 1
+when the probe's p99 during the storm exceeds that. The server must use the
+same DATABASE_URL as this script; the business and admin are deleted at the
+end unless --keep is given.
+
+    python scripts/load_login_storm.py [--logins 100] [--duration 20] [--idle 5] [--max-p99-ms 100]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_client import Connection, app_server, format_percentiles, percentiles  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model and creates missing tables)
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.routers.admin.admin_models import Admin  # noqa: E402
+from app.routers.businesses.biz_models import Business  # noqa: E402
+from app.security import create_access_token, hash_password  # noqa: E402
+
+PASSWORD = "storm-test-password"
+
+
+def create_accounts():
+    """A business to log in as, and an admin whose token reads the server's metrics"""
+    db = SessionLocal()
+    try:
+        business = Business(id=uuid.uuid4(), name="login storm", email=f"storm-{uuid.uuid4()}@example.com",
+                            password_hash=hash_password(PASSWORD))
+        admin = Admin(id=uuid.uuid4(), email=f"storm-admin-{uuid.uuid4()}@example.com", password_hash="x")
+        db.add_all([business, admin])
+        db.commit()
+        return business.email, admin.id
+    finally:
+        db.close()
+
+
+def delete_accounts(email: str, admin_id):
+    db = SessionLocal()
+    try:
+        db.execute(delete(Business).where(Business.email == email))
+        db.execute(delete(Admin).where(Admin.id == admin_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_storm(url: str, email: str, admin_token: str, args):
+    credentials = {"email": email, "password": PASSWORD}
+    probe = Connection(url)
+    status, body = await probe.request("POST", "/auth/login-business", credentials)
+    if status != 200:
+        raise RuntimeError(f"Login failed with {status}: {body[:200]!r}")
+    token = json.loads(body)["access_token"]
+
+    probes = {"idle": [], "storm": []}
+    probe_errors = Counter()
+    logins = Counter()
+    login_latencies = []
+    phase = "idle"
+    stopping = asyncio.Event()
+    storming = asyncio.Event()
+
+    async def prober():
+        while not stopping.is_set():
+            started = time.perf_counter()
+            status, _ = await probe.request("GET", args.probe_path, token=token)
+            elapsed = time.perf_counter() - started
+            if status == 200:
+                probes[phase].append(elapsed)
+            else:
+                probe_errors[status] += 1
+            await asyncio.sleep(args.probe_interval)
+
+    async def login_loop():
+        connection = Connection(url)
+        try:
+            while storming.is_set():
+                started = time.perf_counter()
+                status, _ = await connection.request("POST", "/auth/login-business", credentials)
+                logins[status] += 1
+                if status == 200:
+                    login_latencies.append(time.perf_counter() - started)
+                elif status == 503:
+                    await asyncio.sleep(1)  # Retry-After
+        finally:
+            await connection.close()
+
+    probing = asyncio.create_task(prober())
+    await asyncio.sleep(args.idle)
+    phase = "storm"
+    storming.set()
+    started = time.perf_counter()
+    storm = [asyncio.create_task(login_loop()) for _ in range(args.logins)]
+    await asyncio.sleep(args.duration)
+    # Logins already queued on the server still finish; the storm lasts until they do
+    storming.clear()
+    await asyncio.gather(*storm)
+    storm_seconds = time.perf_counter() - started
+    stopping.set()
+    await probing
+
+    status, body = await probe.request("GET", "/admin/metrics", token=admin_token)
+    hashing = json.loads(body)["password_hashing"] if status == 200 else {"error": status}
+    await probe.close()
+    return probes, probe_errors, logins, login_latencies, storm_seconds, hashing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure other endpoints' latency during a login storm")
+    parser.add_argument("--url", default=None, help="A running server (default: start one with uvicorn)")
+    parser.add_argument("--logins", type=int, default=100, help="Concurrent clients logging in")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of login storm")
+    parser.add_argument("--idle", type=float, default=5, help="Seconds of probing before the storm")
+    parser.add_argument("--probe-path", default="/business/staff/")
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Fail if the probe p99 during the storm is higher")
+    parser.add_argument("--keep", action="store_true", help="Keep the test business")
+    args = parser.parse_args(argv)
+
+    email, admin_id = create_accounts()
+    admin_token = create_access_token({"sub": str(admin_id), "role": "admin"})
+    try:
+        with app_server() if args.url is None else contextlib.nullcontext(args.url.rstrip("/")) as url:
+            probes, probe_errors, logins, login_latencies, storm_seconds, hashing = asyncio.run(
+                run_storm(url, email, admin_token, args)
+            )
+    finally:
+        if not args.keep:
+            delete_accounts(email, admin_id)
+
+    idle, storm = percentiles(probes["idle"]), percentiles(probes["storm"])
+    print(f"Probe GET {args.probe_path} every {args.probe_interval * 1000:.0f}ms")
+    print(f"  idle:              {format_percentiles(idle)}")
+    print(f"  during the storm:  {format_percentiles(storm)}")
+    if probe_errors:
+        print(f"  probe errors: {dict(probe_errors)}")
+    print(f"{args.logins} clients logging in for {args.duration:.0f}s ({storm_seconds:.0f}s until queued logins finished): "
+          f"{logins[200]} succeeded ({logins[200] / storm_seconds:.1f}/s), {logins[503]} got 503, "
+          f"{sum(logins.values()) - logins[200] - logins[503]} other")
+    print(f"  successful logins: {format_percentiles(percentiles(login_latencies))}")
+    print(f"  server password hashing: {hashing}")
+    if args.max_p99_ms is not None and (probe_errors or storm["p99"] > args.max_p99_ms):
+        print(f"FAIL probe p99 during the storm is above {args.max_p99_ms:.0f}ms or probes failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
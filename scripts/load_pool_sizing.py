@@ -0,0 +1,231 @@
+"""
+Load test for choosing DB_POOL_SIZE / DB_MAX_OVERFLOW (default: 4 uvicorn workers).
+
+Seeds a throwaway business with customers and approved transactions (through
+approve_transaction_batch, like bench_approval.py), then for each
+pool_size:max_overflow pair in --configs starts the app with those settings and
+--workers worker processes. --clients concurrent clients cycle through a mix of
+business read endpoints (staff list, dashboard, a page of transactions, a
+customer lookup, offers) for --duration seconds.
+
+For every configuration it prints requests/s, p50/p99/max latency, non-200
+responses (a checkout that waits longer than DB_POOL_TIMEOUT_SECONDS fails the
+request), and the worst checkout wait and pool timeouts any worker reported
+under db_pool in GET /admin/metrics. The metrics are per process, so they are
+sampled over several fresh connections to reach every worker. On Postgres it
+also samples pg_stat_activity for the peak number of server connections, to
+compare with max_connections (workers x (pool size + overflow) is the ceiling).
+
+Use the same DATABASE_URL as the deployment (Postgres for meaningful numbers).
+The business and its rows are deleted at the end unless --keep is given.
+
+    python scripts/load_pool_sizing.py [--configs 5:0,10:5,20:10] [--workers 4] [--clients 200] [--duration 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_approval import create_business, delete_business, make_upload, phone  # noqa: E402
+from load_client import Connection, app_server, format_percentiles, percentiles  # noqa: E402
+
+import app.main  # noqa: E402,F401  (registers every model and creates missing tables)
+from sqlalchemy import delete, text  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.routers.admin.admin_models import Admin  # noqa: E402
+from app.routers.rewards.rule_cache import get_compiled_rules  # noqa: E402
+from app.routers.transactions.approval_service import approve_transaction_batch  # noqa: E402
+from app.security import create_access_token  # noqa: E402
+from app.write_behind import flush_write_behind  # noqa: E402
+
+
+def seed_business(customers: int, rows: int, label: str, seed: int = 1):
+    """A business with customers and rows approved transactions; returns its id"""
+    business_id = create_business(customers, label)
+    db = SessionLocal()
+    try:
+        upload = make_upload(rows, customers, seed)
+        for start in range(0, rows, 10000):
+            approve_transaction_batch(db, business_id, upload[start:start + 10000], get_compiled_rules(db, business_id))
+            db.commit()
+        flush_write_behind()
+    finally:
+        db.close()
+    return business_id
+
+
+def business_token(business_id) -> str:
+    """The access token login-business issues for this business"""
+    return create_access_token({"sub": str(business_id), "role": "business",
+                                "business_id": str(business_id), "org_id": "None"})
+
+
+def business_reads(customers: int):
+    """The endpoint mix: one path per call, cycling through the business read endpoints"""
+    rng = random.Random()
+    paths = [
+        lambda: "/business/staff/",
+        lambda: "/businesses/dashboard",
+        lambda: "/transactions/?limit=20",
+        lambda: f"/staff/customer/lookup/{phone(rng.randrange(customers))}",
+        lambda: "/rewards/offers",
+    ]
+    while True:
+        for path in paths:
+            yield path()
+
+
+def create_admin():
+    db = SessionLocal()
+    try:
+        admin = Admin(id=uuid.uuid4(), email=f"pool-admin-{uuid.uuid4()}@example.com", password_hash="x")
+        db.add(admin)
+        db.commit()
+        return admin.id
+    finally:
+        db.close()
+
+
+def delete_admin(admin_id):
+    db = SessionLocal()
+    try:
+        db.execute(delete(Admin).where(Admin.id == admin_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def server_connections():
+    """Connections to this database on a Postgres server, or None elsewhere"""
+    if engine.dialect.name != "postgresql":
+        return None
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+        ).scalar()
+
+
+async def run_clients(url: str, token: str, clients: int, duration: float, customers: int):
+    """clients coroutines reading until duration elapses; returns latencies, statuses, seconds, peak connections"""
+    latencies = []
+    statuses = Counter()
+    peak = [None]
+    deadline = time.monotonic() + duration
+
+    async def client():
+        connection = Connection(url)
+        reads = business_reads(customers)
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.request("GET", next(reads), token=token)
+                except (ConnectionError, asyncio.TimeoutError):
+                    status = "connection error"
+                    await connection.close()
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            await connection.close()
+
+    async def sample_connections():
+        loop = asyncio.get_running_loop()
+        while time.monotonic() < deadline:
+            count = await loop.run_in_executor(None, server_connections)
+            if count is None:
+                return
+            peak[0] = max(peak[0] or 0, count)
+            await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    await asyncio.gather(sample_connections(), *(client() for _ in range(clients)))
+    return latencies, statuses, time.perf_counter() - started, peak[0]
+
+
+async def worst_pool_stats(url: str, admin_token: str, samples: int):
+    """The highest checkout wait and timeout count reported by any worker reached"""
+    worst = {"max_wait_ms": 0.0, "timeouts": 0, "workers_sampled": 0}
+    seen = set()
+    for _ in range(samples):
+        connection = Connection(url)
+        status, body = await connection.request("GET", "/admin/metrics", token=admin_token)
+        await connection.close()
+        if status != 200:
+            continue
+        pool = json.loads(body)["db_pool"]
+        # checkouts differs between workers, so it tells the samples apart well enough
+        seen.add(pool.get("checkouts"))
+        worst["max_wait_ms"] = max(worst["max_wait_ms"], pool.get("max_wait_ms") or 0.0)
+        worst["timeouts"] = max(worst["timeouts"], pool.get("timeouts") or 0)
+    worst["workers_sampled"] = len(seen)
+    return worst
+
+
+def parse_configs(value: str):
+    configs = []
+    for pair in value.split(","):
+        size, _, overflow = pair.partition(":")
+        configs.append((int(size), int(overflow or 0)))
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare connection pool sizes under concurrent reads")
+    parser.add_argument("--configs", type=parse_configs, default=parse_configs("5:0,10:5,20:10"),
+                        help="Comma-separated pool_size:max_overflow pairs")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per configuration")
+    parser.add_argument("--pool-timeout", type=float, default=None, help="DB_POOL_TIMEOUT_SECONDS for the server")
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=20000, help="Approved transactions to seed")
+    parser.add_argument("--keep", action="store_true", help="Keep the test business")
+    args = parser.parse_args(argv)
+
+    business_id = seed_business(args.customers, args.rows, "pool sizing load test")
+    admin_id = create_admin()
+    token = business_token(business_id)
+    admin_token = create_access_token({"sub": str(admin_id), "role": "admin"})
+    results = []
+    try:
+        for size, overflow in args.configs:
+            env = {"DB_POOL_SIZE": str(size), "DB_MAX_OVERFLOW": str(overflow)}
+            if args.pool_timeout is not None:
+                env["DB_POOL_TIMEOUT_SECONDS"] = str(args.pool_timeout)
+            with app_server(env, workers=args.workers) as url:
+                latencies, statuses, seconds, peak = asyncio.run(
+                    run_clients(url, token, args.clients, args.duration, args.customers)
+                )
+                pool = asyncio.run(worst_pool_stats(url, admin_token, 4 * args.workers))
+            results.append((size, overflow, latencies, statuses, seconds, peak, pool))
+    finally:
+        if not args.keep:
+            delete_business(business_id)
+            delete_admin(admin_id)
+
+    print(f"{args.clients} clients, {args.workers} workers, {args.duration:.0f}s per configuration "
+          f"({engine.dialect.name})")
+    for size, overflow, latencies, statuses, seconds, peak, pool in results:
+        ceiling = args.workers * (size + overflow)
+        errors = sum(count for status, count in statuses.items() if status != 200)
+        print(f"pool_size={size} max_overflow={overflow} (at most {ceiling} connections)")
+        print(f"  {statuses[200] / seconds:,.0f} requests/s; {format_percentiles(percentiles(latencies))}")
+        print(f"  errors: {errors} {dict((s, c) for s, c in statuses.items() if s != 200) if errors else ''}".rstrip())
+        print(f"  worst worker: checkout wait max {pool['max_wait_ms']:.1f}ms, {pool['timeouts']} pool timeouts "
+              f"({pool['workers_sampled']} of {args.workers} workers sampled)")
+        if peak is not None:
+            print(f"  peak server connections: {peak}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Concurrency stress check for the points ledger.
+
+Runs many threads against one throwaway business, each committing a random
+mix of redemptions (deduct_points_from_ledger's conditional UPDATE), single
+awards (add_points_to_ledger) and approval-style batches
+(add_points_to_ledger_bulk) for a small set of shared customers, so the same
+balances are contended on every step. Afterwards it asserts that:
+
+  - no deduction ever returned a negative balance, and none is negative now
+  - every customer's ledger sum equals point_balances and customers.points
+    (verify_balances reports no drift)
+  - the ledger holds exactly the entries the threads committed
+
+Uses the configured DATABASE_URL (Postgres for real row-lock contention;
+SQLite serializes writers). The business and its rows are deleted at the end
+unless --keep is given. Exits 1 if any check fails.
+
+    python scripts/stress_points_ledger.py [--threads 8] [--customers 10] [--operations 300]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.main  # noqa: E402,F401  (registers every model and creates missing tables)
+from sqlalchemy import delete, func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.routers.businesses.biz_models import Business  # noqa: E402
+from app.routers.customers.cust_models import Customer  # noqa: E402
+from app.routers.rewards.points_ledger_models import PointBalance, PointBalanceSnapshot, PointsLedger  # noqa: E402
+from app.routers.rewards.points_ledger_service import (  # noqa: E402
+    InsufficientPointsError,
+    add_points_to_ledger,
+    add_points_to_ledger_bulk,
+    deduct_points_from_ledger,
+)
+from app.routers.rewards.points_replay_service import verify_balances  # noqa: E402
+
+STARTING_POINTS = 100
+# SQLite reports "database is locked" when a writer waits too long; retry those
+MAX_RETRIES = 20
+
+
+def create_fixture(customers: int):
+    db = SessionLocal()
+    try:
+        business = Business(id=uuid.uuid4(), name="ledger stress", email=f"stress-{uuid.uuid4()}@example.com",
+                            password_hash="x")
+        db.add(business)
+        customer_ids = [uuid.uuid4() for _ in range(customers)]
+        db.add_all([
+            Customer(id=customer_id, business_id=business.id, phone=f"555{i:07d}", points=0)
+            for i, customer_id in enumerate(customer_ids)
+        ])
+        db.flush()
+        add_points_to_ledger_bulk(db, [
+            {"customer_id": customer_id, "business_id": business.id, "points_earned": STARTING_POINTS,
+             "reward_type_applied": "POINTS"}
+            for customer_id in customer_ids
+        ])
+        db.commit()
+        return business.id, customer_ids
+    finally:
+        db.close()
+
+
+def worker(business_id, customer_ids, operations, seed, results, errors):
+    rng = random.Random(seed)
+    counts = Counter()
+    db = SessionLocal()
+    try:
+        for _ in range(operations):
+            choice = rng.random()
+            customer_id = rng.choice(customer_ids)
+            for attempt in range(MAX_RETRIES):
+                try:
+                    if choice < 0.6:
+                        points = rng.randint(1, 60)
+                        try:
+                            balance = deduct_points_from_ledger(db, customer_id, points, "REDEEM", business_id=business_id)
+                        except InsufficientPointsError:
+                            db.rollback()
+                            counts["insufficient"] += 1
+                            break
+                        if balance < 0:
+                            errors.append(f"deduction of {points} left {customer_id} at {balance}")
+                        counts["deducted"] += 1
+                        counts["entries"] += 1
+                    elif choice < 0.8:
+                        add_points_to_ledger(db, customer_id, rng.randint(1, 30), "POINTS", business_id=business_id)
+                        counts["added"] += 1
+                        counts["entries"] += 1
+                    else:
+                        batch = [
+                            {"customer_id": rng.choice(customer_ids), "business_id": business_id,
+                             "points_earned": rng.randint(1, 20), "reward_type_applied": "POINTS"}
+                            for _ in range(rng.randint(2, 6))
+                        ]
+                        add_points_to_ledger_bulk(db, batch)
+                        counts["bulk"] += 1
+                        counts["entries"] += len(batch)
+                    db.commit()
+                    break
+                except OperationalError:
+                    db.rollback()
+                    counts["retried"] += 1
+                    time.sleep(0.01 * (attempt + 1))
+            else:
+                errors.append("an operation kept failing with OperationalError")
+    except Exception as e:
+        errors.append(f"worker failed: {e!r}")
+    finally:
+        db.close()
+        results.append(counts)
+
+
+def check(business_id, customer_ids, expected_entries, errors):
+    db = SessionLocal()
+    try:
+        entries = db.execute(
+            select(func.count()).select_from(PointsLedger).where(PointsLedger.customer_id.in_(customer_ids))
+        ).scalar()
+        if entries != expected_entries:
+            errors.append(f"ledger has {entries} entries, threads committed {expected_entries}")
+
+        negative = db.execute(
+            select(func.count()).select_from(PointBalance)
+            .where(PointBalance.customer_id.in_(customer_ids), PointBalance.total_points < 0)
+        ).scalar()
+        if negative:
+            errors.append(f"{negative} balance(s) are negative")
+
+        report = verify_balances(db, business_id)
+        if report["customers"] != len(customer_ids) or report["drifted"]:
+            errors.append(f"balances drift from the ledger: {report}")
+        return report
+    finally:
+        db.close()
+
+
+def cleanup(business_id, customer_ids):
+    db = SessionLocal()
+    try:
+        for model, column in (
+            (PointsLedger, PointsLedger.customer_id),
+            (PointBalanceSnapshot, PointBalanceSnapshot.customer_id),
+            (PointBalance, PointBalance.customer_id),
+            (Customer, Customer.id),
+        ):
+            db.execute(delete(model).where(column.in_(customer_ids)))
+        db.execute(delete(Business).where(Business.id == business_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the points ledger with concurrent writers")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--customers", type=int, default=10, help="Fewer customers means more contention")
+    parser.add_argument("--operations", type=int, default=300, help="Operations per thread")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--keep", action="store_true", help="Keep the stress business and its rows")
+    args = parser.parse_args(argv)
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+
+    business_id, customer_ids = create_fixture(args.customers)
+    results, errors = [], []
+    threads = [
+        threading.Thread(target=worker, args=(business_id, customer_ids, args.operations, seed + i, results, errors))
+        for i in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    totals = sum(results, Counter())
+    try:
+        report = check(business_id, customer_ids, totals["entries"] + len(customer_ids), errors)
+    finally:
+        if not args.keep:
+            cleanup(business_id, customer_ids)
+
+    operations = totals["deducted"] + totals["insufficient"] + totals["added"] + totals["bulk"]
+    print(f"{args.threads} threads, {args.customers} customers, seed {seed}: {operations} operations "
+          f"in {elapsed:.1f}s ({operations / elapsed:.0f}/s)")
+    print(f"  {totals['deducted']} deductions, {totals['insufficient']} refused for insufficient points, "
+          f"{totals['added']} single adds, {totals['bulk']} bulk adds, {totals['retried']} retries")
+    print(f"  verify_balances: {report['customers']} customer(s), {report['drifted']} drifted")
+    if errors:
+        for error in errors[:20]:
+            print(f"FAIL {error}")
+        return 1
+    print("OK: the ledger sum equals every balance and no balance went negative")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())